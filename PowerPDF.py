@@ -1,5 +1,85 @@
-from fpdf import FPDF
-from typing import List, Sequence, Optional
+import gc
+import os
+from itertools import chain
+
+from fpdf import FPDF, FPDF_VERSION
+from fpdf.enums import PDFResourceType, XPos, YPos
+from fpdf.output import OutputProducer, ResourceCatalog
+from fpdf.syntax import Name, PDFArray, PDFContentStream
+from typing import Callable, Iterable, Iterator, NamedTuple, Sequence, Optional
+
+import assets
+import instrument
+
+# โลโก้หัวกระดาษ (decode ครั้งเดียวต่อ process ดู assets.preload_image)
+LOGO_TBKK = "images/tbkk-logo.png"
+LOGO_TBK_GROUP = "images/tbkGroup-logo.png"
+# ความกว้างที่วาดบนหัวกระดาษ (mm)
+LOGO_WIDTHS = {LOGO_TBKK: 24, LOGO_TBK_GROUP: 30}
+
+# ขอบล่างของข้อความใน header() (บรรทัด Tel / บิลออกให้วันที่)
+HEADER_BOTTOM = 44
+
+# เลข XObject ของ template เริ่มที่ค่านี้ ไม่ให้ชนกับเลขรูป (fpdf ใช้ลำดับรูป 1, 2, ...)
+TEMPLATE_INDEX_BASE = 9000
+
+
+def _templates_supported():
+    # template ใช้ internals ของ fpdf2 2.8 (form_xobjects / scan_stream ของ ResourceCatalog
+    # และ _registered / _blend_group ที่ OutputProducer อ่านตอน output) รุ่นอื่นวาดตรงแทน
+    return (
+        FPDF_VERSION.startswith("2.8.")
+        and hasattr(ResourceCatalog, "scan_stream")
+        and isinstance(getattr(ResourceCatalog(), "form_xobjects", None), list)
+        and hasattr(OutputProducer, "_register_form_xobject_placeholders")
+        and hasattr(OutputProducer, "_finalize_form_xobjects")
+    )
+
+
+TEMPLATES_SUPPORTED = _templates_supported()
+
+
+# ====== Output profiles ======
+class OutputProfile(NamedTuple):
+    """
+    - compress: บีบอัด content stream ของหน้า/template
+    - level: ระดับ zlib ของ stream ที่บีบอัด (ฟอนต์บีบอัดเสมอ) -1 = ค่าเริ่มต้นของ zlib
+    - image_dpi: ย่อโลโก้ให้เหลือความละเอียดนี้ตามขนาดที่วาดจริง (None = ใช้รูปต้นฉบับ)
+    """
+    compress: bool
+    level: int
+    image_dpi: Optional[int]
+
+
+OUTPUT_PROFILES = {
+    # preview/ร่าง: ไม่บีบอัดหน้า ฟอนต์บีบอัดระดับเร็วสุด
+    "fast": OutputProfile(compress=False, level=1, image_dpi=None),
+    # ค่าเดิมของ fpdf2
+    "balanced": OutputProfile(compress=True, level=-1, image_dpi=None),
+    # เก็บถาวร: zlib สูงสุด + ย่อโลโก้เหลือ 300 dpi
+    "compact": OutputProfile(compress=True, level=9, image_dpi=300),
+}
+DEFAULT_PROFILE = "balanced"
+
+
+class _TemplateResources:
+    """
+    resource dictionary ของ template (ฟอนต์/รูปที่ content stream อ้างถึง)
+    fpdf จะเรียก get_resource_dictionary ตอน output เมื่อรู้ object id แล้ว
+    """
+
+    def __init__(self, found):
+        self.fonts = sorted(int(i) for t, i in found if t == PDFResourceType.FONT)
+        self.images = sorted(int(i) for t, i in found if t == PDFResourceType.X_OBJECT)
+
+    def get_resource_dictionary(self, _gfxstates, _patterns, _shadings, fonts, images):
+        parts = []
+        if self.fonts:
+            parts.append("/Font<<" + "".join(f"/F{i} {fonts[i].id} 0 R" for i in self.fonts) + ">>")
+        if self.images:
+            parts.append("/XObject<<" + "".join(f"/I{i} {images[i].id} 0 R" for i in self.images) + ">>")
+        return "<<" + "".join(parts) + ">>"
+
 
 class PowerPDF(FPDF):
     def __init__(
@@ -11,18 +91,34 @@ class PowerPDF(FPDF):
         unit="mm",
         format="A4",
         margin=12,
+        profile: str = DEFAULT_PROFILE,
     ):
+        """
+        - profile: "fast" / "balanced" / "compact" ขนาดไฟล์กับความเร็ว (ดู OUTPUT_PROFILES)
+        """
+        if profile not in OUTPUT_PROFILES:
+            raise ValueError(f"ไม่รู้จัก output profile {profile!r} (ใช้ได้: {', '.join(OUTPUT_PROFILES)})")
         super().__init__(orientation=orientation, unit=unit, format=format)
+        self.profile = profile
+        self.output_profile = OUTPUT_PROFILES[profile]
+        self.set_compression(self.output_profile.compress)
         self.title_text = title
         self.period_text = period
         self.issued_text = issued
 
-        # ฟอนต์ไทย
-        self.add_font("TH", "",   "fonts/THSarabunNew.ttf",        uni=True) 
-        self.add_font("TH", "B",  "fonts/THSarabunNew-Bold.ttf",   uni=True) 
-        self.add_font("TH", "I",  "fonts/THSarabunNew-Italic.ttf", uni=True)  
+        # ฟอนต์ไทย (parse ครั้งเดียวต่อ process แล้วแชร์ข้ามเอกสาร ดู assets.py)
+        with instrument.span("fonts"):
+            assets.add_font(self, "TH", "",   "fonts/THSarabunNew.ttf")
+            assets.add_font(self, "TH", "B",  "fonts/THSarabunNew-Bold.ttf")
+            assets.add_font(self, "TH", "I",  "fonts/THSarabunNew-Italic.ttf")
         self.set_font("TH", size=12)
 
+        with instrument.span("images"):
+            for logo in (LOGO_TBKK, LOGO_TBK_GROUP):
+                assets.preload_image(
+                    self, logo, LOGO_WIDTHS[logo], self.output_profile.image_dpi, self.output_profile.level
+                )
+
         # margin + auto page break
         self.set_auto_page_break(auto=True, margin=margin)
         self.set_margins(margin, margin, margin)
@@ -31,62 +127,168 @@ class PowerPDF(FPDF):
         self.set_draw_color(154, 160, 166)  # เส้นกรอบเทา
         self.set_line_width(0.3)
 
+        # template ของเอกสารนี้: ชื่อ -> เลข XObject (ดู use_template)
+        self._templates = {}
+
+        # หน้าแรกของบิลปัจจุบัน เลขหน้าที่ footer นับจากหน้านี้ (ดู start_bill)
+        self.bill_first_page = 1
+
     # ====== Header / Footer ======
-    def header(self):
-        self.image('images/tbkk-logo.png', x=10, y=3, w=24)
-        self.image('images/tbkGroup-logo.png', x=170, y=0, w=30)
+    def header_static(self):
+        """ส่วนคงที่ของหัวกระดาษ (โลโก้ ชื่อบริษัท ที่อยู่) วาดครั้งเดียวต่อเอกสาร"""
+        self.image(LOGO_TBKK, x=10, y=3, w=LOGO_WIDTHS[LOGO_TBKK])
+        self.image(LOGO_TBK_GROUP, x=170, y=0, w=LOGO_WIDTHS[LOGO_TBK_GROUP])
         # self.image('images/tbkGroup-logo.png', )
         self.set_font("TH", "B", size=20)
         self.set_text_color(31, 31, 31)
         self.text(35, 10, "บริษัท ทีบีเคเค ( ประเทศไทย ) จำกัด")
         self.text(35, 18, "TBKK ( Thailand ) Co., Ltd.")
 
-        self.set_font("TH", "B", size=17)
-        self.set_xy(120, 18)
-        self.multi_cell(80, 6, self.title_text, align="C")
-        self.ln(1)
-
         self.set_font("TH", size=12)
         self.set_text_color(95, 99, 104)
-
         self.text(12, 28, "สำนักงานใหญ่ 700/1017 หมู่ที่ 9 ตำบลมาบโป่ง อำเภอพานทอง จังหวัดชลบุรี 20160")
         self.text(12, 34, "Head Office 700/1017, Moo 9, TB.Mappong, AP.Panthong, Cholburi 20160")
         self.text(12, 40, "Tel 66(0)38 109 360-7 | Fax 66(0)38 109 368")
 
-        self.text(125, 36, f"การใช้ไฟฟ้า {self.period_text}")
-        self.text(125, 41, f"บิลออกให้วันที่ {self.issued_text}")
-        self.ln(14)
-        self.set_text_color(0, 0, 0)
+    def header(self):
+        with instrument.span("header"):
+            self.use_template("header", self.header_static)
+
+            # ส่วนที่เปลี่ยนตามเอกสาร วาดทุกหน้า
+            self.set_font("TH", "B", size=17)
+            self.set_text_color(31, 31, 31)
+            self.set_xy(120, 18)
+            self.multi_cell(80, 6, self.title_text, align="C")
+            self.ln(1)
+
+            self.set_font("TH", size=12)
+            self.set_text_color(95, 99, 104)
+            self.text(125, 36, f"การใช้ไฟฟ้า {self.period_text}")
+            self.text(125, 41, f"บิลออกให้วันที่ {self.issued_text}")
+            self.ln(14)
+            self.set_text_color(0, 0, 0)
 
     def footer(self):
         self.set_y(-10)
         self.set_font("TH", size=9)
         self.set_text_color(95, 99, 104)
-        self.cell(0, 6, f"หน้า {self.page_no()}", align="R")
+        self.cell(0, 6, f"หน้า {self.page_no() - self.bill_first_page + 1}", align="R")
+
+    # ====== หลายบิลในไฟล์เดียว ======
+    def start_bill(self, title: str, period: str = "", issued: str = "", bookmarks: Sequence = (), label: Optional[str] = None):
+        """
+        ขึ้นหน้าใหม่เป็นบิลถัดไปในเอกสารเดียวกัน
+        หัวกระดาษและเลขหน้าเริ่มใหม่ตามบิล ส่วนฟอนต์/โลโก้/template ฝังครั้งเดียวทั้งไฟล์
+        - bookmarks: ((ชื่อ, ระดับ), ...) ใส่ใน outline ที่หน้าแรกของบิล
+        - label: prefix ของ page label (เลขหน้าที่โปรแกรมอ่าน PDF แสดง เริ่มที่ 1 ทุกบิล)
+        """
+        self.title_text = title
+        self.period_text = period
+        self.issued_text = issued
+        self.add_page()
+        self.bill_first_page = self.page
+        if label is not None:
+            self.set_page_label("D", label, 1)
+        for name, level in bookmarks:
+            self.start_section(name, level)
+
+    # ====== Output ======
+    def output(self, *args, **kwargs):
+        """FPDF.output ตาม output profile + จับเวลา serialize/บีบอัด และนับหน้า/bytes (เมื่อเปิด instrument)"""
+        with instrument.span("output"), assets.compression_level(self.output_profile.level):
+            result = super().output(*args, **kwargs)
+        if instrument.enabled():
+            instrument.count("pages", self.pages_count)
+            instrument.count("bytes", len(self.buffer))
+        return result
+
+    # ====== Templates ======
+    def use_template(self, name: str, draw: Callable[[], None]):
+        """
+        วาดเนื้อหาคงที่ผ่าน Form XObject
+        - name: ชื่อ template (แยกต่อเอกสาร)
+        - draw: ฟังก์ชันที่วาดเนื้อหา ต้องใช้ตำแหน่งแบบ absolute และไม่ขึ้นหน้าใหม่
+        ครั้งแรกจะบันทึกสิ่งที่ draw() วาดเป็น XObject หนึ่งตัวในไฟล์
+        ครั้งต่อไป (หน้าถัดไป/บิลถัดไปในไฟล์เดียวกัน) แค่อ้างอิง ไม่วาดซ้ำ
+        state ของ fpdf (ฟอนต์/สี/เส้น) หลังเรียกจะเหมือนก่อนเรียก
+        fpdf2 รุ่นที่ไม่รองรับ (TEMPLATES_SUPPORTED เป็น False) วาด draw() ตรงทุกครั้ง
+        """
+        if not TEMPLATES_SUPPORTED:
+            with self.local_context():
+                draw()
+            return
+        index = self._templates.get(name)
+        if index is None:
+            index = self._templates[name] = self._record_template(draw)
+        self._out(f"/I{index} Do")
+        self._resource_catalog.add(PDFResourceType.X_OBJECT, index, self.page)
+
+    def _record_template(self, draw):
+        page = self.pages[self.page]
+        start = len(page.contents)
+        with self.local_context():
+            # ล้าง state ที่ fpdf จำไว้ ให้ stream ของ template ตั้งฟอนต์/สี/เส้นเองทั้งหมด
+            # (XObject รับ state จากหน้าที่เรียกใช้ ซึ่งอาจไม่เหมือนหน้าที่บันทึก)
+            draw_color, fill_color, line_width = self.draw_color, self.fill_color, self.line_width
+            family, style, size = self.font_family, self.font_style, self.font_size_pt
+            self.draw_color = self.fill_color = None
+            self.line_width = -1
+            self.font_family = ""
+            if draw_color is not None:
+                self.set_draw_color(draw_color)
+            if fill_color is not None:
+                self.set_fill_color(fill_color)
+            self.set_line_width(line_width)
+            if family:
+                self.set_font(family, style, size)
+            draw()
+        stream = bytes(page.contents[start:])
+        page.contents = page.contents[:start]
+
+        with assets.compression_level(self.output_profile.level):
+            xobject = PDFContentStream(contents=stream, compress=self.compress)
+        xobject.type = Name("XObject")
+        xobject.subtype = Name("Form")
+        xobject.b_box = PDFArray([0, 0, round(self.w_pt, 2), round(self.h_pt, 2)])
+        # fpdf ใส่ /Resources ให้ form xobject ที่มี _blend_group ตอน output
+        xobject._blend_group = _TemplateResources(
+            self._resource_catalog.scan_stream(stream.decode("latin-1"))
+        )
+        xobject._registered = False
+        index = TEMPLATE_INDEX_BASE + len(self._templates)
+        self._resource_catalog.form_xobjects.append((index, xobject))
+        return index
 
     # ====== Helpers ======
     def add_section_title(self, text: str):
         self.set_font("TH", size=12)
         self.set_fill_color(245, 247, 250)
-        self.cell(0, 8, text, ln=1, fill=True)
+        self.cell(0, 8, text, fill=True, new_x=XPos.LMARGIN, new_y=YPos.NEXT)
         self.ln(1)
 
     def table(
         self,
         headers: Sequence[str],
-        rows: List[Sequence],
+        rows: Iterable[Sequence],
         col_widths: Optional[Sequence[float]] = None,
         aligns: Optional[Sequence[str]] = None,
         header_fill=(232, 240, 254),
         header_text=(31, 31, 31),
         grid=True,
-    ):
+        row_h: float = 8,
+        max_pages: Optional[int] = None,
+    ) -> Optional[Iterator]:
         """
         วาดตารางอย่างง่าย
         - headers: รายชื่อหัวคอลัมน์
-        - rows: list ของแต่ละแถว (list/tuple)
+        - rows: iterable ของแต่ละแถว (list/tuple/generator) อ่านทีละแถว ไม่ต้องรู้จำนวนล่วงหน้า
+          แถวที่สั้นกว่า headers เว้นคอลัมน์ท้ายว่าง แถวที่ยาวกว่า -> ValueError
         - col_widths: ความกว้างคอลัมน์ (ถ้าไม่ใส่จะหารจากหน้า)
         - aligns: การจัดแนวต่อคอลัมน์ เช่น ["L","R","R"]
+        - row_h: ความสูงแถว
+        - max_pages: ไม่ขึ้นหน้าเกินหน้านี้ ถ้ายังมีแถวเหลือจะปิดกรอบแล้วคืน iterator ของแถวที่เหลือ
+          (วาดต่อในเอกสารใหม่ได้ ดู ChunkedPDF) วาดครบทุกแถวคืน None
+        ตารางที่ยาวข้ามหน้า: ทุกหน้าวาดหัวตารางซ้ำ และมีกรอบนอกของส่วนที่อยู่ในหน้านั้นเอง
         """
         ncols = len(headers)
         page_width = self.w - self.l_margin - self.r_margin
@@ -94,41 +296,157 @@ class PowerPDF(FPDF):
             col_widths = [page_width / ncols] * ncols
         if not aligns:
             aligns = ["L"] * ncols
+        aligns = [aligns[i] if i < len(aligns) else "L" for i in range(ncols)]
+        headers = [str(h) for h in headers]
+        columns = list(zip(col_widths, aligns))
+        table_w = sum(col_widths)
+        x0 = self.l_margin
+        bottom = self.h - self.b_margin
+
+        def draw_header():
+            # state ของหัวตาราง แล้วตั้ง state ของ body ครั้งเดียวต่อหน้า
+            # (header()/footer() ของหน้าใหม่เปลี่ยนฟอนต์/สีไปแล้ว)
+            self.set_x(x0)
+            self.set_font("TH", size=11)
+            self.set_fill_color(*header_fill)
+            self.set_text_color(*header_text)
+            for w, h in zip(col_widths, headers):
+                self.cell(w, row_h, h, border=1, align="C", fill=True)
+            self.ln(row_h)
+            self.set_text_color(0, 0, 0)
+
+        def close_fragment(top):
+            # กรอบนอกหนาของส่วนตารางในหน้านี้ (รวมหัวตาราง)
+            if grid:
+                self.set_line_width(0.7)
+                self.rect(x0, top, table_w, self.get_y() - top)
+                self.set_line_width(0.3)
 
-        # --- Header row ---
-        self.set_font("TH", size=11)
-        self.set_fill_color(*header_fill)
-        self.set_text_color(*header_text)
-        for i, h in enumerate(headers):
-            self.cell(col_widths[i], 8, str(h), border=1, align="C", fill=True)
-        self.ln(8)
-        self.set_text_color(0, 0, 0)
-
-        # --- Body rows ---
-        self.set_font("TH", size=11)
-        for r in rows:
-            # ตรวจ page-break: ถ้าใกล้ขอบล่าง ให้ขึ้นหน้าใหม่และวาดหัวตารางซ้ำ
-            if self.get_y() > self.h - self.b_margin - 10:
+        with instrument.span("table"):
+            # หัวตาราง + แถวแรกต้องอยู่หน้าเดียวกัน ไม่เช่นนั้นเริ่มตารางที่หน้าใหม่
+            # (auto page break ของ fpdf จะแยกหัวตารางกับกรอบนอกไว้คนละหน้า)
+            if self.get_y() + 2 * row_h > bottom:
+                if max_pages is not None and self.page >= max_pages:
+                    return iter(rows)
                 self.add_page()
-                # วาด header ซ้ำ
-                self.set_fill_color(*header_fill)
-                self.set_text_color(*header_text)
-                for i, h in enumerate(headers):
-                    self.cell(col_widths[i], 8, str(h), border=1, align="C", fill=True)
-                self.ln(8)
-                self.set_text_color(0, 0, 0)
-
-            for i, v in enumerate(r):
-                align = aligns[i] if i < len(aligns) else "L"
-                txt = str(v)
-                self.cell(col_widths[i], 8, txt, border=1, align=align)
-            self.ln(8)
-
-        # เส้นกริด = ใช้ border=1 ไปกับทุก cell แล้ว (grid=True)
-        # ถ้าต้องเส้นรอบนอกหนากว่า:
-        if grid:
-            x0 = self.get_x() - sum(col_widths)
-            y0 = self.get_y() - 8 * (len(rows)) - 8  # รวม header
-            self.set_line_width(0.7)
-            self.rect(x0, y0, sum(col_widths), 8 * (len(rows) + 1))
-            self.set_line_width(0.3)
\ No newline at end of file
+                self.set_y(max(self.get_y(), HEADER_BOTTOM))
+            top = self.get_y()
+            draw_header()
+
+            # --- Body rows ---
+            n = 0
+            rest = None
+            rows = iter(rows)
+            for r in rows:
+                if len(r) > ncols:
+                    raise ValueError(f"แถวที่ {n + 1} ของตารางมี {len(r)} ค่า เกินจำนวนคอลัมน์ ({ncols})")
+                # ตรวจ page-break: ถ้าแถวนี้ล้นขอบล่าง ให้ปิดกรอบหน้านี้ ขึ้นหน้าใหม่และวาดหัวตารางซ้ำ
+                if self.get_y() + row_h > bottom:
+                    close_fragment(top)
+                    if max_pages is not None and self.page >= max_pages:
+                        rest = chain((r,), rows)
+                        break
+                    self.add_page()
+                    self.set_y(max(self.get_y(), HEADER_BOTTOM))
+                    top = self.get_y()
+                    draw_header()
+
+                for (w, align), v in zip(columns, r):
+                    self.cell(w, row_h, v if isinstance(v, str) else str(v), border=1, align=align)
+                self.ln(row_h)
+                n += 1
+            else:
+                close_fragment(top)
+        instrument.count("table_rows", n)
+        instrument.count("cells", (n + 1) * ncols)
+        return rest
+
+
+# ====== เอกสารยาวแบบแบ่งไฟล์ ======
+class ChunkedPDF:
+    """
+    เอกสารยาวมาก (เช่นรายการค่าไฟทุก line ทั้งปี) ที่เขียนออกเป็นไฟล์ย่อยทีละ chunk_pages หน้า
+    fpdf เก็บทุกหน้าไว้ใน memory จนถึง output() จึงเก็บไว้แค่หน้าของไฟล์ย่อยปัจจุบัน
+    peak memory ขึ้นกับ chunk_pages ไม่ใช่จำนวนหน้าทั้งเอกสาร
+
+        with ChunkedPDF("reports/lines/lines.pdf", title="...", chunk_pages=200) as doc:
+            doc.table(headers, rows, aligns=[...])
+        doc.parts   # ["reports/lines/lines_part001.pdf", "reports/lines/lines_part002.pdf", ...]
+
+    - filename: path ของเอกสาร ไฟล์ย่อยชื่อ <ชื่อไฟล์>_partNNN.pdf
+    - chunk_pages: จำนวนหน้าสูงสุดต่อไฟล์ย่อย (None = ไม่แบ่ง เขียนไฟล์เดียวที่ filename)
+    - title / period / issued / profile: ส่งต่อให้ PowerPDF ของทุกไฟล์ย่อย
+    เลขหน้าที่ footer และ page label ต่อเนื่องข้ามไฟล์ย่อย ตารางที่ข้ามไฟล์วาดหัวตารางซ้ำเหมือนขึ้นหน้าใหม่
+    แต่ละไฟล์ย่อยเปิดอ่านได้เอง (ฝังฟอนต์/โลโก้ของตัวเอง)
+    """
+
+    def __init__(self, filename: str, title: str, period: str = "", issued: str = "",
+                 chunk_pages: Optional[int] = 200, profile: str = DEFAULT_PROFILE):
+        if chunk_pages is not None and chunk_pages < 1:
+            raise ValueError("chunk_pages ต้องมากกว่า 0")
+        self.filename = filename
+        self.title = title
+        self.period = period
+        self.issued = issued
+        self.chunk_pages = chunk_pages
+        self.profile = profile
+        self.parts = []
+        # จำนวนหน้าในไฟล์ย่อยที่เขียนแล้ว
+        self.pages = 0
+        self._pdf = None
+
+    def part_path(self, n: int) -> str:
+        if self.chunk_pages is None:
+            return self.filename
+        root, ext = os.path.splitext(self.filename)
+        return f"{root}_part{n:03d}{ext or '.pdf'}"
+
+    def document(self) -> PowerPDF:
+        """PowerPDF ของไฟล์ย่อยปัจจุบัน (เปิดไฟล์ย่อยใหม่ถ้ายังไม่มี) ใช้วาดเนื้อหาอื่นที่ไม่ใช่ table"""
+        if self._pdf is None:
+            pdf = PowerPDF(self.title, self.period, self.issued, profile=self.profile)
+            # footer นับเลขหน้าจาก bill_first_page จึงเลื่อนให้ต่อจากไฟล์ก่อนหน้า
+            pdf.bill_first_page = 1 - self.pages
+            pdf.add_page()
+            if self.pages:
+                pdf.set_page_label("D", None, self.pages + 1)
+            self._pdf = pdf
+        return self._pdf
+
+    def flush(self):
+        """เขียนไฟล์ย่อยปัจจุบันลงดิสก์แล้วปล่อยหน้าของมันจาก memory"""
+        if self._pdf is None:
+            return
+        path = self.part_path(len(self.parts) + 1)
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._pdf.output(path)
+        self.pages += self._pdf.pages_count
+        self.parts.append(path)
+        self._pdf = None
+        # เอกสาร fpdf มี reference cycle (ฟอนต์ <-> เอกสาร) ไม่คืน memory จนกว่า gc รอบใหญ่จะรัน
+        # ซึ่งนาน ๆ ครั้ง ไฟล์ย่อยที่เขียนแล้วจึงค้างสะสม เก็บทันทีให้ memory คงที่จริง
+        gc.collect()
+
+    def table(self, headers: Sequence[str], rows: Iterable[Sequence], **kwargs):
+        """PowerPDF.table ที่ขึ้นไฟล์ย่อยใหม่เมื่อครบ chunk_pages หน้า (rows อ่านทีละแถว)"""
+        rest = rows
+        while rest is not None:
+            rest = self.document().table(headers, rest, max_pages=self.chunk_pages, **kwargs)
+            if rest is not None:
+                self.flush()
+
+    def close(self) -> list:
+        """เขียนไฟล์ย่อยสุดท้าย คืน path ของทุกไฟล์ย่อยตามลำดับหน้า"""
+        self.flush()
+        return self.parts
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self._pdf = None
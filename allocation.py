@@ -0,0 +1,166 @@
+"""
+ปันส่วนค่าไฟจากบิลลงไปแต่ละ line แบบ vectorized (NumPy)
+
+ยอดของบิล (ค่าไฟ PEA และค่าไฟโซล่าหลังหักส่วนลด) ถูกแบ่งตามสัดส่วนน้ำหนักของแต่ละ line
+- "kwh_ut": หน่วยที่มิเตอร์ของ line วัดได้ (ค่าเริ่มต้น)
+- "kw_time": kw x production_time (line ที่ไม่มีมิเตอร์ย่อย)
+ผลต่างระหว่างมิเตอร์ PEA กับผลรวมมิเตอร์ย่อย (meter error) จึงกระจายตามสัดส่วนไปด้วย
+
+คำนวณเป็นสตางค์ (int64) แล้วปัดแบบ largest remainder:
+ปัดลงทุก line ก่อน แล้วเพิ่มทีละ 1 สตางค์ให้ line ที่เศษมากที่สุดจนครบยอด
+ผลรวมทุก line จึงเท่ายอดบิลพอดีทุกสตางค์ และ total_amount = amount + amount_solar เสมอ
+"""
+from decimal import ROUND_HALF_UP, Decimal
+
+import numpy as np
+
+# คอลัมน์ตัวเลขของ line ที่ใช้คำนวณน้ำหนัก
+LINE_METRICS = ("kwh_ut", "production_time", "kw")
+
+BASES = {
+    "kwh_ut": lambda c: c["kwh_ut"],
+    "kw_time": lambda c: c["kw"] * c["production_time"],
+}
+
+# ประเภทต้นทุนของ line (key "cost_type") ตรงกับแถว DIRECT / ADMIN / INDIRECT / MST ของบิล
+COST_TYPES = ("direct", "admin", "indirect", "mst")
+DEFAULT_COST_TYPE = "direct"
+
+
+def to_satang(baht) -> int:
+    """บาท -> สตางค์ (ปัดครึ่งขึ้นจากค่าทศนิยมที่เห็น ไม่ใช่ค่า float ภายใน)"""
+    return int((Decimal(str(baht)) * 100).quantize(Decimal(1), ROUND_HALF_UP))
+
+
+def allocate(total, weights) -> np.ndarray:
+    """
+    แบ่งยอด total (บาท) ตามสัดส่วน weights คืน array สตางค์ (int64) ที่รวมได้เท่า total พอดี
+    - weights: น้ำหนักของแต่ละ line (ไม่ติดลบ)
+    เศษเท่ากันให้ line ที่มาก่อน ผลจึงเหมือนเดิมทุกครั้ง
+    """
+    w = np.asarray(weights, np.float64)
+    if w.ndim != 1:
+        raise ValueError("weights ต้องเป็น array 1 มิติ")
+    if not np.isfinite(w).all() or (w < 0).any():
+        raise ValueError("weights ต้องเป็นตัวเลขที่ไม่ติดลบ")
+
+    cents = to_satang(total)
+    w_sum = w.sum()
+    if w_sum <= 0:
+        if cents:
+            raise ValueError(f"ผลรวมน้ำหนักเป็น 0 ปันส่วนยอด {total} ไม่ได้")
+        return np.zeros(len(w), np.int64)
+
+    # ยอดติดลบ (เช่นเครดิต) ปันส่วนค่าสัมบูรณ์แล้วคืนเครื่องหมาย
+    sign = -1 if cents < 0 else 1
+    cents = abs(cents)
+    exact = w * (cents / w_sum)
+    shares = np.floor(exact).astype(np.int64)
+    short = cents - int(shares.sum())
+    if short > 0:
+        remainder = exact - shares
+        shares[np.argsort(-remainder, kind="stable")[:short]] += 1
+    return shares * sign
+
+
+def _line_columns(lines, keys):
+    """row dict หลายแถว หรือ dict ของคอลัมน์ -> {key: array float64}"""
+    if isinstance(lines, dict):
+        n = len(next(iter(lines.values()), ()))
+        return n, {
+            k: np.asarray(lines[k], np.float64) if k in lines else np.zeros(n)
+            for k in keys
+        }
+    n = len(lines)
+    return n, {
+        k: np.fromiter([r.get(k, 0) or 0 for r in lines], np.float64, n)
+        for k in keys
+    }
+
+
+class CostAllocation:
+    """
+    - lines: list ของ row dict (คอลัมน์ตาม main.cols_all) หรือ dict ของคอลัมน์ {key: array}
+    - grid_baht: ยอดค่าไฟ PEA ที่ต้องปันส่วน
+    - solar_baht: ยอดค่าไฟโซล่าหลังหักส่วนลด
+    - basis: "kwh_ut" / "kw_time" (ดู BASES) หรือ array น้ำหนักของแต่ละ line
+    ผลเป็นสตางค์ (int64 ตามลำดับ line): amount, amount_solar, total_amount
+    """
+
+    def __init__(self, lines, grid_baht, solar_baht=0.0, basis="kwh_ut"):
+        self.lines = lines
+        self.size, self.columns = _line_columns(lines, LINE_METRICS)
+        if isinstance(basis, str):
+            if basis not in BASES:
+                raise ValueError(f"basis ไม่ถูกต้อง {basis!r} (ใช้ได้: {', '.join(BASES)})")
+            weights = BASES[basis](self.columns)
+        else:
+            weights = np.asarray(basis, np.float64)
+            if len(weights) != self.size:
+                raise ValueError(f"basis มี {len(weights)} ค่า แต่มี {self.size} line")
+        self.basis = basis
+        self.weights = weights
+
+        self.grid_baht = grid_baht
+        self.solar_baht = solar_baht
+        self.amount = allocate(grid_baht, weights)
+        self.amount_solar = allocate(solar_baht, weights)
+        self.total_amount = self.amount + self.amount_solar
+
+    def baht(self, name) -> np.ndarray:
+        """ผลของคอลัมน์ name ("amount" / "amount_solar" / "total_amount") เป็นบาท"""
+        return getattr(self, name) / 100
+
+    def rows(self):
+        """row dict ของแต่ละ line พร้อม amount / amount_solar / total_amount (ส่งให้ createExcelReport ได้)"""
+        amounts = zip(self.baht("amount").tolist(), self.baht("amount_solar").tolist(),
+                      self.baht("total_amount").tolist())
+        if isinstance(self.lines, dict):
+            keys = list(self.lines)
+            lines = (dict(zip(keys, values)) for values in zip(*[self.lines[k] for k in keys]))
+        else:
+            lines = iter(self.lines)
+        for row, (amount, solar, total) in zip(lines, amounts):
+            yield dict(row, amount=amount, amount_solar=solar, total_amount=total)
+
+    def cost_types(self) -> np.ndarray:
+        """รหัสประเภทต้นทุนของแต่ละ line (index ของ COST_TYPES)"""
+        if isinstance(self.lines, dict):
+            types = self.lines.get("cost_type", [DEFAULT_COST_TYPE] * self.size)
+        else:
+            types = [r.get("cost_type") or DEFAULT_COST_TYPE for r in self.lines]
+        index = {t: i for i, t in enumerate(COST_TYPES)}
+        try:
+            return np.fromiter([index[str(t).lower()] for t in types], np.intp, self.size)
+        except KeyError as e:
+            raise ValueError(f"cost_type ไม่ถูกต้อง {e.args[0]!r} (ใช้ได้: {', '.join(COST_TYPES)})")
+
+    def bill_fields(self, amount="amount") -> dict:
+        """
+        ผลรวมตามประเภทต้นทุน เป็น key ของบิล ({ประเภท}_kw / {ประเภท}_baht)
+        รวมเข้ากับ bill dict ก่อนส่งให้ createElectricityReport (amount)
+        หรือ createSolarReport (amount="amount_solar")
+        - direct / admin / indirect มีเสมอ, mst เฉพาะเมื่อมี line ประเภท mst
+        """
+        codes = self.cost_types()
+        n = len(COST_TYPES)
+        kwh = np.bincount(codes, weights=self.columns["kwh_ut"], minlength=n)
+        # สตางค์ < 2**53 รวมใน float64 ได้ตรงทุกหลัก
+        cents = np.bincount(codes, weights=getattr(self, amount), minlength=n).round().astype(np.int64)
+        present = np.bincount(codes, minlength=n)
+
+        fields = {}
+        for i, t in enumerate(COST_TYPES):
+            if t == "mst" and not present[i]:
+                continue
+            fields[f"{t}_kw"] = float(kwh[i])
+            fields[f"{t}_baht"] = int(cents[i]) / 100
+        return fields
+
+    def check(self):
+        """ตรวจว่าผลรวมทุก line เท่ายอดบิลพอดี (ValueError ถ้าไม่ตรง)"""
+        for name, total in (("amount", self.grid_baht), ("amount_solar", self.solar_baht)):
+            got = int(getattr(self, name).sum())
+            if got != to_satang(total):
+                raise ValueError(f"{name}: ผลรวม {got} สตางค์ ไม่เท่ายอดบิล {to_satang(total)}")
+        return self
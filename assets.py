@@ -0,0 +1,175 @@
+"""
+แคชทรัพยากร (ฟอนต์/รูป) ที่ใช้ร่วมกันทุก PowerPDF ภายใน process เดียว
+
+ฟอนต์ TTF จะถูก parse แค่ครั้งแรกที่ถูกขอ แล้วเก็บไว้เป็นต้นแบบ (prototype)
+เอกสารถัดไปจะได้สำเนาที่แชร์ cmap/ความกว้างตัวอักษร/descriptor ร่วมกัน
+มีเพียง state ที่ fpdf แก้ไขตอน output (subset, ttfont) ที่แยกต่อเอกสาร
+
+รูป (โลโก้) จะถูก decode + บีบอัดครั้งเดียว แล้วส่งข้อมูลที่ decode แล้ว
+ให้ image_cache ของแต่ละเอกสาร fpdf จะ embed รูปชื่อเดียวกันแค่ครั้งเดียวต่อไฟล์
+"""
+import os
+import threading
+from io import BytesIO
+from pathlib import Path
+from typing import Optional
+
+from fontTools import ttLib
+from fpdf.fonts import TTFFont, SubsetMap
+from fpdf.image_datastructures import RasterImageInfo
+from fpdf import image_parsing
+from fpdf.image_parsing import get_img_info
+from fpdf.syntax import PDFContentStream
+
+_lock = threading.Lock()
+
+# (path, mtime_ns, style) -> (TTFFont ต้นแบบ, bytes ของไฟล์ฟอนต์)
+_font_cache = {}
+
+# (path, image_filter, dims, ระดับ zlib) -> (mtime_ns, RasterImageInfo ที่ decode แล้ว)
+_image_cache = {}
+
+# ระดับ zlib ของ fpdf เป็นค่าระดับ module จึงเปลี่ยนได้ทีละเอกสาร (ดู compression_level)
+_level_lock = threading.RLock()
+
+
+def _asset_key(path):
+    full_path = os.path.abspath(path)
+    return full_path, os.stat(full_path).st_mtime_ns
+
+
+def _clone_font(pdf, proto: TTFFont, raw: bytes) -> TTFFont:
+    font = TTFFont.__new__(TTFFont)
+    for name in TTFFont.__slots__:
+        if hasattr(proto, name):
+            setattr(font, name, getattr(proto, name))
+
+    # state ต่อเอกสาร: fpdf จะ subset ttfont ทับของเดิมตอน output
+    # จึงต้องเปิด ttfont ใหม่จาก bytes ในหน่วยความจำ (lazy = อ่านแค่ table directory)
+    font.i = len(pdf.fonts) + 1
+    font.ttfont = ttLib.TTFont(
+        BytesIO(raw),
+        recalcTimestamp=False,
+        fontNumber=proto.collection_font_number,
+        lazy=True,
+    )
+    font.missing_glyphs = []
+    font.biggest_size_pt = 0
+    font.subset = SubsetMap(font)
+    return font
+
+
+def add_font(pdf, family: str, style: str, fname: str):
+    """
+    เทียบเท่า FPDF.add_font แต่ parse ไฟล์ TTF ครั้งเดียวต่อ process
+    - key ของแคชคือ path + mtime ถ้าไฟล์ฟอนต์ถูกแก้จะโหลดใหม่อัตโนมัติ
+    - ฟอนต์สี (color font) ผูกกับเอกสาร จึงใช้ add_font ปกติ
+    """
+    style = "".join(sorted(style.upper()))
+    fontkey = f"{family.lower()}{style}"
+    if fontkey in pdf.fonts:
+        return
+
+    key = _asset_key(fname) + (style,)
+    with _lock:
+        cached = _font_cache.get(key)
+        if cached is None:
+            proto = TTFFont(pdf, Path(fname), fontkey, style)
+            if proto.color_font is not None:
+                proto.close()
+                cached = (None, None)
+            else:
+                cached = (proto, Path(fname).read_bytes())
+            _font_cache[key] = cached
+
+    proto, raw = cached
+    if proto is None:
+        pdf.add_font(family, style, fname)
+        return
+
+    font = _clone_font(pdf, proto, raw)
+    font.fontkey = fontkey
+    pdf.fonts[fontkey] = font
+
+
+def clear_font_cache():
+    """ล้างแคชฟอนต์ (ใช้ใน benchmark หรือเมื่อต้องการบังคับโหลดใหม่)"""
+    with _lock:
+        for proto, _ in _font_cache.values():
+            if proto is not None:
+                proto.close()
+        _font_cache.clear()
+
+
+class compression_level:
+    """
+    context manager: ใช้ระดับ zlib นี้กับ stream ที่ fpdf บีบอัด (หน้า/ฟอนต์) และรูปที่ decode ภายใน with
+    - level: 0-9 หรือ -1 (ค่าเริ่มต้นของ zlib)
+    """
+
+    def __init__(self, level: int):
+        self.level = level
+
+    def __enter__(self):
+        _level_lock.acquire()
+        self._previous = PDFContentStream._COMPRESSION_LEVEL, image_parsing.SETTINGS.compression_level
+        PDFContentStream._COMPRESSION_LEVEL = self.level
+        image_parsing.SETTINGS.compression_level = self.level
+        return self
+
+    def __exit__(self, *exc):
+        PDFContentStream._COMPRESSION_LEVEL, image_parsing.SETTINGS.compression_level = self._previous
+        _level_lock.release()
+        return False
+
+
+def _decode_image(name, asset_key, image_filter, dims=None, level=-1):
+    full_path, mtime = asset_key
+    key = (full_path, image_filter, dims, level)
+    with _lock:
+        cached = _image_cache.get(key)
+        if cached is None or cached[0] != mtime:
+            with compression_level(level):
+                info = get_img_info(name, image_filter=image_filter, dims=dims)
+            cached = (mtime, info)
+            _image_cache[key] = cached
+    return cached[1]
+
+
+def preload_image(pdf, name: str, width_mm: Optional[float] = None, dpi: Optional[int] = None, level: int = -1):
+    """
+    ใส่ข้อมูลรูปที่ decode ไว้แล้วลง image_cache ของ pdf
+    หลังจากนี้ pdf.image(name, ...) จะไม่อ่าน/decode ไฟล์ซ้ำ
+    (ต้องเรียก image ด้วย name เดียวกับที่ preload)
+    - width_mm / dpi: ย่อรูปที่ละเอียดเกิน dpi เมื่อวาดกว้าง width_mm (ย่อครั้งเดียวต่อ process)
+    - level: ระดับ zlib ของรูปที่ย่อ
+    """
+    images = pdf.image_cache.images
+    if name in images:
+        return
+
+    image_filter = pdf.image_cache.image_filter
+    asset_key = _asset_key(name)
+    info = _decode_image(name, asset_key, image_filter)
+    if dpi and width_mm:
+        w = max(1, round(width_mm / 25.4 * dpi))
+        if info["w"] > w:
+            dims = (w, max(1, round(info["h"] * w / info["w"])))
+            info = _decode_image(name, asset_key, image_filter, dims, level)
+    info = RasterImageInfo(info)
+
+    # i/usages เป็นของแต่ละเอกสาร รูปที่ usages = 0 จะไม่ถูก embed
+    info["i"] = len(images) + 1
+    info["usages"] = 0
+    info["iccp_i"] = None
+    iccp = info.get("iccp")
+    if iccp is not None:
+        icc_profiles = pdf.image_cache.icc_profiles
+        info["iccp_i"] = icc_profiles.setdefault(iccp, len(icc_profiles))
+        info["iccp"] = None
+    images[name] = info
+
+
+def clear_image_cache():
+    with _lock:
+        _image_cache.clear()
@@ -0,0 +1,296 @@
+"""
+รัน createElectricityReport / createSolarReport หลายบิลพร้อมกันด้วย process pool
+
+    python batch.py bills.json --workers 4
+    python batch.py bills.json --profile profile.json   # เวลาแต่ละช่วง รวมทุกงาน
+    python batch.py bills.json --force                  # render ใหม่ทุกบิล ไม่ใช้แคช
+    python batch.py bills.json --zip reports.zip        # เขียนทุกบิลลง ZIP ไฟล์เดียว
+    python batch.py bills.json --consolidated all.pdf   # ทุกบิลเป็น PDF ไฟล์เดียว (มี outline)
+    python batch.py bills.json --pdf-profile compact    # fast / balanced / compact (ดู PowerPDF.OUTPUT_PROFILES)
+    python batch.py bills.json --history reports/history.sqlite3   # เก็บบิลที่ render สำเร็จลง history (ใช้กับ --consolidated ได้)
+
+ไฟล์ input เป็น JSON list ของ bill dict หรือ JSON Lines (1 บิลต่อบรรทัด)
+แต่ละบิลระบุชนิดด้วย key "kind" ("electric" / "solar")
+ถ้าไม่ระบุจะดูจาก field (บิลโซล่ามี power_peak_kw)
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import traceback
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import PowerPDF
+import instrument
+import main
+
+REPORTS = {
+    "electric": main.createElectricityReport,
+    "solar": main.createSolarReport,
+}
+
+PLANS = {
+    "electric": main.ELECTRIC_PLAN,
+    "solar": main.SOLAR_PLAN,
+}
+
+
+def bill_kind(bill):
+    if not isinstance(bill, dict):
+        raise ValueError(f"บิลต้องเป็น JSON object ไม่ใช่ {type(bill).__name__}: {bill!r:.40}")
+    kind = bill.get("kind")
+    if kind is None:
+        kind = "solar" if "power_peak_kw" in bill else "electric"
+    if kind not in REPORTS:
+        raise ValueError(f"ไม่รู้จักชนิดบิล: {kind!r}")
+    return kind
+
+
+def load_bills(path):
+    """อ่านบิลจากไฟล์ .json (list) หรือ .jsonl (1 บิลต่อบรรทัด)"""
+    with open(path, encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            return [json.loads(line) for line in f if line.strip()]
+        bills = json.load(f)
+    if isinstance(bills, dict):
+        bills = [bills]
+    return bills
+
+
+def _warm_worker():
+    # โหลดฟอนต์/โลโก้เข้าแคชของ process ครั้งเดียว งานถัดไปใน worker นี้ใช้ต่อได้เลย
+    PowerPDF.PowerPDF(title="")
+
+
+def _new_result(index, bill, pid=None):
+    # บิลที่ไม่ใช่ dict (เช่นข้อความใน bills.json) ก็ต้องได้ result ไปบันทึกเป็นงานที่ล้มเหลว
+    if not isinstance(bill, dict):
+        bill = {}
+    return {
+        "index": index,
+        "kind": bill.get("kind"),
+        "bill_month": bill.get("bill_month"),
+        "pid": pid,
+        "ok": False,
+        "cached": False,
+        "seconds": 0.0,
+        "error": None,
+        "profile": None,
+    }
+
+
+def _arcname(bill):
+    # ชื่อใน ZIP ตามโครงสร้าง reports/ เช่น electric/2025/electric_report_08_2025.pdf
+    path = main.bill_path(PLANS[bill_kind(bill)], bill)
+    return os.path.relpath(path, "reports").replace(os.sep, "/")
+
+
+def _check_arcnames(bills):
+    """ValueError ถ้ามีบิลชนิดและเดือนเดียวกันมากกว่าหนึ่งใบ (จะได้ชื่อใน ZIP ซ้ำกัน)"""
+    seen = {}
+    for i, bill in enumerate(bills):
+        try:
+            name = _arcname(bill)
+        except (KeyError, ValueError, AttributeError):
+            continue  # บิลที่ข้อมูลไม่ครบจะล้มเหลวเองตอน render
+        if name in seen:
+            raise ValueError(f"บิล #{seen[name]} และ #{i} ได้ชื่อใน ZIP เดียวกัน: {name}")
+        seen[name] = i
+
+
+def _run_job(index, bill, profile=False, force=False, out=None, pdf_profile=PowerPDF.DEFAULT_PROFILE):
+    # out=bytes: ไม่เขียนไฟล์ คืน PDF ใน result["pdf"] และชื่อใน ZIP ใน result["arcname"]
+    result = _new_result(index, bill, os.getpid())
+    rec = instrument.Recorder() if profile else None
+    t0 = time.perf_counter()
+    try:
+        kind = result["kind"] = bill_kind(bill)
+        if rec is None:
+            target, rendered = main.createBillReport(PLANS[kind], bill, force, out, pdf_profile)
+        else:
+            with instrument.recording(rec):
+                target, rendered = main.createBillReport(PLANS[kind], bill, force, out, pdf_profile)
+        if out is bytes:
+            result["pdf"] = target
+            result["arcname"] = _arcname(bill)
+        result["cached"] = not rendered
+        result["ok"] = True
+    except Exception:
+        result["error"] = traceback.format_exc(limit=3)
+    result["seconds"] = time.perf_counter() - t0
+    if rec is not None:
+        result["profile"] = rec.to_dict()
+    return result
+
+
+def run_batch(bills, workers=None, on_result=None, profile=False, force=False, pdf_profile=PowerPDF.DEFAULT_PROFILE):
+    """
+    กระจายบิลไปยัง worker process
+    - bills: list ของ bill dict
+    - workers: จำนวน process (None = เท่าจำนวน CPU)
+    - on_result: callback เรียกทุกครั้งที่งานเสร็จ (ตามลำดับที่เสร็จ)
+    - profile: เก็บเวลาแต่ละช่วงของแต่ละงานไว้ใน result["profile"] (ดู instrument.py)
+    - force: render ใหม่ทุกบิล แม้ข้อมูลไม่เปลี่ยน (ดู render_cache.py)
+    - pdf_profile: output profile ของ PDF ("fast" / "balanced" / "compact")
+    บิลที่ error จะไม่หยุดงานอื่น คืน list ผลลัพธ์เรียงตามลำดับ input
+    """
+    results = [None] * len(bills)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_warm_worker) as pool:
+        futures = {pool.submit(_run_job, i, bill, profile, force, None, pdf_profile): i for i, bill in enumerate(bills)}
+        for fut in as_completed(futures):
+            i = futures[fut]
+            try:
+                result = fut.result()
+            except Exception:
+                # worker ตาย (เช่น BrokenProcessPool) ก็บันทึกเป็นงานที่ล้มเหลว
+                result = _new_result(i, bills[i])
+                result["error"] = traceback.format_exc(limit=3)
+            results[i] = result
+            if on_result:
+                on_result(result)
+    return results
+
+
+def write_zip(bills, dest, workers=None, on_result=None, profile=False, compression=zipfile.ZIP_DEFLATED,
+              pdf_profile=PowerPDF.DEFAULT_PROFILE):
+    """
+    render ทุกบิลแล้วเขียนลง ZIP เดียวในรอบเดียว ไม่มีไฟล์ PDF ชั่วคราวบนดิสก์
+    - dest: path หรือ file-like (binary) ของไฟล์ ZIP
+    - workers: จำนวน process (None = เท่าจำนวน CPU)
+    - profile / pdf_profile: เหมือน run_batch
+    ชื่อใน ZIP เหมือนโครงสร้าง reports/ เช่น electric/2025/electric_report_08_2025.pdf
+    เขียนตามลำดับ input และมีงานค้างใน pool ไม่เกิน 2 เท่าของจำนวน worker
+    memory จึงขึ้นกับจำนวน worker ไม่ใช่จำนวนบิล
+    บิลชนิดและเดือนเดียวกันซ้ำกันจะได้ชื่อใน ZIP ซ้ำ -> ValueError ก่อนเริ่ม render
+    """
+    _check_arcnames(bills)
+    results = []
+    if workers is None:
+        workers = os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers, initializer=_warm_worker) as pool, \
+            zipfile.ZipFile(dest, "w", compression=compression) as zf:
+        pending = deque()
+        jobs = iter(enumerate(bills))
+
+        def fill():
+            while len(pending) < 2 * workers:
+                item = next(jobs, None)
+                if item is None:
+                    return
+                i, bill = item
+                pending.append((i, bill, pool.submit(_run_job, i, bill, profile, out=bytes, pdf_profile=pdf_profile)))
+
+        fill()
+        while pending:
+            i, bill, fut = pending.popleft()
+            try:
+                result = fut.result()
+            except Exception:
+                result = _new_result(i, bill)
+                result["error"] = traceback.format_exc(limit=3)
+            fill()
+            pdf = result.pop("pdf", None)
+            if pdf is not None:
+                zf.writestr(result["arcname"], pdf)
+            results.append(result)
+            if on_result:
+                on_result(result)
+    return results
+
+
+def _print_result(r):
+    status = ("SKIP" if r["cached"] else "OK  ") if r["ok"] else "FAIL"
+    print(f"{status} #{r['index']:<5} {r['kind'] or '?':<8} {r['bill_month'] or '?':<8} {r['seconds'] * 1000:8.1f} ms")
+    if r["error"]:
+        print("     " + r["error"].strip().replace("\n", "\n     "))
+
+
+def _ingest_history(path, bills):
+    """เก็บบิลที่ render สำเร็จลง history store (ดู history.py)"""
+    import history
+
+    with history.HistoryStore(path) as store:
+        for bill in bills:
+            store.ingest_bill(PLANS[bill_kind(bill)], bill)
+
+
+def run_cli(argv=None) -> int:
+    """CLI ของ batch (ดูหัวไฟล์) คืน exit code"""
+    parser = argparse.ArgumentParser(description="Render many bills in parallel")
+    parser.add_argument("bills", help="ไฟล์ .json หรือ .jsonl ของ bill dict")
+    parser.add_argument("--workers", type=int, default=None, help="จำนวน process (ค่าเริ่มต้น = จำนวน CPU)")
+    parser.add_argument("--profile", metavar="JSON", help="บันทึกเวลาแต่ละช่วงรวมทุกงานเป็นไฟล์ JSON")
+    parser.add_argument("--force", action="store_true", help="render ใหม่ทุกบิล แม้ข้อมูลไม่เปลี่ยน")
+    parser.add_argument("--zip", metavar="ZIP", help="เขียนทุกบิลลงไฟล์ ZIP เดียว แทนไฟล์ใน reports/")
+    parser.add_argument("--consolidated", metavar="PDF", help="รวมทุกบิลเป็น PDF ไฟล์เดียว (process เดียว)")
+    parser.add_argument("--pdf-profile", choices=list(PowerPDF.OUTPUT_PROFILES), default=PowerPDF.DEFAULT_PROFILE,
+                        help="fast = เร็วสุด (ไม่บีบอัด), balanced = ค่าเริ่มต้น, compact = ไฟล์เล็กสุด")
+    parser.add_argument("--history", metavar="DB", help="เก็บบิลที่ render สำเร็จลง history store (SQLite)")
+    args = parser.parse_args(argv)
+    # ตัวเลือกที่ใช้ร่วมกันไม่ได้ ปฏิเสธทันทีแทนที่จะเงียบแล้วไม่ทำ
+    if args.consolidated:
+        ignored = [flag for flag, value in (("--zip", args.zip), ("--force", args.force),
+                                            ("--workers", args.workers is not None), ("--profile", args.profile))
+                   if value]
+        if ignored:
+            parser.error(f"--consolidated cannot be combined with {', '.join(ignored)}")
+    if args.zip and args.force:
+        parser.error("--zip always renders every bill (no render cache), --force has no effect")
+    if args.workers is not None and args.workers < 1:
+        parser.error(f"--workers must be at least 1, got {args.workers}")
+
+    bills = load_bills(args.bills)
+    if args.consolidated:
+        t0 = time.perf_counter()
+        try:
+            path = main.createConsolidatedReport(
+                [dict(b, kind=bill_kind(b)) for b in bills], args.consolidated, profile=args.pdf_profile,
+            )
+        except (KeyError, ValueError) as e:
+            print(f"FAIL  {e}")
+            return 1
+        if args.history:
+            # PDF รวมสำเร็จทั้งไฟล์หรือไม่ได้เลย จึงเก็บทุกบิล
+            _ingest_history(args.history, bills)
+        print(f"{len(bills)} bills -> {path}, {time.perf_counter() - t0:.2f} s wall")
+        return 0
+    t0 = time.perf_counter()
+    if args.zip:
+        try:
+            results = write_zip(bills, args.zip, workers=args.workers, on_result=_print_result,
+                                profile=bool(args.profile), pdf_profile=args.pdf_profile)
+        except ValueError as e:
+            print(f"FAIL  {e}")
+            return 1
+    else:
+        results = run_batch(bills, workers=args.workers, on_result=_print_result, profile=bool(args.profile),
+                            force=args.force, pdf_profile=args.pdf_profile)
+    wall = time.perf_counter() - t0
+
+    if args.profile:
+        profiles = [r["profile"] for r in results]
+        by_kind = {}
+        for r in results:
+            by_kind.setdefault(r["kind"] or "?", []).append(r["profile"])
+        with open(args.profile, "w", encoding="utf-8") as f:
+            json.dump({
+                "jobs": len(results),
+                "wall_s": wall,
+                "total": instrument.merge(profiles),
+                "by_kind": {k: instrument.merge(p) for k, p in by_kind.items()},
+            }, f, ensure_ascii=False, indent=2)
+
+    if args.history:
+        _ingest_history(args.history, [bills[r["index"]] for r in results if r["ok"]])
+
+    failed = [r for r in results if not r["ok"]]
+    cached = sum(1 for r in results if r["cached"])
+    print(f"{len(results) - len(failed)}/{len(results)} ok ({cached} unchanged), {len(failed)} failed, {wall:.2f} s wall")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(run_cli())
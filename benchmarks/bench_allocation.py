@@ -0,0 +1,64 @@
+"""
+วัดเวลาการปันส่วนยอดบิลลง line ระหว่างวนทีละ line (คำนวณ + ปัดทศนิยมแยกกัน)
+กับ allocation.CostAllocation (vectorized + ปัดแบบ largest remainder)
+
+    python -m benchmarks.bench_allocation [จำนวน line] [จำนวนรอบ]
+
+แสดงผลต่างของผลรวมจากยอดบิลด้วย (วนทีละ line ปัดแล้วมักเหลือเศษสตางค์)
+"""
+import sys
+import time
+
+from allocation import CostAllocation, to_satang
+from benchmarks.synthetic import synthetic_rows
+
+GRID_BAHT = 3_604_637.58
+SOLAR_BAHT = 407_359.70
+
+
+def _loop(rows, grid_baht, solar_baht):
+    # แบบเดิม: สัดส่วนของแต่ละ line แล้ว round ทีละค่า
+    total_kwh = sum(r["kwh_ut"] for r in rows)
+    out = []
+    for r in rows:
+        share = r["kwh_ut"] / total_kwh
+        amount = round(grid_baht * share, 2)
+        solar = round(solar_baht * share, 2)
+        out.append((amount, solar, round(amount + solar, 2)))
+    return out
+
+
+def _best(func, repeat):
+    best = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - t0
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def run(n_lines=50_000, repeat=3):
+    rows = list(synthetic_rows(n_lines))
+
+    loop_s, loop = _best(lambda: _loop(rows, GRID_BAHT, SOLAR_BAHT), repeat)
+    vec_s, alloc = _best(lambda: CostAllocation(rows, GRID_BAHT, SOLAR_BAHT), repeat)
+    alloc.check()
+
+    loop_diff = sum(to_satang(a) for a, _, _ in loop) - to_satang(GRID_BAHT)
+    vec_diff = int(alloc.amount.sum()) - to_satang(GRID_BAHT)
+
+    print(f"lines                  : {n_lines:,}")
+    print(f"loop       (ms, satang): {loop_s * 1000:8.1f} {loop_diff:+8d}")
+    print(f"vectorized (ms, satang): {vec_s * 1000:8.1f} {vec_diff:+8d}")
+    print(f"speed-up               : {loop_s / vec_s:8.2f}x")
+    return {
+        "lines": n_lines,
+        "loop_s": loop_s, "loop_diff_satang": loop_diff,
+        "vectorized_s": vec_s, "vectorized_diff_satang": vec_diff,
+    }
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:3]]
+    run(*args)
@@ -0,0 +1,57 @@
+"""
+วัดเวลาต่อ cell ของตาราง PDF ขนาดใหญ่: จัดรูปแบบตัวเลข (main._listing_rows) เทียบกับวาด (PowerPDF.table)
+
+    python -m benchmarks.bench_cells [จำนวนแถว] [จำนวนรอบ]
+
+ใช้แถวของ createLineListingReport วัดหลายรอบแสดง min / median ต่อ cell
+ส่วนวาดของ fpdf (วัดความกว้าง จัดแนว เขียน content stream) กินเวลาเกือบทั้งหมด
+การเร่งเฉพาะการจัดรูปแบบหรือแคชความกว้างข้อความจึงวัดผลไม่ได้ในเวลารวม
+"""
+import statistics
+import sys
+import time
+
+import main
+import PowerPDF
+from benchmarks.synthetic import synthetic_rows
+
+
+def _table(rows):
+    pdf = PowerPDF.PowerPDF(title="benchmark", profile="fast")
+    pdf.add_page()
+    t0 = time.perf_counter()
+    pdf.table([c[0] for c in main.listing_cols], rows,
+              col_widths=[c[2] for c in main.listing_cols], aligns=[c[3] for c in main.listing_cols])
+    return time.perf_counter() - t0
+
+
+def run(n=50_000, repeat=3):
+    cols = len(main.listing_cols)
+    cells = n * cols
+    raw = list(synthetic_rows(n))
+    PowerPDF.PowerPDF(title="")  # โหลดฟอนต์ก่อน
+
+    format_t, table_t = [], []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        rows = list(main._listing_rows(raw))
+        format_t.append(time.perf_counter() - t0)
+        table_t.append(_table(rows))
+
+    def us(times):
+        return f"{min(times) / cells * 1e6:8.3f} / {statistics.median(times) / cells * 1e6:8.3f}"
+
+    print(f"rows x columns         : {n:,} x {cols}   ({repeat} runs, min / median)")
+    print(f"format per cell   us   : {us(format_t)}")
+    print(f"table per cell    us   : {us(table_t)}")
+    print(f"format share           : {min(format_t) / (min(format_t) + min(table_t)):8.1%}")
+    return {
+        "rows": n, "cells": cells,
+        "format_s": min(format_t), "table_s": min(table_t),
+        "format_median_s": statistics.median(format_t), "table_median_s": statistics.median(table_t),
+    }
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:3]]
+    run(*args)
@@ -0,0 +1,80 @@
+"""
+วัด peak memory ของ createLineListingReport ระหว่างเอกสารไฟล์เดียวกับแบ่งไฟล์ย่อย (PowerPDF.ChunkedPDF)
+
+    python -m benchmarks.bench_chunked [จำนวนแถว] [หน้าต่อไฟล์ย่อย]
+
+แต่ละแบบรันใน process แยกใน temp dir แถวสร้างแบบ lazy
+ฟอนต์ (parse ครั้งเดียวต่อ process ราว 250 MB RSS) โหลดก่อนเริ่มวัด แล้ววัด peak ของ memory ที่ Python จอง
+ระหว่างสร้างรายงาน (tracemalloc) ซึ่งคือหน้าที่ค้างอยู่ใน memory + การ output
+ไฟล์เดียวต้องเก็บทุกหน้าไว้จน output() จึงโตตามจำนวนแถว แบบแบ่งไฟล์คงที่ตาม chunk_pages
+"""
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _case(n, chunk_pages):
+    # รันใน process ลูก ที่ cwd = temp dir
+    sys.path.insert(0, ROOT)
+    import main
+    import PowerPDF
+    from benchmarks.synthetic import synthetic_rows
+
+    PowerPDF.PowerPDF(title="")  # โหลดฟอนต์/โลโก้ก่อน
+    base = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    parts = main.createLineListingReport(synthetic_rows(n), "lines.pdf", chunk_pages=chunk_pages)
+    seconds = time.perf_counter() - t0
+    traced = tracemalloc.get_traced_memory()[1] / 1e6
+    tracemalloc.stop()
+    return {
+        "seconds": seconds,
+        "parts": len(parts),
+        "bytes": sum(os.path.getsize(p) for p in parts),
+        "traced_peak_mb": traced,
+        "base_rss_mb": base,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+def _run(n, chunk_pages):
+    workdir = tempfile.mkdtemp(prefix="bench-")
+    for d in ("fonts", "images"):
+        os.symlink(os.path.join(ROOT, d), os.path.join(workdir, d))
+    try:
+        out = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_chunked", "--case", str(n), str(chunk_pages or 0)],
+            cwd=workdir, env=dict(os.environ, PYTHONPATH=ROOT), check=True, capture_output=True, text=True,
+        )
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return json.loads(out.stdout.splitlines()[-1])
+
+
+def run(n=20_000, chunk_pages=100):
+    results = {}
+    print(f"{'mode':<14} {'rows':>9} {'parts':>6} {'seconds':>9} {'peak MB':>9} {'RSS MB':>8} {'file MB':>8}")
+    for sizes in (n // 4, n):
+        for name, chunk in (("single", None), (f"chunk {chunk_pages}", chunk_pages)):
+            r = _run(sizes, chunk)
+            results[(name, sizes)] = r
+            print(f"{name:<14} {sizes:>9,} {r['parts']:>6} {r['seconds']:>9.2f} {r['traced_peak_mb']:>9.1f}"
+                  f" {r['peak_rss_mb']:>8.1f} {r['bytes'] / 1e6:>8.2f}")
+    return results
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--case"]:
+        print(json.dumps(_case(int(sys.argv[2]), int(sys.argv[3]) or None)))
+        sys.exit(0)
+    args = [int(a) for a in sys.argv[1:3]]
+    run(*args)
@@ -0,0 +1,93 @@
+"""
+วัดเวลา cold start ของ cli.py (เริ่ม python ใหม่ทุกครั้ง: import + โหลดฟอนต์/โลโก้ + สร้างรายงาน 1 ชิ้น)
+
+    python -m benchmarks.bench_coldstart [จำนวนรอบ] [จำนวนแถว Excel]
+
+เทียบกับ "eager" ที่ import ทุก module ของ repo ก่อนแบบเดิม (main + PowerPDF + openpyxl + NumPy)
+และแสดงว่าแต่ละคำสั่งโหลด fpdf / openpyxl / numpy หรือไม่ (จาก python -X importtime)
+แต่ละรอบรันใน temp dir (ไม่มีแคช render ไม่เขียนไฟล์ลง repo)
+"""
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CLI = os.path.join(ROOT, "cli.py")
+HEAVY = ("fpdf", "openpyxl", "numpy")
+
+# import ทุกอย่างตั้งแต่ต้นแบบก่อนมี lazy import แล้วรันคำสั่งเดียวกัน
+EAGER = ("import sys; sys.path.insert(0, {root!r}); "
+         "import openpyxl, numpy, PowerPDF, render_cache, aggregate, allocation, sources, history, cli; "
+         "sys.exit(cli.run(sys.argv[1:]))")
+
+
+def write_inputs(workdir, rows):
+    """ไฟล์ input ของ commands() ใน workdir: electric.json, solar.json, lines.json (rows แถว)"""
+    from benchmarks.synthetic import synthetic_bills, synthetic_rows
+
+    for kind in ("electric", "solar"):
+        with open(os.path.join(workdir, f"{kind}.json"), "w", encoding="utf-8") as f:
+            json.dump(next(iter(synthetic_bills(1, kind))), f)
+    with open(os.path.join(workdir, "lines.json"), "w", encoding="utf-8") as f:
+        json.dump(list(synthetic_rows(rows)), f)
+
+
+def commands():
+    """ชื่อ -> argv ของ cli.py"""
+    return {
+        "electricity": ["electricity", "electric.json", "--out", "out.pdf"],
+        "solar": ["solar", "solar.json", "--out", "out.pdf"],
+        "excel_xmlstream": ["excel", "lines.json", "--out", "out.xlsx", "--engine", "xmlstream"],
+        "excel_openpyxl": ["excel", "lines.json", "--out", "out.xlsx"],
+    }
+
+
+def _once(prefix, argv, workdir):
+    t0 = time.perf_counter()
+    out = subprocess.run(prefix + argv, cwd=workdir, capture_output=True, text=True)
+    seconds = time.perf_counter() - t0
+    if out.returncode:
+        raise RuntimeError(f"{' '.join(argv)}: {out.stderr.strip()}")
+    return seconds, out.stderr
+
+
+def _loaded(stderr):
+    # บรรทัด "import time: self | cumulative | name" หนึ่งบรรทัดต่อ module ที่ถูก import
+    names = set()
+    for line in stderr.splitlines():
+        if line.startswith("import time:"):
+            names.add(line.rsplit("|", 1)[-1].strip())
+    return [m for m in HEAVY if m in names]
+
+
+def run(repeat=5, rows=1000):
+    workdir = tempfile.mkdtemp(prefix="bench-")
+    for d in ("fonts", "images"):
+        os.symlink(os.path.join(ROOT, d), os.path.join(workdir, d))
+    try:
+        write_inputs(workdir, rows)
+        bare = statistics.median(_once([sys.executable, "-c", "pass"], [], workdir)[0] for _ in range(repeat))
+        print(f"python -c pass         : {bare * 1000:8.1f} ms")
+        print(f"{'command':<22} {'lazy ms':>9} {'eager ms':>9}  loads")
+        results = {"python_s": bare}
+        for name, argv in commands().items():
+            lazy = statistics.median(_once([sys.executable, CLI], argv, workdir)[0] for _ in range(repeat))
+            eager = statistics.median(
+                _once([sys.executable, "-c", EAGER.format(root=ROOT)], argv, workdir)[0] for _ in range(repeat))
+            loads = _loaded(_once([sys.executable, "-X", "importtime", CLI], argv, workdir)[1])
+            print(f"{name:<22} {lazy * 1000:9.1f} {eager * 1000:9.1f}  {', '.join(loads) or '-'}")
+            results[name] = {"lazy_s": lazy, "eager_s": eager, "loads": loads}
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+if __name__ == "__main__":
+    sys.path.insert(0, ROOT)
+    args = [int(a) for a in sys.argv[1:3]]
+    run(*args)
@@ -0,0 +1,49 @@
+"""
+วัดเวลาและขนาดไฟล์ระหว่างบิลละไฟล์ (createBillReport) กับรวมเป็นไฟล์เดียว (createConsolidatedReport)
+
+    python -m benchmarks.bench_consolidated [จำนวนบิล ...]
+
+ไฟล์รวมฝังฟอนต์/โลโก้/template ครั้งเดียว ขนาดจึงเพิ่มแค่เนื้อหาต่อหน้า
+"""
+import sys
+import time
+
+import main
+from benchmarks.synthetic import synthetic_bills
+
+
+def _separate(bills):
+    size = 0
+    for bill in bills:
+        raw, _ = main.createBillReport(main.BILL_PLANS[bill["kind"]], bill, out=bytes)
+        size += len(raw)
+    return size
+
+
+def _timed(func, *args):
+    t0 = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - t0, result
+
+
+def run(sizes=(1, 12, 24, 120)):
+    main.createConsolidatedReport(list(synthetic_bills(1)), bytes)  # warm-up ฟอนต์/โลโก้
+
+    print(f"{'bills':>6}  {'separate ms':>12} {'bytes':>12}  {'single ms':>10} {'bytes':>10}")
+    results = []
+    for n in sizes:
+        bills = list(synthetic_bills(n))
+        sep_s, sep_size = _timed(_separate, bills)
+        one_s, raw = _timed(main.createConsolidatedReport, bills, bytes)
+        print(f"{n:>6}  {sep_s * 1000:12.1f} {sep_size:12,d}  {one_s * 1000:10.1f} {len(raw):10,d}")
+        results.append({
+            "bills": n,
+            "separate_s": sep_s, "separate_bytes": sep_size,
+            "consolidated_s": one_s, "consolidated_bytes": len(raw),
+        })
+    return results
+
+
+if __name__ == "__main__":
+    sizes = [int(a) for a in sys.argv[1:]]
+    run(*([sizes] if sizes else []))
@@ -0,0 +1,143 @@
+"""
+วัดเวลา/peak memory ของ createExcelReport แบบปกติ, write_only และ engine="xmlstream"
+
+    python -m benchmarks.bench_excel [จำนวนแถว ...] [--max-inmemory N]
+
+แต่ละกรณีรันใน process แยก เพื่อให้ peak RSS ไม่ปนกัน
+โหมดปกติจะข้ามเมื่อจำนวนแถวเกิน --max-inmemory (ค่าเริ่มต้น 100000)
+ก่อนวัดเวลาจะเทียบ workbook ของ openpyxl กับ xmlstream (ค่า, style, ความกว้างคอลัมน์) ว่าตรงกัน
+หลังวัดจะเช็คว่า peak RSS ของ write_only / xmlstream ไม่โตตามจำนวนแถว (exit 1 ถ้าโตเกิน --max-growth)
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.synthetic import synthetic_rows
+
+# โหมด streaming ต้องใช้ memory คงที่: peak RSS ที่จำนวนแถวมากสุดโตได้ไม่เกินสัดส่วนนี้จากจำนวนแถวน้อยสุด
+MAX_MEMORY_GROWTH = 0.25
+STREAM_MODES = ("stream", "xmlstream")
+
+
+def _peak_rss_mb():
+    # ru_maxrss เป็น KB บน Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _case(mode, n):
+    import main
+
+    fd, path = tempfile.mkstemp(suffix=".xlsx")
+    os.close(fd)
+    base_rss = _peak_rss_mb()
+    t0 = time.perf_counter()
+    if mode == "stream":
+        main.createExcelReport(synthetic_rows(n), path, write_only=True)
+    elif mode == "xmlstream":
+        main.createExcelReport(synthetic_rows(n), path, engine="xmlstream")
+    else:
+        main.createExcelReport(list(synthetic_rows(n)), path)
+    seconds = time.perf_counter() - t0
+    size = os.path.getsize(path)
+    os.remove(path)
+    return {
+        "mode": mode,
+        "rows": n,
+        "seconds": seconds,
+        "rows_per_s": n / seconds,
+        "peak_rss_mb": _peak_rss_mb(),
+        "base_rss_mb": base_rss,
+        "bytes": size,
+    }
+
+
+def _signature(path):
+    # สิ่งที่ต้องเหมือนกันระหว่าง engine: ชื่อชีท, ความกว้างคอลัมน์, ค่าและ style ของทุก cell
+    import openpyxl
+
+    wb = openpyxl.load_workbook(path)
+    out = []
+    for ws in wb.worksheets:
+        widths = sorted((k, round(d.width, 3)) for k, d in ws.column_dimensions.items() if d.width)
+        cells = [
+            (c.value, c.fill.fgColor.rgb, c.font.b, c.border.left.style, c.alignment.horizontal)
+            for row in ws.iter_rows() for c in row
+        ]
+        out.append((ws.title, widths, cells))
+    return out
+
+
+def check_engines(n=2000):
+    """workbook จาก openpyxl (โหมดปกติ) กับ xmlstream ต้องเหมือนกัน"""
+    import main
+    from aggregate import SUMMARY_LEVELS
+
+    rows = list(synthetic_rows(n))
+    with tempfile.TemporaryDirectory() as tmp:
+        a, b = os.path.join(tmp, "openpyxl.xlsx"), os.path.join(tmp, "xmlstream.xlsx")
+        # xmlstream สรุปแค่ department โดยค่าเริ่มต้น จึงขอทุกระดับให้ตรงกับโหมดปกติ
+        main.createExcelReport(rows, a)
+        main.createExcelReport(rows, b, engine="xmlstream", summary_levels=SUMMARY_LEVELS)
+        same = _signature(a) == _signature(b)
+    print(f"openpyxl vs xmlstream ({n:,} rows): {'equivalent' if same else 'DIFFERENT'}")
+    return same
+
+
+def check_memory(results, max_growth=MAX_MEMORY_GROWTH):
+    """
+    peak RSS ของโหมด streaming ต้องไม่โตตามจำนวนแถว
+    - results: ผลของ run() ต้องมีอย่างน้อยสองขนาด
+    - คืน dict โหมด -> สัดส่วนที่โต (ขนาดใหญ่สุดเทียบขนาดเล็กสุด)
+    """
+    growth = {}
+    for mode in STREAM_MODES:
+        peaks = sorted((r["rows"], r["peak_rss_mb"]) for r in results if r["mode"] == mode)
+        if len(peaks) < 2 or peaks[0][0] == peaks[-1][0]:
+            continue
+        (small, small_mb), (large, large_mb) = peaks[0], peaks[-1]
+        growth[mode] = large_mb / small_mb - 1
+        print(f"{mode:<9} peak RSS {small:,} -> {large:,} rows: {small_mb:.1f} -> {large_mb:.1f} MB"
+              f" ({growth[mode]:+.0%}, limit {max_growth:+.0%})")
+    return growth
+
+
+def run(sizes=(100_000, 1_000_000), max_inmemory=100_000, max_growth=MAX_MEMORY_GROWTH):
+    results = []
+    if not check_engines():
+        raise SystemExit("workbook ของ engine ไม่ตรงกัน")
+    for n in sizes:
+        for mode in ("inmemory", "stream", "xmlstream"):
+            if mode == "inmemory" and n > max_inmemory:
+                continue
+            out = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_excel", "--case", mode, str(n)],
+                check=True, capture_output=True, text=True,
+            )
+            r = json.loads(out.stdout.splitlines()[-1])
+            results.append(r)
+            print(f"{r['mode']:<9} {r['rows']:>9,} rows  {r['seconds']:8.2f} s"
+                  f"  {r['rows_per_s']:>10,.0f} rows/s  peak RSS {r['peak_rss_mb']:7.1f} MB"
+                  f"  {r['bytes'] / 1e6:7.1f} MB xlsx")
+    grown = [m for m, g in check_memory(results, max_growth).items() if g > max_growth]
+    if grown:
+        raise SystemExit(f"memory ของ {' / '.join(grown)} โตตามจำนวนแถว")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("sizes", nargs="*", type=int, default=[100_000, 1_000_000])
+    parser.add_argument("--max-inmemory", type=int, default=100_000)
+    parser.add_argument("--max-growth", type=float, default=MAX_MEMORY_GROWTH)
+    parser.add_argument("--case", nargs=2, metavar=("MODE", "ROWS"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        print(json.dumps(_case(args.case[0], int(args.case[1]))))
+    else:
+        run(args.sizes, args.max_inmemory, args.max_growth)
@@ -0,0 +1,37 @@
+"""
+วัดเวลา setup ต่อเอกสารของ PowerPDF ก่อน/หลังใช้ font registry
+
+    python -m benchmarks.bench_fonts [จำนวนเอกสาร]
+"""
+import sys
+import time
+
+import assets
+import PowerPDF
+
+
+def run(n_docs=50):
+    # ก่อน: ล้างแคชทุกครั้ง = parse TTF ทั้ง 3 ไฟล์ใหม่ทุกเอกสาร (พฤติกรรมเดิม)
+    t0 = time.perf_counter()
+    for _ in range(n_docs):
+        assets.clear_font_cache()
+        PowerPDF.PowerPDF(title="bench")
+    cold = (time.perf_counter() - t0) / n_docs
+
+    # หลัง: parse ครั้งแรกครั้งเดียว เอกสารถัดไปใช้ของที่แคชไว้
+    assets.clear_font_cache()
+    PowerPDF.PowerPDF(title="warm-up")
+    t0 = time.perf_counter()
+    for _ in range(n_docs):
+        PowerPDF.PowerPDF(title="bench")
+    warm = (time.perf_counter() - t0) / n_docs
+
+    print(f"documents          : {n_docs}")
+    print(f"setup before (ms)  : {cold * 1000:8.2f}")
+    print(f"setup after  (ms)  : {warm * 1000:8.2f}")
+    print(f"speed-up           : {cold / warm:8.1f}x")
+    return {"docs": n_docs, "cold_s": cold, "warm_s": warm}
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 50)
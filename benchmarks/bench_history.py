@@ -0,0 +1,81 @@
+"""
+วัดเวลา ingest รายเดือนของ history.HistoryStore (ควรคงที่แม้ประวัติยาวขึ้น)
+และเวลาสร้างตารางแนวโน้มจาก aggregate รายเดือน เทียบกับ GROUP BY จากตาราง lines ทั้งหมด
+
+    python -m benchmarks.bench_history [จำนวน line ต่อเดือน] [จำนวนเดือน]
+"""
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+import history
+import main
+from benchmarks.synthetic import synthetic_bills, synthetic_rows
+
+
+def _scan_trend(store, level, metric):
+    # แบบไม่มี aggregate: รวมจาก line ทุกแถวของทุกเดือน
+    keys = ", ".join(history.LEVELS[level])
+    return store.db.execute(
+        f"SELECT {keys}, period, SUM({metric}) FROM lines GROUP BY {keys}, period ORDER BY {keys}, period"
+    ).fetchall()
+
+
+def check_bill(store):
+    """ingest_bill ต้องเก็บบิลที่มีค่าจาก allocateBillCosts (numpy scalar) ได้"""
+    bill = next(synthetic_bills(1, "electric"))
+    rows = list(synthetic_rows(100))
+    lines = {k: np.array([r[k] for r in rows]) for k in rows[0]}
+    allocation = main.allocateBillCosts(lines, electric=bill)
+    first = next(allocation.rows())
+    # คอลัมน์ของ lines เป็น numpy array ค่าใน rows() จึงเป็น np.int64 / np.float64
+    bill = dict(bill, **allocation.bill_fields(), mst_kw=first["kwh_ut"], fac_1_kw=np.float32(first["kw"]))
+    period = store.ingest_bill(main.ELECTRIC_PLAN, bill)
+    stored = store.bill("electric", period)
+    if stored["mst_kw"] != int(first["kwh_ut"]) or stored["direct_baht"] != bill["direct_baht"]:
+        raise SystemExit(f"ingest_bill เก็บค่า numpy ผิด: {stored}")
+    store.db.execute("DELETE FROM bills")
+
+
+def run(n_lines=20_000, months=24):
+    tmp = tempfile.mkdtemp(prefix="bench-history-")
+    path = os.path.join(tmp, "history.sqlite3")
+    results = {"lines": n_lines, "months": months, "ingest_s": []}
+    try:
+        with history.HistoryStore(path) as store:
+            check_bill(store)
+            for m in range(months):
+                period = f"{m % 12 + 1}/{2024 + m // 12}"
+                t0 = time.perf_counter()
+                store.ingest_lines(period, synthetic_rows(n_lines, seed=m))
+                results["ingest_s"].append(time.perf_counter() - t0)
+            ingest = results["ingest_s"]
+            print(f"lines / month          : {n_lines:,}")
+            print(f"ingest first / last  s : {ingest[0]:8.3f} / {ingest[-1]:8.3f}")
+
+            for level in ("department", "line"):
+                t0 = time.perf_counter()
+                periods, rows = store.trend(level, "total_amount")
+                agg_s = time.perf_counter() - t0
+                t0 = time.perf_counter()
+                _scan_trend(store, level, "total_amount")
+                scan_s = time.perf_counter() - t0
+                print(f"trend {level:<10} ms   : aggregate {agg_s * 1000:8.1f}  scan lines {scan_s * 1000:8.1f}"
+                      f"  ({len(rows):,} x {len(periods)})")
+                results[f"trend_{level}_s"] = agg_s
+                results[f"scan_{level}_s"] = scan_s
+        results["db_bytes"] = os.path.getsize(path)
+        print(f"database               : {results['db_bytes'] / 1e6:8.1f} MB")
+        return results
+    finally:
+        for name in os.listdir(tmp):
+            os.remove(os.path.join(tmp, name))
+        os.rmdir(tmp)
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:3]]
+    run(*args)
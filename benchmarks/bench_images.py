@@ -0,0 +1,49 @@
+"""
+วัดเวลาวาดหัวกระดาษ (โลโก้ 2 รูป) ต่อเอกสาร ก่อน/หลังใช้ image cache
+และตรวจว่าโลโก้ถูก embed แค่ครั้งเดียวในเอกสารหลายหน้า
+
+    python -m benchmarks.bench_images [จำนวนเอกสาร] [จำนวนหน้า]
+"""
+import sys
+import time
+
+import assets
+import PowerPDF
+
+
+def _render(n_pages):
+    pdf = PowerPDF.PowerPDF(title="bench")
+    for _ in range(n_pages):
+        pdf.add_page()
+    return pdf
+
+
+def run(n_docs=10, n_pages=5):
+    _render(1)  # warm-up ฟอนต์
+
+    # ก่อน: ล้างแคชทุกเอกสาร = decode PNG ใหม่ทุกครั้ง (พฤติกรรมเดิม)
+    t0 = time.perf_counter()
+    for _ in range(n_docs):
+        assets.clear_image_cache()
+        _render(n_pages)
+    cold = (time.perf_counter() - t0) / n_docs
+
+    t0 = time.perf_counter()
+    for _ in range(n_docs):
+        pdf = _render(n_pages)
+    warm = (time.perf_counter() - t0) / n_docs
+
+    embedded = sum(1 for img in pdf.image_cache.images.values() if img["usages"] > 0)
+    raw = bytes(pdf.output())
+
+    print(f"documents x pages      : {n_docs} x {n_pages}")
+    print(f"render before (ms/doc) : {cold * 1000:8.2f}")
+    print(f"render after  (ms/doc) : {warm * 1000:8.2f}")
+    print(f"speed-up               : {cold / warm:8.1f}x")
+    print(f"images embedded / file : {embedded} ({raw.count(b'/Subtype /Image')} image XObjects incl. soft masks)")
+    return {"docs": n_docs, "pages": n_pages, "cold_s": cold, "warm_s": warm}
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:3]]
+    run(*args)
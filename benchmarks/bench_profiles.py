@@ -0,0 +1,54 @@
+"""
+วัดขนาดไฟล์/เวลา render ของแต่ละ output profile (fast / balanced / compact)
+กับบิลไฟฟ้า บิลโซล่า และไฟล์รวมหลายบิล
+
+    python -m benchmarks.bench_profiles [จำนวนบิลของไฟล์รวม] [จำนวนรอบ]
+"""
+import sys
+import time
+
+import PowerPDF
+import main
+from benchmarks.synthetic import synthetic_bills
+
+
+def _render(profile, kind, bills):
+    if kind == "consolidated":
+        return main.createConsolidatedReport(bills, bytes, profile=profile)
+    return main.createBillReport(main.BILL_PLANS[kind], bills[0], out=bytes, profile=profile)[0]
+
+
+def _measure(profile, kind, bills, repeat):
+    best = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        raw = _render(profile, kind, bills)
+        elapsed = time.perf_counter() - t0
+        best = elapsed if best is None else min(best, elapsed)
+    return best, len(raw)
+
+
+def run(n_bills=24, repeat=3):
+    cases = {
+        "electric": list(synthetic_bills(1, "electric")),
+        "solar": list(synthetic_bills(1, "solar")),
+        "consolidated": list(synthetic_bills(n_bills)),
+    }
+    # warm-up ฟอนต์/โลโก้ (รวมโลโก้ที่ย่อแล้วของ compact)
+    for profile in PowerPDF.OUTPUT_PROFILES:
+        _render(profile, "electric", cases["electric"])
+
+    print(f"{'case':<18} {'profile':<9} {'ms':>9} {'bytes':>11}")
+    results = []
+    for kind, bills in cases.items():
+        label = f"{kind} ({len(bills)})" if kind == "consolidated" else kind
+        for profile in PowerPDF.OUTPUT_PROFILES:
+            seconds, size = _measure(profile, kind, bills, repeat)
+            print(f"{label:<18} {profile:<9} {seconds * 1000:9.1f} {size:11,d}")
+            results.append({"case": kind, "bills": len(bills), "profile": profile, "seconds": seconds, "bytes": size})
+    return results
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:3]]
+    run(*args)
@@ -0,0 +1,44 @@
+"""
+วัดเวลา export Excel แบบไฟล์เดียวเทียบกับแยกไฟล์ตาม department ด้วยจำนวน worker ต่าง ๆ
+
+    python -m benchmarks.bench_shards [จำนวนแถว] [จำนวน worker ...]
+
+เวลาของโหมดแยกไฟล์ควรลดลงตามจำนวน core (บนเครื่อง 1 core จะเท่ากับไฟล์เดียวโดยประมาณ)
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import excel_shards
+import main
+from benchmarks.synthetic import synthetic_rows
+
+
+def run(n_rows=50_000, workers=None):
+    workers = workers or sorted({1, os.cpu_count() or 1})
+    tmp = tempfile.mkdtemp(prefix="bench-shards-")
+    try:
+        t0 = time.perf_counter()
+        main.createExcelReport(synthetic_rows(n_rows), os.path.join(tmp, "single.xlsx"), write_only=True)
+        single_s = time.perf_counter() - t0
+        print(f"rows                 : {n_rows:,}")
+        print(f"single workbook      : {single_s:8.2f} s")
+
+        results = {"rows": n_rows, "single_s": single_s, "sharded_s": {}}
+        for n in workers:
+            out_dir = os.path.join(tmp, f"w{n}")
+            t0 = time.perf_counter()
+            result = excel_shards.export_sharded(synthetic_rows(n_rows), out_dir, workers=n)
+            seconds = time.perf_counter() - t0
+            results["sharded_s"][n] = seconds
+            print(f"sharded, {n:>2} workers : {seconds:8.2f} s  ({len(result['shards'])} shards, x{single_s / seconds:.2f})")
+        return results
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    run(*args[:1], args[1:] or None)
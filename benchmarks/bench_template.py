@@ -0,0 +1,55 @@
+"""
+วัดเวลาและขนาดไฟล์ของเอกสารหลายหน้า ระหว่างวาดหัวกระดาษซ้ำทุกหน้า (เดิม)
+กับใช้ template (Form XObject) ที่วาดส่วนคงที่ครั้งเดียวต่อไฟล์
+
+    python -m benchmarks.bench_template [จำนวนหน้า] [จำนวนรอบ]
+"""
+import sys
+import time
+
+import PowerPDF
+
+
+class _InlinePDF(PowerPDF.PowerPDF):
+    # พฤติกรรมเดิม: วาดเนื้อหาคงที่ลงทุกหน้า
+    def use_template(self, name, draw):
+        draw()
+
+
+def _render(cls, n_pages):
+    pdf = cls(title="bench", period="ส.ค. 2568", issued="1 ก.ย. 2568")
+    for _ in range(n_pages):
+        pdf.add_page()
+    return bytes(pdf.output())
+
+
+def _measure(cls, n_pages, repeat):
+    best = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        raw = _render(cls, n_pages)
+        elapsed = time.perf_counter() - t0
+        best = elapsed if best is None else min(best, elapsed)
+    return best, len(raw)
+
+
+def run(n_pages=200, repeat=3):
+    _render(PowerPDF.PowerPDF, 1)  # warm-up ฟอนต์/โลโก้
+
+    inline_s, inline_size = _measure(_InlinePDF, n_pages, repeat)
+    tpl_s, tpl_size = _measure(PowerPDF.PowerPDF, n_pages, repeat)
+
+    print(f"pages                  : {n_pages}")
+    print(f"inline   (ms, bytes)   : {inline_s * 1000:8.1f} {inline_size:10,d}")
+    print(f"template (ms, bytes)   : {tpl_s * 1000:8.1f} {tpl_size:10,d}")
+    print(f"speed-up / size ratio  : {inline_s / tpl_s:8.2f}x {tpl_size / inline_size:10.2f}")
+    return {
+        "pages": n_pages,
+        "inline_s": inline_s, "inline_bytes": inline_size,
+        "template_s": tpl_s, "template_bytes": tpl_size,
+    }
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:3]]
+    run(*args)
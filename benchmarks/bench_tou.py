@@ -0,0 +1,80 @@
+"""
+วัดเวลาการแยกหน่วย P / OP / H จากข้อมูลมิเตอร์ราย 15 นาที ระหว่างวนทีละช่วงด้วย datetime
+กับ tou.TouUsage (จัดช่วงครั้งเดียว + คูณ matrix)
+
+    python -m benchmarks.bench_tou [จำนวนมิเตอร์] [จำนวนวัน] [จำนวนรอบ]
+
+แสดงผลต่างของหน่วยรวมและ max_peak_kw ระหว่างสองวิธีด้วย (ควรเป็น 0)
+"""
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+import tou
+from benchmarks.synthetic import meter_intervals
+
+START = datetime(2025, 8, 1)
+HOLIDAYS = frozenset({date(2025, 8, 12)})
+
+
+def _loop(kwh, start, interval, holidays):
+    # แบบเดิม: ตัดสินช่วงทีละช่วงด้วย datetime แล้วบวกทีละมิเตอร์ทีละช่วง
+    schedule = tou.DEFAULT_SCHEDULE
+    peak_start = int(schedule.peak_start[:2]) * 60
+    peak_end = int(schedule.peak_end[:2]) * 60
+    buckets = []
+    for i in range(kwh.shape[1]):
+        t = start + timedelta(minutes=i * interval)
+        minute = t.hour * 60 + t.minute
+        if t.weekday() not in schedule.peak_days or t.date() in holidays:
+            buckets.append("H")
+        elif peak_start <= minute < peak_end:
+            buckets.append("P")
+        else:
+            buckets.append("OP")
+    meters = []
+    for values in kwh.tolist():
+        sums = {"P": 0.0, "OP": 0.0, "H": 0.0}
+        for bucket, v in zip(buckets, values):
+            sums[bucket] += v
+        meters.append(sums)
+    # มิเตอร์แรกเป็นมิเตอร์ PEA
+    max_peak = max(v for bucket, v in zip(buckets, kwh[0].tolist()) if bucket == "P") * 60 / interval
+    return meters[0], max_peak
+
+
+def _best(func, repeat):
+    best = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - t0
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def run(n_meters=500, days=31, repeat=3):
+    kwh = meter_intervals(n_meters, days)
+    groups = ["pea"] + [tou.FACTORY_GROUPS[i % len(tou.FACTORY_GROUPS)] for i in range(n_meters - 1)]
+
+    loop_s, (sums, max_peak) = _best(lambda: _loop(kwh, START, 15, HOLIDAYS), 1)
+    vec_s, usage = _best(lambda: tou.TouUsage(kwh, START, groups=groups, holidays=HOLIDAYS), repeat)
+    fields = usage.bill_fields()
+
+    energy_diff = max(abs(fields[k] - sums[b]) for k, b in (
+        ("energy_peak1_kw", "P"), ("energy_offpeak_kw", "OP"), ("energy_holiday1_kw", "H")))
+    print(f"meters x intervals     : {n_meters:,} x {kwh.shape[1]:,}")
+    print(f"loop               ms  : {loop_s * 1000:8.1f}")
+    print(f"vectorized         ms  : {vec_s * 1000:8.1f}")
+    print(f"speed-up               : {loop_s / vec_s:8.1f}x")
+    print(f"max diff kWh / kW      : {energy_diff:.6f} / {abs(fields['max_peak_kw'] - max_peak):.6f}")
+    return {
+        "meters": n_meters, "intervals": kwh.shape[1],
+        "loop_s": loop_s, "vectorized_s": vec_s,
+        "energy_diff": energy_diff, "max_peak_diff": abs(fields["max_peak_kw"] - max_peak),
+    }
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:4]]
+    run(*args)
@@ -0,0 +1,248 @@
+"""
+ชุด benchmark หลักของรายงาน PDF / Excel
+
+    python -m benchmarks.suite                       # ทุกขนาด (ใช้เวลานาน)
+    python -m benchmarks.suite --quick               # ขนาดเล็ก ตรวจเร็ว ๆ
+    python -m benchmarks.suite --only electric table --sizes 100
+    python -m benchmarks.suite --compare benchmarks/results/<ไฟล์เดิม>.json
+
+วัด wall time, peak RSS, ขนาดไฟล์ output และจำนวนหน้า/แถวต่อวินาที
+แต่ละกรณีรันใน process แยกใน temp dir (peak RSS ไม่ปนกัน ไม่เขียนไฟล์ลง repo)
+ผลบันทึกเป็น JSON ที่ benchmarks/results/ (หรือ --out) แล้วใช้ --compare
+เทียบกับผลครั้งก่อนเพื่อหา regression (exit code 1 ถ้าช้าลงเกิน --threshold)
+"""
+import argparse
+import json
+import os
+import platform
+import re
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+
+# ชื่อกรณี -> (หน่วย, ขนาดเต็ม, ขนาดของ --quick)
+CASES = {
+    "electric":     ("bills", (1, 100, 10_000), (1, 20)),
+    "solar":        ("bills", (1, 100, 10_000), (1, 20)),
+    "table":        ("rows", (1_000, 10_000, 100_000), (1_000,)),
+    "excel":        ("rows", (1_000, 10_000, 100_000), (1_000, 10_000)),
+    "excel_stream": ("rows", (1_000, 10_000, 100_000, 1_000_000), (1_000, 10_000)),
+    # python cli.py ใน process ใหม่ (import + ฟอนต์/โลโก้ + รายงาน 1 ชิ้น) ดู bench_coldstart
+    "cold_electric": ("bills", (1,), (1,)),
+    "cold_excel":    ("rows", (1_000,), (1_000,)),
+}
+
+_PAGE_RE = re.compile(rb"/Type /Page\b")
+
+
+def _peak_rss_mb():
+    # ru_maxrss เป็น KB บน Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _pdf_stats(paths):
+    size = pages = 0
+    for path in paths:
+        with open(path, "rb") as f:
+            raw = f.read()
+        size += len(raw)
+        pages += len(_PAGE_RE.findall(raw))
+    return size, pages
+
+
+# ====== Cases (รันใน process ลูก ที่ cwd = temp dir) ======
+def _case_bills(kind, n):
+    import main
+    from benchmarks.synthetic import synthetic_bills
+
+    create = {"electric": main.createElectricityReport, "solar": main.createSolarReport}[kind]
+    bills = list(synthetic_bills(n, kind))
+    t0 = time.perf_counter()
+    for bill in bills:
+        create(bill)
+    seconds = time.perf_counter() - t0
+    paths = [os.path.join(d, f) for d, _, files in os.walk("reports") for f in files]
+    return (seconds,) + _pdf_stats(paths)
+
+
+def _case_table(n):
+    import PowerPDF
+    from benchmarks.synthetic import table_rows
+
+    t0 = time.perf_counter()
+    pdf = PowerPDF.PowerPDF(title="benchmark")
+    pdf.add_page()
+    pdf.table(
+        ["GROUP PD", "SECTION", "LINE", "KWH", "AMOUNT"],
+        table_rows(n),
+        aligns=["L", "L", "L", "R", "R"],
+    )
+    pdf.output("table.pdf")
+    seconds = time.perf_counter() - t0
+    return (seconds,) + _pdf_stats(["table.pdf"])
+
+
+def _case_excel(n, write_only):
+    import main
+    from benchmarks.synthetic import synthetic_rows
+
+    rows = synthetic_rows(n) if write_only else list(synthetic_rows(n))
+    t0 = time.perf_counter()
+    main.createExcelReport(rows, "report.xlsx", write_only=write_only)
+    seconds = time.perf_counter() - t0
+    return seconds, os.path.getsize("report.xlsx"), None
+
+
+def _case_cold(name, n):
+    from benchmarks.bench_coldstart import commands, write_inputs
+
+    write_inputs(".", n)
+    argv = commands()["electricity" if name == "cold_electric" else "excel_xmlstream"]
+    t0 = time.perf_counter()
+    subprocess.run([sys.executable, os.path.join(ROOT, "cli.py")] + argv, check=True, capture_output=True)
+    seconds = time.perf_counter() - t0
+    out = argv[argv.index("--out") + 1]
+    if out.endswith(".pdf"):
+        return (seconds,) + _pdf_stats([out])
+    return seconds, os.path.getsize(out), None
+
+
+def _run_case(name, n):
+    sys.path.insert(0, ROOT)
+    import main  # noqa: F401  (import ก่อนย้าย cwd)
+    import benchmarks.synthetic  # noqa: F401
+
+    # ฟอนต์/รูปอ้างด้วย path สัมพัทธ์ จึงลิงก์เข้า temp dir ที่ใช้เป็น cwd
+    workdir = tempfile.mkdtemp(prefix="bench-")
+    for d in ("fonts", "images"):
+        os.symlink(os.path.join(ROOT, d), os.path.join(workdir, d))
+    os.chdir(workdir)
+    base_rss = _peak_rss_mb()
+    try:
+        if name in ("electric", "solar"):
+            seconds, size, pages = _case_bills(name, n)
+        elif name == "table":
+            seconds, size, pages = _case_table(n)
+        elif name.startswith("cold_"):
+            seconds, size, pages = _case_cold(name, n)
+        else:
+            seconds, size, pages = _case_excel(n, write_only=name == "excel_stream")
+    finally:
+        os.chdir(ROOT)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    unit = CASES[name][0]
+    return {
+        "case": name,
+        "size": n,
+        "unit": unit,
+        "seconds": seconds,
+        f"{unit}_per_s": n / seconds,
+        "pages": pages,
+        "pages_per_s": pages / seconds if pages else None,
+        "bytes": size,
+        # กรณี cold_ วัด RSS ของ process cli.py
+        "peak_rss_mb": max(_peak_rss_mb(), resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024),
+        "base_rss_mb": base_rss,
+    }
+
+
+# ====== Runner ======
+def _meta():
+    import fpdf
+    import openpyxl
+
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "fpdf2": fpdf.FPDF_VERSION,
+        "openpyxl": openpyxl.__version__,
+    }
+
+
+def _print_result(r):
+    unit = r["unit"]
+    pages = f"{r['pages_per_s']:9,.1f} pages/s" if r["pages_per_s"] else " " * 17
+    print(f"{r['case']:<13} {r['size']:>9,} {unit:<5} {r['seconds']:9.2f} s"
+          f"  {r[f'{unit}_per_s']:>10,.1f} {unit}/s  {pages}"
+          f"  peak RSS {r['peak_rss_mb']:7.1f} MB  {r['bytes'] / 1e6:8.2f} MB")
+
+
+def run(cases=None, sizes=None, quick=False):
+    """รันทุกกรณีที่เลือก คืน dict {"meta": ..., "results": [...]}"""
+    results = []
+    for name in cases or CASES:
+        _, full, small = CASES[name]
+        for n in sizes or (small if quick else full):
+            out = subprocess.run(
+                [sys.executable, "-m", "benchmarks.suite", "--case", name, str(n)],
+                cwd=ROOT, check=True, capture_output=True, text=True,
+            )
+            r = json.loads(out.stdout.splitlines()[-1])
+            results.append(r)
+            _print_result(r)
+    return {"meta": _meta(), "results": results}
+
+
+def compare(old, new, threshold=0.10):
+    """เทียบผลสองครั้ง คืน list ของกรณีที่ช้าลงเกิน threshold"""
+    before = {(r["case"], r["size"]): r for r in old["results"]}
+    regressions = []
+    print(f"\ncompare with {old['meta'].get('commit')} ({old['meta'].get('timestamp')})")
+    for r in new["results"]:
+        o = before.get((r["case"], r["size"]))
+        if o is None:
+            continue
+        ratio = r["seconds"] / o["seconds"]
+        rss = r["peak_rss_mb"] / o["peak_rss_mb"]
+        flag = "REGRESSION" if ratio > 1 + threshold else ""
+        if flag:
+            regressions.append(r)
+        print(f"{r['case']:<13} {r['size']:>9,}  time x{ratio:5.2f}  RSS x{rss:5.2f}  {flag}")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="PDF / Excel report benchmarks")
+    parser.add_argument("--only", nargs="+", choices=list(CASES), help="เลือกเฉพาะบางกรณี")
+    parser.add_argument("--sizes", nargs="+", type=int, help="ขนาดที่ใช้แทนค่าเริ่มต้นของแต่ละกรณี")
+    parser.add_argument("--quick", action="store_true", help="ใช้ขนาดเล็ก")
+    parser.add_argument("--out", help="ไฟล์ JSON ของผล (ค่าเริ่มต้น benchmarks/results/<เวลา>.json)")
+    parser.add_argument("--compare", help="ไฟล์ JSON ของผลครั้งก่อน")
+    parser.add_argument("--threshold", type=float, default=0.10, help="สัดส่วนที่ถือว่าช้าลง (0.10 = 10%%)")
+    parser.add_argument("--case", nargs=2, metavar=("NAME", "SIZE"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        print(json.dumps(_run_case(args.case[0], int(args.case[1]))))
+        sys.exit(0)
+
+    report = run(args.only, args.sizes, args.quick)
+    out = args.out
+    if out is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        out = os.path.join(RESULTS_DIR, time.strftime("%Y%m%d-%H%M%S") + ".json")
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nsaved {out}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            old = json.load(f)
+        sys.exit(1 if compare(old, report, args.threshold) else 0)
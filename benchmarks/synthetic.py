@@ -0,0 +1,131 @@
+"""
+ตัวสร้างข้อมูลสังเคราะห์สำหรับ benchmark (ผลลัพธ์เหมือนเดิมทุกครั้งเมื่อใช้ seed เดิม)
+
+- synthetic_bills: bill dict ของ createElectricityReport / createSolarReport
+- synthetic_rows: row dict ระดับ line ของ createExcelReport
+- table_rows: แถวข้อความของ PowerPDF.table
+- meter_intervals: หน่วยราย 15 นาทีของหลายมิเตอร์ (array) สำหรับ tou.TouUsage
+ทุกตัว (ยกเว้น meter_intervals) เป็น generator จึงสร้างข้อมูลขนาดใหญ่ได้โดยไม่เก็บทั้งหมดใน memory
+"""
+import random
+
+import numpy as np
+
+
+def _bill_month(i):
+    # บิลที่ i ได้เดือนไม่ซ้ำกัน (ไฟล์ output ไม่ทับกัน)
+    return f"{i % 12 + 1}/{2000 + i // 12}"
+
+
+def electric_bill(rnd, i):
+    peak = rnd.randint(300_000, 600_000)
+    offpeak = rnd.randint(300_000, 500_000)
+    holiday = rnd.randint(100_000, 300_000)
+    factories = [rnd.randint(100, 1500) for _ in range(4)]
+    direct, admin, indirect = (rnd.randint(100, 1500) for _ in range(3))
+    return {
+        "kind": "electric",
+        "bill_month": _bill_month(i),
+        "issued": f"2/{i % 12 + 1}/{2000 + i // 12}",
+        "max_peak_kw": rnd.randint(2000, 3500),
+        "max_peak_baht": round(rnd.uniform(150_000, 250_000), 2),
+        "energy_peak1_kw": peak,
+        "energy_peak1_baht": round(peak * 4.1, 2),
+        "energy_offpeak_kw": offpeak,
+        "energy_offpeak_baht": round(offpeak * 3.97, 2),
+        "energy_holiday1_kw": holiday,
+        "energy_holiday1_baht": 0.0,
+        "energy_peak2_kw": 0,
+        "energy_peak2_baht": 0.0,
+        "energy_holiday2_kw": 0,
+        "energy_holiday2_baht": 0.0,
+        "service_charge": 312.24,
+        "rate_ft": round(rnd.uniform(0.15, 0.25), 4),
+        "fac_1_kw": factories[0],
+        "fac_2_kw": factories[1],
+        "fac_3_kw": factories[2],
+        "mst_kw": factories[3],
+        "direct_kw": direct,
+        "admin_kw": admin,
+        "indirect_kw": indirect,
+        "direct_baht": round(direct * 30.0, 2),
+        "admin_baht": round(admin * 30.0, 2),
+        "indirect_baht": round(indirect * 30.0, 2),
+        "mst_baht": round(factories[3] * 30.0, 2),
+    }
+
+
+def solar_bill(rnd, i):
+    bill = {
+        "kind": "solar",
+        "bill_month": _bill_month(i),
+        "issued": f"2/{i % 12 + 1}/{2000 + i // 12}",
+        "power_demand": round(rnd.uniform(50_000, 70_000), 2),
+    }
+    for period, rate in (("peak", 4.1), ("offpeak", 2.58), ("holiday", 2.58)):
+        kw = round(rnd.uniform(50_000, 90_000), 2)
+        before = round(kw * rate, 2)
+        bill[f"power_{period}_kw"] = kw
+        bill[f"power_{period}_before_discount"] = before
+        bill[f"power_{period}_after_discount"] = round(before * 0.52, 2)
+    bill["ft_before_discount"] = round(rnd.uniform(40_000, 45_000), 2)
+    bill["ft_after_discount"] = round(bill["ft_before_discount"] * 0.52, 2)
+    for key in ("direct", "admin", "indirect"):
+        kw = round(rnd.uniform(30_000, 1_100_000), 2)
+        bill[f"{key}_kw"] = kw
+        bill[f"{key}_baht"] = round(kw * 3.63, 2)
+    return bill
+
+
+BILL_MAKERS = {"electric": electric_bill, "solar": solar_bill}
+
+
+def synthetic_bills(n, kind=None, seed=0):
+    """
+    - kind: "electric" / "solar" / None (สลับกันสองชนิด)
+    """
+    rnd = random.Random(seed)
+    kinds = [kind] if kind else list(BILL_MAKERS)
+    for i in range(n):
+        yield BILL_MAKERS[kinds[i % len(kinds)]](rnd, i)
+
+
+def synthetic_rows(n, seed=0):
+    """สร้าง row dict ของ line แบบ lazy (ไม่เก็บทั้งหมดใน memory)"""
+    rnd = random.Random(seed)
+    for i in range(n):
+        kwh_ut = rnd.randint(0, 99999)
+        amount = round(kwh_ut * 4.1, 2)
+        solar = round(amount * 0.2, 2)
+        yield {
+            "department": f"K{i % 9}PD{i % 4:02d}",
+            "section": f"K{i % 9}A{i % 40:03d}",
+            "line": f"K{i % 9}L{i:07d}",
+            "production_time": rnd.randint(1, 720),
+            "kw": round(rnd.random() * 50, 2),
+            "kwh": rnd.randint(0, 99999),
+            "kwh_ut": kwh_ut,
+            "amount": amount,
+            "amount_solar": solar,
+            "total_amount": round(amount - solar, 2),
+        }
+
+
+def table_rows(n, seed=0):
+    """แถวของ PowerPDF.table (GROUP PD, SECTION, LINE, KWH, AMOUNT)"""
+    for r in synthetic_rows(n, seed):
+        yield (r["department"], r["section"], r["line"], f"{r['kwh']:,}", f"{r['amount']:,.2f}")
+
+
+def meter_intervals(n_meters, days=31, interval=15, seed=0):
+    """
+    array (n_meters, จำนวนช่วง) หน่วยที่ใช้ต่อช่วง: โหลดฐาน + ช่วงกลางวันสูงกว่า + noise
+    มิเตอร์แรกเป็นมิเตอร์ PEA (ผลรวมของมิเตอร์อื่น + สูญเสีย 2%)
+    """
+    rng = np.random.default_rng(seed)
+    per_day = 24 * 60 // interval
+    hour = (np.arange(days * per_day) % per_day) * interval / 60
+    shape = 0.6 + 0.4 * ((hour >= 8) & (hour < 20))
+    base = rng.uniform(5, 60, (n_meters - 1, 1))
+    sub = base * shape * rng.uniform(0.8, 1.2, (n_meters - 1, days * per_day)) * interval / 60
+    return np.vstack([sub.sum(axis=0) * 1.02, sub])
@@ -0,0 +1,141 @@
+"""
+CLI สร้างรายงานจากไฟล์ข้อมูล (แทนข้อมูลตัวอย่างใน main.py)
+
+    python cli.py electricity bill.json                      # reports/electric/<ปี>/...
+    python cli.py solar solar.json --out solar.pdf --pdf-profile compact
+    python cli.py excel lines.csv --out report.xlsx --engine xmlstream
+    python cli.py listing lines.csv --bill-month 8/2025 --chunk-pages 200
+    python cli.py batch bills.json --workers 4               # ตัวเลือกเดียวกับ batch.py
+
+- บิล: ไฟล์ .json ของ bill dict (หรือ list ที่มีบิลเดียว หลายบิลใช้ batch)
+- excel / listing: ไฟล์ .csv / .xlsx (ดู sources.py) หรือ .json / .jsonl ของ row dict
+แต่ละคำสั่ง import เฉพาะ backend ที่ใช้ (excel ไม่โหลด fpdf, PDF ไม่โหลด openpyxl)
+ฟอนต์และโลโก้โหลดตอนสร้าง PDF หน้าแรก ไม่ใช่ตอน import
+"""
+import argparse
+import json
+import sys
+import time
+
+
+def _load_json(path):
+    with open(path, encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            return [json.loads(line) for line in f if line.strip()]
+        return json.load(f)
+
+
+def _load_bill(path):
+    bill = _load_json(path)
+    if isinstance(bill, list):
+        if len(bill) != 1:
+            raise ValueError(f"{path}: มี {len(bill)} บิล (ใช้ cli.py batch กับหลายบิล)")
+        bill = bill[0]
+    return bill
+
+
+# ====== คำสั่ง ======
+def _bill(args):
+    import main
+
+    plan = main.ELECTRIC_PLAN if args.command == "electricity" else main.SOLAR_PLAN
+    bill = _load_bill(args.bill)
+    if args.out:
+        # render ใน memory ก่อน ข้อมูลผิดจะไม่ทิ้งไฟล์ครึ่ง ๆ ไว้
+        raw, _ = main.createBillReport(plan, bill, out=bytes, profile=args.pdf_profile)
+        with open(args.out, "wb") as f:
+            f.write(raw)
+        return args.out, True
+    return main.createBillReport(plan, bill, force=args.force, profile=args.pdf_profile)
+
+
+def _load_lines(path):
+    if path.lower().endswith((".json", ".jsonl")):
+        return _load_json(path)
+    import sources
+
+    return sources.read_lines(path)
+
+
+def _excel(args):
+    import main
+
+    rows = _load_lines(args.lines)
+    levels = None
+    if args.all_summaries:
+        from aggregate import SUMMARY_LEVELS as levels
+    path = main.createExcelReport(rows, args.out, write_only=args.write_only, max_width=args.max_width,
+                                  summary_levels=levels, engine=args.engine)
+    return path, True
+
+
+def _listing(args):
+    import main
+
+    parts = main.createLineListingReport(_load_lines(args.lines), args.out, args.bill_month,
+                                         chunk_pages=args.chunk_pages or None, profile=args.pdf_profile)
+    if len(parts) == 1:
+        return parts[0], True
+    return f"{parts[0]} ... {parts[-1]} ({len(parts)} parts)", True
+
+
+def _parser():
+    parser = argparse.ArgumentParser(description="Electricity / solar bill and Excel reports")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    for name, what in (("electricity", "บิลค่าไฟฟ้า"), ("solar", "บิลค่าไฟโซล่า")):
+        p = commands.add_parser(name, help=f"PDF {what} จากไฟล์ .json")
+        p.add_argument("bill", help="ไฟล์ .json ของ bill dict")
+        p.add_argument("--out", help="ไฟล์ PDF (ค่าเริ่มต้น reports/<ชนิด>/<ปี>/ พร้อมแคช render)")
+        p.add_argument("--force", action="store_true",
+                       help="render ใหม่แม้ข้อมูลไม่เปลี่ยน (ใช้กับ --out ไม่ได้ --out render ใหม่ทุกครั้ง)")
+        p.add_argument("--pdf-profile", help="fast / balanced / compact (ค่าเริ่มต้น balanced)")
+        p.set_defaults(run=_bill)
+
+    p = commands.add_parser("excel", help="Excel ของข้อมูลระดับ line")
+    p.add_argument("lines", help="ไฟล์ .csv / .xlsx / .json / .jsonl ของข้อมูลระดับ line")
+    p.add_argument("--out", default="report.xlsx", help="ไฟล์ .xlsx")
+    p.add_argument("--engine", default="openpyxl", help="openpyxl / xmlstream (ดู excel_writer.ENGINES)")
+    p.add_argument("--write-only", action="store_true", help="openpyxl แบบ streaming (memory คงที่)")
+    p.add_argument("--max-width", type=int, default=None, help="ความกว้างคอลัมน์สูงสุด")
+    p.add_argument("--all-summaries", action="store_true",
+                   help="ชีท By Section / By Line ในโหมด streaming ด้วย (memory โตตามจำนวน line)")
+    p.set_defaults(run=_excel)
+
+    p = commands.add_parser("listing", help="PDF รายการค่าไฟทุก line (แบ่งไฟล์ย่อย memory คงที่)")
+    p.add_argument("lines", help="ไฟล์ .csv / .xlsx / .json / .jsonl ของข้อมูลระดับ line")
+    p.add_argument("--out", help="ไฟล์ PDF (ค่าเริ่มต้น reports/lines/line_listing[_<MM>_<ปี>].pdf)")
+    p.add_argument("--bill-month", help="MM/YYYY ที่แสดงบนหัวกระดาษ")
+    p.add_argument("--chunk-pages", type=int, default=200, help="จำนวนหน้าต่อไฟล์ย่อย (0 = ไฟล์เดียว)")
+    p.add_argument("--pdf-profile", help="fast / balanced / compact (ค่าเริ่มต้น balanced)")
+    p.set_defaults(run=_listing)
+
+    # ตัวเลือกของ batch ส่งต่อทั้งหมด (ดู run)
+    commands.add_parser("batch", help="หลายบิลพร้อมกัน (ตัวเลือกเดียวกับ batch.py)", add_help=False)
+    return parser
+
+
+def run(argv=None) -> int:
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if argv[:1] == ["batch"]:
+        import batch
+
+        return batch.run_cli(argv[1:])
+
+    parser = _parser()
+    args = parser.parse_args(argv)
+    if args.run is _bill and args.out and args.force:
+        parser.error("--out always renders the bill (no render cache), --force has no effect")
+    t0 = time.perf_counter()
+    try:
+        path, rendered = args.run(args)
+    except (KeyError, ValueError, OSError) as e:
+        print(f"FAIL  {e}", file=sys.stderr)
+        return 1
+    state = "" if rendered else " (unchanged)"
+    print(f"{path}{state}, {time.perf_counter() - t0:.2f} s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run())
@@ -0,0 +1,232 @@
+"""
+Export Excel แยกไฟล์ตาม department (หรือ key อื่น) เขียนหลายไฟล์พร้อมกันด้วย process pool
+
+    python excel_shards.py lines.csv --key department --workers 4
+    python excel_shards.py lines.xlsx --out-dir reports/excel/by_department
+
+1. อ่านแถวครั้งเดียว แยกลงไฟล์ชั่วคราวต่อ shard (pickle ทีละ chunk) พร้อมสรุปยอดต่อ shard
+   แถวที่ค้างใน buffer รวมทุก shard ไม่เกิน SPILL_BUFFER_ROWS (เกินแล้ว flush shard ที่ค้างมากสุดก่อน)
+   memory จึงราว SPILL_BUFFER_ROWS แถว + ข้อมูลเล็ก ๆ ต่อค่า key (path, ยอดรวม) ไม่ใช่จำนวนแถว
+2. แต่ละ worker อ่านไฟล์ชั่วคราวของตัวเองแล้วเขียน workbook ด้วย createExcelReport
+   shard ใหญ่เริ่มก่อน เวลารวมจึงใกล้ shard ที่ใหญ่ที่สุด / จำนวน core
+3. เขียน index.xlsx: ยอดรวมต่อ shard + ลิงก์ไปไฟล์ของ shard นั้น
+"""
+import argparse
+import os
+import pickle
+import re
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from openpyxl.styles import Font
+
+import instrument
+import main
+from aggregate import LineAggregator, SUMMARY_METRICS
+from excel_writer import ColumnWidths, ENGINES, OpenpyxlBackend
+
+# จำนวนแถวต่อ chunk ที่ pickle ลงไฟล์ชั่วคราว
+SPILL_CHUNK = 4096
+# แถวที่ค้างใน buffer ได้รวมทุก shard (key ที่มีค่าไม่ซ้ำมาก เช่น line จะ flush ก้อนเล็กลง)
+SPILL_BUFFER_ROWS = 65536
+
+INDEX_NAME = "index.xlsx"
+
+
+def shard_filename(prefix, value, used):
+    """ชื่อไฟล์ของ shard (ตัดอักขระที่ใช้เป็นชื่อไฟล์ไม่ได้ และไม่ให้ซ้ำกับ used)"""
+    safe = re.sub(r"[^0-9A-Za-z_.-]+", "_", str(value)).strip("._") or "_blank"
+    name = f"{prefix}_{safe}.xlsx"
+    n = 2
+    while name.lower() in used:
+        name = f"{prefix}_{safe}_{n}.xlsx"
+        n += 1
+    used.add(name.lower())
+    return name
+
+
+# ====== แยกแถวลงไฟล์ชั่วคราว ======
+class _Spill:
+    def __init__(self, path):
+        self.path = path
+        self.rows = 0
+        self._buffer = []
+
+    @property
+    def buffered(self):
+        return len(self._buffer)
+
+    def append(self, row):
+        """คืนจำนวนแถวที่ flush ลงไฟล์ (0 = ยังค้างใน buffer)"""
+        self._buffer.append(row)
+        if len(self._buffer) >= SPILL_CHUNK:
+            return self.flush()
+        return 0
+
+    def flush(self):
+        n = len(self._buffer)
+        if n:
+            with open(self.path, "ab") as f:
+                pickle.dump(self._buffer, f, pickle.HIGHEST_PROTOCOL)
+            self.rows += n
+            self._buffer = []
+        return n
+
+
+def _flush_largest(spills, keep):
+    """flush shard ที่ค้างมากสุดก่อนจนแถวใน buffer รวมเหลือไม่เกิน keep คืนจำนวนที่ยังค้าง"""
+    buffered = sum(s.buffered for s in spills)
+    for spill in sorted(spills, key=lambda s: s.buffered, reverse=True):
+        if buffered <= keep:
+            break
+        buffered -= spill.flush()
+    return buffered
+
+
+def _read_spill(path):
+    with open(path, "rb") as f:
+        while True:
+            try:
+                chunk = pickle.load(f)
+            except EOFError:
+                return
+            yield from chunk
+
+
+def _write_shard(spill_path, dest, write_only, engine):
+    # รันใน worker process
+    t0 = time.perf_counter()
+    main.createExcelReport(_read_spill(spill_path), dest, write_only=write_only, engine=engine)
+    return time.perf_counter() - t0
+
+
+# ====== Index ======
+def write_index(path, key, shards, totals):
+    """
+    index workbook: แถวละ shard (ค่า key, จำนวนแถว, ยอดรวม, ลิงก์ไปไฟล์)
+    - shards: list ของ dict จาก export_sharded
+    - totals: {ค่า key: [ผลรวมตาม SUMMARY_METRICS]}
+    """
+    # header / แถวข้อมูลใช้ style เดียวกับรายงานหลัก (OpenpyxlBackend) แล้วเพิ่มลิงก์ / แถว TOTAL
+    backend = OpenpyxlBackend()
+    sheet = backend.add_sheet("Index")
+    ws = sheet.ws
+    link_font = Font(color="0563C1", underline="single")
+
+    labels = main.summary_cols((key,), SUMMARY_METRICS)
+    header = [labels[0][0], "ROWS"] + [c[0] for c in labels[1:]] + ["FILE"]
+    sheet.header(header)
+    widths = ColumnWidths(len(header))
+    widths.observe_header(header)
+
+    grand = [0] * len(SUMMARY_METRICS)
+    rows = 0
+    for shard in sorted(shards, key=lambda s: str(s["key"])):
+        sums = totals[shard["key"]]
+        values = [shard["key"], shard["rows"]] + sums + [shard["file"]]
+        widths.observe(values)
+        sheet.row(values)
+        # ลิงก์แบบ relative: ย้ายทั้งโฟลเดอร์ไปที่อื่นได้
+        link = ws.cell(row=sheet.rows, column=len(values))
+        link.hyperlink = shard["file"]
+        link.font = link_font
+        grand = [a + b for a, b in zip(grand, sums)]
+        rows += shard["rows"]
+
+    sheet.row(["TOTAL", rows] + grand + [""])
+    for cell in ws[sheet.rows]:
+        cell.font = backend.header_font
+    sheet.set_widths(widths.widths())
+    ws.freeze_panes = "A2"
+    backend.save(path)
+    return path
+
+
+# ====== Export ======
+@instrument.timed("excel_shards")
+def export_sharded(data, out_dir=None, key="department", workers=None, write_only=True, prefix=None,
+                   engine="openpyxl"):
+    """
+    เขียน Excel หนึ่งไฟล์ต่อค่าของ key (เช่นแยกตาม department) พร้อมกันหลาย process
+    - data: iterable ของ row dict (อ่านรอบเดียว ใช้ sources.read_lines ได้)
+    - out_dir: โฟลเดอร์ผลลัพธ์ (None = reports/excel/by_<key>)
+    - key: key ที่ใช้แบ่งไฟล์
+    - workers: จำนวน process (None = จำนวน CPU)
+    - write_only: เขียนแต่ละไฟล์แบบ streaming (ดู createExcelReport)
+    - prefix: คำนำหน้าชื่อไฟล์ (None = ชื่อ key)
+    - engine: ตัวเขียน workbook ของแต่ละไฟล์ (ดู excel_writer.ENGINES)
+    คืน {"index": path ของ index.xlsx, "shards": [{"key", "file", "path", "rows", "seconds"}, ...]}
+    """
+    out_dir = out_dir or os.path.join("reports", "excel", f"by_{key}")
+    prefix = prefix or key
+    os.makedirs(out_dir, exist_ok=True)
+    tmp = tempfile.mkdtemp(prefix="shards-", dir=out_dir)
+    try:
+        # ----- 1. แยกแถวตาม key + ยอดรวมต่อ shard -----
+        spills = {}
+        buffered = 0
+        agg = LineAggregator({"shards": (key,)})
+        with instrument.span("partition"):
+            for row in data:
+                value = row.get(key, "")
+                spill = spills.get(value)
+                if spill is None:
+                    spill = spills[value] = _Spill(os.path.join(tmp, f"{len(spills)}.pkl"))
+                buffered += 1 - spill.append(row)
+                if buffered > SPILL_BUFFER_ROWS:
+                    buffered = _flush_largest(spills.values(), SPILL_BUFFER_ROWS // 2)
+                agg.append(row)
+            for spill in spills.values():
+                spill.flush()
+        keys, sums = agg.totals("shards")
+        totals = {k[0]: s for k, s in zip(keys, sums.tolist())}
+
+        # ----- 2. เขียนแต่ละ shard พร้อมกัน (ใหญ่ก่อน) -----
+        used = {INDEX_NAME}
+        shards = []
+        for value, spill in spills.items():
+            name = shard_filename(prefix, value, used)
+            shards.append({
+                "key": value, "file": name, "path": os.path.join(out_dir, name),
+                "rows": spill.rows, "seconds": None, "_spill": spill.path,
+            })
+        with instrument.span("write"):
+            order = sorted(shards, key=lambda s: s["rows"], reverse=True)
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = [(s, pool.submit(_write_shard, s["_spill"], s["path"], write_only, engine)) for s in order]
+                for shard, fut in futures:
+                    shard["seconds"] = fut.result()
+        for shard in shards:
+            del shard["_spill"]
+
+        # ----- 3. index -----
+        with instrument.span("index"):
+            index = write_index(os.path.join(out_dir, INDEX_NAME), key, shards, totals)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    instrument.count("excel_rows", agg.rows)
+    instrument.count("shards", len(shards))
+    return {"index": index, "shards": shards}
+
+
+if __name__ == "__main__":
+    import sources
+
+    parser = argparse.ArgumentParser(description="Sharded parallel Excel export")
+    parser.add_argument("source", help="ไฟล์ .csv / .xlsx ของข้อมูลระดับ line")
+    parser.add_argument("--key", default="department", help="key ที่ใช้แบ่งไฟล์")
+    parser.add_argument("--out-dir", help="โฟลเดอร์ผลลัพธ์ (ค่าเริ่มต้น reports/excel/by_<key>)")
+    parser.add_argument("--workers", type=int, default=None, help="จำนวน process (ค่าเริ่มต้น = จำนวน CPU)")
+    parser.add_argument("--in-memory", action="store_true", help="เขียนแต่ละไฟล์แบบปกติ (ไม่ใช่ write_only)")
+    parser.add_argument("--engine", default="openpyxl", choices=sorted(ENGINES), help="ตัวเขียน workbook")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    result = export_sharded(sources.read_lines(args.source), args.out_dir, args.key, args.workers,
+                            write_only=not args.in_memory, engine=args.engine)
+    for s in sorted(result["shards"], key=lambda s: s["file"]):
+        print(f"{s['file']:<40} {s['rows']:>10,} rows {s['seconds']:8.2f} s")
+    print(f"{len(result['shards'])} shards + {result['index']}, {time.perf_counter() - t0:.2f} s wall")
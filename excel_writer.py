@@ -0,0 +1,385 @@
+"""
+ตัวช่วยเขียน Excel ที่ใช้ร่วมกันระหว่างโหมดปกติและโหมด write-only
+และ backend สำหรับเขียน workbook (openpyxl / SpreadsheetML streamer)
+"""
+import re
+import shutil
+import tempfile
+import zipfile
+from copy import copy
+from math import isfinite
+from numbers import Integral, Real
+
+# openpyxl import ใน OpenpyxlBackend เท่านั้น (engine "xmlstream" ไม่ต้องโหลด openpyxl)
+
+# อักขระควบคุมที่ใช้ใน worksheet ไม่ได้ (เหมือน openpyxl.cell.cell.ILLEGAL_CHARACTERS_RE)
+ILLEGAL_CHARACTERS_RE = re.compile(r"[\000-\010]|[\013-\014]|[\016-\037]")
+
+
+def escape(text, quote=False) -> str:
+    """escape ข้อความใน XML (xml.sax.saxutils ดึง urllib มาด้วย import ช้า)"""
+    text = text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+    return text.replace('"', "&quot;") if quote else text
+
+
+def get_column_letter(n) -> str:
+    """1 -> "A", 27 -> "AA" (แบบเดียวกับ openpyxl.utils.get_column_letter)"""
+    letters = ""
+    while n > 0:
+        n, r = divmod(n - 1, 26)
+        letters = chr(65 + r) + letters
+    return letters
+
+
+class ColumnWidths:
+    """
+    เก็บความยาวข้อความสูงสุดของแต่ละคอลัมน์ไปพร้อมกับการเขียนแถว
+    จึงไม่ต้องวน ws.columns ซ้ำหลังเขียนเสร็จ (และใช้กับ write-only ได้)
+    - max_rows: วัดเฉพาะ N แถวแรก (None = ทุกแถว) สำหรับ export ขนาดใหญ่
+    - cap: ความกว้างสูงสุดของคอลัมน์ (None = ไม่จำกัด)
+    - padding: ช่องว่างที่บวกเพิ่มจากความยาวข้อความ
+    """
+
+    def __init__(self, ncols, max_rows=None, cap=None, padding=2):
+        self.lengths = [0] * ncols
+        self.max_rows = max_rows
+        self.cap = cap
+        self.padding = padding
+        self.rows = 0
+
+    @property
+    def done(self):
+        return self.max_rows is not None and self.rows >= self.max_rows
+
+    def observe(self, values):
+        """วัดแถวหนึ่ง (header ไม่นับเป็นแถวตัวอย่าง ให้ใช้ observe_header)"""
+        if self.done:
+            return
+        self.rows += 1
+        self.observe_header(values)
+
+    def observe_header(self, values):
+        lengths = self.lengths
+        for i, v in enumerate(values):
+            if v is not None:
+                n = len(str(v))
+                if n > lengths[i]:
+                    lengths[i] = n
+
+    def widths(self):
+        widths = [n + self.padding for n in self.lengths]
+        if self.cap is not None:
+            widths = [min(w, self.cap) for w in widths]
+        return widths
+
+    def apply(self, ws):
+        for i, w in enumerate(self.widths(), 1):
+            ws.column_dimensions[get_column_letter(i)].width = w
+
+
+# ====== Backend ======
+# createExcelReport เขียนผ่าน interface เล็ก ๆ นี้ เปลี่ยน engine ได้โดยไม่แตะ logic ของรายงาน
+#   backend.add_sheet(title) -> sheet
+#   sheet.header(values)      แถวหัวตาราง (พื้นฟ้า ตัวหนา จัดกลาง มีเส้นขอบ)
+#   sheet.row(values)         แถวข้อมูล (มีเส้นขอบ)
+#   sheet.set_widths(widths)  ความกว้างคอลัมน์ (list เรียงตามคอลัมน์)
+#   backend.save(path / file-like)
+# widths_first = True: ต้องเรียก set_widths ก่อน header / row แรก
+HEADER_FILL = "B7DEE8"
+HEADER_FONT_COLOR = "000000"
+
+
+class OpenpyxlBackend:
+    """
+    openpyxl (object ต่อ cell)
+    - write_only=False: สร้าง workbook ทั้งไฟล์ใน memory
+    - write_only=True: โหมด write-only ของ openpyxl แถวถูกเขียนลงไฟล์ชั่วคราวทันที
+      แต่ต้องกำหนดความกว้างคอลัมน์ก่อนเขียนแถวแรก
+    """
+
+    def __init__(self, write_only=False):
+        import openpyxl
+        from openpyxl.styles import PatternFill, Font, Border, Side, Alignment
+
+        self.write_only = write_only
+        self.widths_first = write_only
+        self.wb = openpyxl.Workbook(write_only=write_only)
+        self._first = not write_only  # โหมดปกติใช้ชีทเริ่มต้นเป็นชีทแรก
+
+        thin = Side(style="thin")
+        self.header_fill = PatternFill(start_color=HEADER_FILL, end_color=HEADER_FILL, fill_type="solid")
+        self.header_font = Font(bold=True, color=HEADER_FONT_COLOR)
+        self.header_align = Alignment(horizontal="center", vertical="center")
+        self.thin_border = Border(left=thin, right=thin, top=thin, bottom=thin)
+
+    def add_sheet(self, title):
+        if self._first:
+            ws = self.wb.active
+            ws.title = title
+            self._first = False
+        else:
+            ws = self.wb.create_sheet(title)
+        if self.write_only:
+            return _WriteOnlySheet(self, ws)
+        return _OpenpyxlSheet(self, ws)
+
+    def save(self, filename):
+        self.wb.save(filename)
+
+
+class _OpenpyxlSheet:
+    def __init__(self, backend, ws):
+        from openpyxl.cell import Cell
+
+        self.backend = backend
+        self.ws = ws
+        self.rows = 0
+        # set cell.border ทุก cell ต้อง hash Border ใหม่ทุกครั้ง จึง copy style ที่คำนวณไว้แทน
+        body = Cell(ws)
+        body.border = backend.thin_border
+        self._body_style = body._style
+
+    def header(self, values):
+        b = self.backend
+        self.rows += 1
+        for col_num, v in enumerate(values, 1):
+            cell = self.ws.cell(row=self.rows, column=col_num, value=v)
+            cell.fill = b.header_fill
+            cell.font = b.header_font
+            cell.alignment = b.header_align
+            cell.border = b.thin_border
+
+    def row(self, values):
+        ws = self.ws
+        self.rows += 1
+        row_num = self.rows
+        style = self._body_style
+        for col_num, v in enumerate(values, 1):
+            ws.cell(row=row_num, column=col_num, value=v)._style = copy(style)
+
+    def set_widths(self, widths):
+        for i, w in enumerate(widths, 1):
+            self.ws.column_dimensions[get_column_letter(i)].width = w
+
+
+class _WriteOnlySheet:
+    def __init__(self, backend, ws):
+        from openpyxl.cell import WriteOnlyCell
+
+        self.backend = backend
+        self.ws = ws
+        self._body = None
+        self._cell = WriteOnlyCell
+
+    def header(self, values):
+        b = self.backend
+        cells = []
+        for v in values:
+            cell = self._cell(self.ws, value=v)
+            cell.fill = b.header_fill
+            cell.font = b.header_font
+            cell.alignment = b.header_align
+            cell.border = b.thin_border
+            cells.append(cell)
+        self.ws.append(cells)
+
+    def row(self, values):
+        # cell ต้นแบบชุดเดียว (style สร้างครั้งเดียว) เปลี่ยนแค่ค่าแล้ว append ซ้ำ
+        body = self._body
+        if body is None or len(body) != len(values):
+            body = self._body = []
+            for _ in values:
+                cell = self._cell(self.ws)
+                cell.border = self.backend.thin_border
+                body.append(cell)
+        for cell, v in zip(body, values):
+            cell.value = v
+        self.ws.append(body)
+
+    def set_widths(self, widths):
+        for i, w in enumerate(widths, 1):
+            self.ws.column_dimensions[get_column_letter(i)].width = w
+
+
+# ====== SpreadsheetML streamer ======
+_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+_NS_R = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+_NS_PKG = "http://schemas.openxmlformats.org/package/2006/relationships"
+_CT = "application/vnd.openxmlformats-officedocument.spreadsheetml"
+
+# style index ใน cellXfs ของ _STYLES
+_S_HEADER = 1
+_S_BODY = 2
+
+# เหมือน styles.xml ที่ openpyxl เขียนจาก style ของ OpenpyxlBackend
+_STYLES = (
+    f'<styleSheet xmlns="{_NS}">'
+    '<fonts count="2">'
+    '<font><name val="Calibri"/><family val="2"/><color theme="1"/><sz val="11"/><scheme val="minor"/></font>'
+    f'<font><b val="1"/><color rgb="00{HEADER_FONT_COLOR}"/></font>'
+    '</fonts>'
+    '<fills count="3"><fill><patternFill/></fill><fill><patternFill patternType="gray125"/></fill>'
+    f'<fill><patternFill patternType="solid"><fgColor rgb="00{HEADER_FILL}"/><bgColor rgb="00{HEADER_FILL}"/>'
+    '</patternFill></fill></fills>'
+    '<borders count="2"><border><left/><right/><top/><bottom/><diagonal/></border>'
+    '<border><left style="thin"/><right style="thin"/><top style="thin"/><bottom style="thin"/><diagonal/></border>'
+    '</borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="3">'
+    '<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="0" fontId="1" fillId="2" borderId="1" applyFont="1" applyFill="1" applyBorder="1"'
+    ' applyAlignment="1" xfId="0"><alignment horizontal="center" vertical="center"/></xf>'
+    '<xf numFmtId="0" fontId="0" fillId="0" borderId="1" applyBorder="1" xfId="0"/>'
+    '</cellXfs>'
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    '</styleSheet>'
+)
+
+
+class XmlStreamBackend:
+    """
+    เขียน .xlsx (SpreadsheetML) เองโดยไม่สร้าง object ต่อ cell
+    - แต่ละแถวถูกแปลงเป็น XML แล้วเขียนลงไฟล์ชั่วคราวของชีททันที ตัว backend ไม่เก็บแถวไว้
+      (memory ของรายงานยังขึ้นกับชีทสรุป: department คงที่ / section, line โตตามจำนวน line)
+    - ข้อความเป็น inline string (ไม่มีตาราง shared strings ที่โตตามข้อมูล)
+    - ประกอบไฟล์ zip ตอน save ความกว้างคอลัมน์จึงกำหนดหลังเขียนแถวได้ (วัดจากทุกแถวได้)
+    - ค่าที่รองรับ: str / int / float / bool / None ค่าอื่นเขียนเป็นข้อความ
+    """
+    widths_first = False
+
+    def __init__(self, tmp_dir=None):
+        self.tmp_dir = tmp_dir
+        self.sheets = []
+
+    def add_sheet(self, title):
+        sheet = _XmlSheet(title, tempfile.TemporaryFile(dir=self.tmp_dir))
+        self.sheets.append(sheet)
+        return sheet
+
+    def save(self, filename):
+        try:
+            with zipfile.ZipFile(filename, "w", zipfile.ZIP_DEFLATED) as zf:
+                self._write_package(zf)
+        finally:
+            for sheet in self.sheets:
+                sheet.close()
+
+    def _write_package(self, zf):
+        n = len(self.sheets)
+        zf.writestr("[Content_Types].xml", (
+            '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            f'<Override PartName="/xl/workbook.xml" ContentType="{_CT}.sheet.main+xml"/>'
+            f'<Override PartName="/xl/styles.xml" ContentType="{_CT}.styles+xml"/>'
+            + "".join(f'<Override PartName="/xl/worksheets/sheet{i}.xml" ContentType="{_CT}.worksheet+xml"/>'
+                      for i in range(1, n + 1))
+            + '</Types>'
+        ))
+        zf.writestr("_rels/.rels", (
+            f'<Relationships xmlns="{_NS_PKG}">'
+            f'<Relationship Id="rId1" Type="{_NS_R}/officeDocument" Target="xl/workbook.xml"/>'
+            '</Relationships>'
+        ))
+        zf.writestr("xl/workbook.xml", (
+            f'<workbook xmlns="{_NS}" xmlns:r="{_NS_R}"><sheets>'
+            + "".join(f'<sheet name="{escape(s.title, quote=True)}" sheetId="{i}" r:id="rId{i}"/>'
+                      for i, s in enumerate(self.sheets, 1))
+            + '</sheets></workbook>'
+        ))
+        zf.writestr("xl/_rels/workbook.xml.rels", (
+            f'<Relationships xmlns="{_NS_PKG}">'
+            + "".join(f'<Relationship Id="rId{i}" Type="{_NS_R}/worksheet" Target="worksheets/sheet{i}.xml"/>'
+                      for i in range(1, n + 1))
+            + f'<Relationship Id="rId{n + 1}" Type="{_NS_R}/styles" Target="styles.xml"/>'
+            '</Relationships>'
+        ))
+        zf.writestr("xl/styles.xml", _STYLES)
+        for i, sheet in enumerate(self.sheets, 1):
+            with zf.open(f"xl/worksheets/sheet{i}.xml", "w", force_zip64=True) as f:
+                sheet.write_xml(f)
+
+
+class _XmlSheet:
+    def __init__(self, title, buffer):
+        self.title = title
+        self.widths = None
+        self.rows = 0
+        self._buffer = buffer
+        self._letters = []
+
+    def _cells(self, values, style):
+        letters = self._letters
+        while len(letters) < len(values):
+            letters.append(get_column_letter(len(letters) + 1))
+        r = self.rows
+        parts = [f'<row r="{r}">']
+        for col, v in zip(letters, values):
+            if v is None or v == "":
+                parts.append(f'<c r="{col}{r}" s="{style}"/>')
+            elif isinstance(v, bool):
+                parts.append(f'<c r="{col}{r}" s="{style}" t="b"><v>{int(v)}</v></c>')
+            elif isinstance(v, Integral):
+                parts.append(f'<c r="{col}{r}" s="{style}"><v>{int(v)}</v></c>')
+            elif isinstance(v, Real):
+                # ตัวเลขแบบเดียวกับ openpyxl (%.16g, nan / inf = cell ว่าง)
+                v = float(v)
+                if isfinite(v):
+                    parts.append(f'<c r="{col}{r}" s="{style}"><v>{v:.16g}</v></c>')
+                else:
+                    parts.append(f'<c r="{col}{r}" s="{style}"/>')
+            else:
+                v = str(v)
+                if ILLEGAL_CHARACTERS_RE.search(v):
+                    from openpyxl.utils.exceptions import IllegalCharacterError
+                    raise IllegalCharacterError(f"{v!r} cannot be used in worksheets.")
+                parts.append(f'<c r="{col}{r}" s="{style}" t="inlineStr"><is><t xml:space="preserve">'
+                             f'{escape(v)}</t></is></c>')
+        parts.append("</row>")
+        return "".join(parts)
+
+    def header(self, values):
+        self.rows += 1
+        self._buffer.write(self._cells(values, _S_HEADER).encode("utf-8"))
+
+    def row(self, values):
+        self.rows += 1
+        self._buffer.write(self._cells(values, _S_BODY).encode("utf-8"))
+
+    def set_widths(self, widths):
+        self.widths = list(widths)
+
+    def write_xml(self, f):
+        head = [f'<worksheet xmlns="{_NS}">']
+        if self.widths:
+            head.append("<cols>")
+            head.extend(f'<col min="{i}" max="{i}" width="{w}" customWidth="1"/>'
+                        for i, w in enumerate(self.widths, 1))
+            head.append("</cols>")
+        head.append("<sheetData>")
+        f.write("".join(head).encode("utf-8"))
+        self._buffer.seek(0)
+        shutil.copyfileobj(self._buffer, f)
+        f.write(b"</sheetData></worksheet>")
+
+    def close(self):
+        self._buffer.close()
+
+
+ENGINES = {
+    "openpyxl": OpenpyxlBackend,
+    "xmlstream": XmlStreamBackend,
+}
+
+
+def make_backend(engine="openpyxl", write_only=False):
+    """
+    backend ตามชื่อ engine (ดู ENGINES)
+    - "openpyxl": write_only เลือกโหมดปกติ / write-only
+    - "xmlstream": ไม่เก็บแถวใน memory ไม่สนใจ write_only
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"ไม่รู้จัก Excel engine {engine!r} (ใช้ {' / '.join(ENGINES)})")
+    if engine == "openpyxl":
+        return OpenpyxlBackend(write_only)
+    return ENGINES[engine]()
@@ -0,0 +1,357 @@
+"""
+เก็บประวัติบิลและข้อมูลระดับ line ลง SQLite (ไฟล์เดียวในเครื่อง) สำหรับรายงานแนวโน้มรายเดือน / เทียบปีก่อน
+
+    store = history.HistoryStore()                               # reports/history.sqlite3
+    store.ingest_lines("8/2025", sources.read_lines("lines.csv"))
+    store.ingest_bill(main.ELECTRIC_PLAN, bill)
+    periods, rows = store.trend("department", "total_amount")   # อ่านจาก aggregate รายเดือน
+
+    python history.py ingest-lines 8/2025 lines.csv
+    python history.py ingest-bills bills.json
+    python history.py trend --level section --out trend.xlsx
+
+- line ทุกแถวเก็บในตาราง lines (index ตาม period / department / section / line)
+- ผลรวมรายเดือนของแต่ละระดับ (monthly_department / monthly_section / monthly_line)
+  คำนวณด้วย LineAggregator ระหว่าง insert แล้ว upsert เฉพาะเดือนที่ ingest
+  เดือนเก่าไม่ถูกอ่านซ้ำ และรายงานแนวโน้มอ่านจาก aggregate โดยไม่ scan line ย้อนหลัง
+- ingest เดือนเดิมซ้ำ = แทนที่ทั้งเดือน (replace=False = เพิ่มแถวเข้าเดือนนั้น)
+"""
+import argparse
+import json
+import numbers
+import os
+import sqlite3
+import time
+from datetime import date
+from itertools import islice
+
+from aggregate import LineAggregator, SUMMARY_LEVELS, SUMMARY_METRICS
+
+DEFAULT_PATH = os.path.join("reports", "history.sqlite3")
+
+# คอลัมน์ของตาราง lines (ตาม main.cols_all)
+LINE_KEYS = ("department", "section", "line")
+LINE_VALUES = ("production_time", "kw", "kwh", "kwh_ut", "amount", "amount_solar", "total_amount")
+
+# ระดับของ aggregate: "department" / "section" / "line" -> key ที่ใช้ group (ตาม SUMMARY_LEVELS)
+LEVELS = {keys[-1]: keys for keys in SUMMARY_LEVELS.values()}
+
+# ยอดรวมของบิลที่เก็บเป็นคอลัมน์ (หน่วย, บาท) ตามชนิดบิล (ค่า derive ของ RenderPlan)
+BILL_TOTALS = {
+    "electric": ("energy_total_kw", "energy_total_baht"),
+    "solar": ("power_total", "total_power_after_discount"),
+}
+
+INSERT_CHUNK = 8192
+
+
+def period_key(value) -> str:
+    """ "8/2025" / "2025-08" / date -> "2025-08" (เรียงตามเวลาได้ด้วยการเรียงข้อความ)"""
+    if isinstance(value, date):
+        return f"{value.year:04d}-{value.month:02d}"
+    text = str(value).strip()
+    try:
+        if "/" in text:
+            parts = text.split("/")
+            month, year = int(parts[-2]), int(parts[-1])
+        else:
+            year, month = (int(p) for p in text.split("-")[:2])
+    except ValueError:
+        raise ValueError(f"period ไม่ถูกต้อง {value!r} (ใช้ M/YYYY หรือ YYYY-MM)") from None
+    if not 1 <= month <= 12:
+        raise ValueError(f"period ไม่ถูกต้อง {value!r} (เดือน {month})")
+    return f"{year:04d}-{month:02d}"
+
+
+def previous_year(period) -> str:
+    """เดือนเดียวกันของปีก่อน: 2025-08 -> 2024-08"""
+    year, month = period.split("-")
+    return f"{int(year) - 1:04d}-{month}"
+
+
+def _key_text(value) -> str:
+    """ค่า key ที่เก็บในตาราง lines และ monthly_* (None -> "" ทั้งสองที่ ให้ join / เทียบกันได้)"""
+    return "" if value is None else str(value)
+
+
+def _level_keys(level):
+    if level not in LEVELS:
+        raise ValueError(f"ไม่รู้จักระดับ {level!r} (ใช้ได้: {', '.join(LEVELS)})")
+    return LEVELS[level]
+
+
+def _table(level):
+    _level_keys(level)
+    return f"monthly_{level}"
+
+
+def _schema():
+    metrics = ", ".join(f"{m} REAL NOT NULL DEFAULT 0" for m in SUMMARY_METRICS)
+    sql = [
+        """CREATE TABLE IF NOT EXISTS bills (
+            kind TEXT NOT NULL, period TEXT NOT NULL, data TEXT NOT NULL,
+            units REAL, baht REAL, ingested_at TEXT NOT NULL,
+            PRIMARY KEY (kind, period))""",
+        f"""CREATE TABLE IF NOT EXISTS lines (
+            period TEXT NOT NULL, {", ".join(f"{k} TEXT" for k in LINE_KEYS)},
+            {", ".join(f"{v} REAL" for v in LINE_VALUES)})""",
+        "CREATE INDEX IF NOT EXISTS lines_period ON lines (period)",
+        "CREATE INDEX IF NOT EXISTS lines_department ON lines (department, period)",
+        "CREATE INDEX IF NOT EXISTS lines_section ON lines (department, section, period)",
+        "CREATE INDEX IF NOT EXISTS lines_line ON lines (line, period)",
+        """CREATE TABLE IF NOT EXISTS months (
+            period TEXT PRIMARY KEY, rows INTEGER NOT NULL, ingested_at TEXT NOT NULL)""",
+    ]
+    for level, keys in LEVELS.items():
+        table = _table(level)
+        sql.append(f"""CREATE TABLE IF NOT EXISTS {table} (
+            {", ".join(f"{k} TEXT NOT NULL" for k in keys)}, period TEXT NOT NULL, {metrics},
+            PRIMARY KEY ({", ".join(keys)}, period))""")
+        sql.append(f"CREATE INDEX IF NOT EXISTS {table}_period ON {table} (period)")
+    return sql
+
+
+def _plain(v):
+    """numpy scalar (np.float32 / np.int64 จาก tou / allocation) -> int / float ของ Python สำหรับ JSON และ SQLite"""
+    if isinstance(v, numbers.Number) and hasattr(v, "item"):
+        return v.item()
+    if v is None or isinstance(v, (int, float)):
+        return v
+    raise TypeError(f"Object of type {type(v).__name__} is not JSON serializable")
+
+
+class HistoryStore:
+    """
+    - path: ไฟล์ SQLite (สร้างให้ถ้ายังไม่มี) ":memory:" = ไม่บันทึกลงไฟล์
+    ใช้กับ with ได้ (ปิด connection เมื่อจบ)
+    """
+
+    def __init__(self, path=DEFAULT_PATH):
+        if path != ":memory:" and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        with self.db:
+            for sql in _schema():
+                self.db.execute(sql)
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ====== ingest ======
+    def ingest_lines(self, period, rows, replace=True, levels=None) -> int:
+        """
+        เก็บ line ของเดือน period แล้วปรับ aggregate รายเดือนของเดือนนั้น (transaction เดียว)
+        - rows: iterable ของ row dict (อ่านรอบเดียว ใช้ sources.read_lines ได้)
+        - replace: True = ลบข้อมูลเดิมของเดือนก่อน, False = เพิ่มเข้าเดือนเดิม (aggregate บวกเพิ่ม)
+        - levels: ระดับ aggregate ที่ต้องปรับ (None = ทุกระดับใน LEVELS)
+          replace=True ต้องสร้างใหม่ทุกระดับ (ลบ line ทั้งเดือนแล้ว) ส่งแค่บางระดับ -> ValueError
+          replace=False ระดับที่ไม่ได้ระบุจะไม่นับแถวที่เพิ่มครั้งนี้
+        คืนจำนวนแถวที่เพิ่ม
+        """
+        period = period_key(period)
+        levels = list(LEVELS) if levels is None else list(levels)
+        if replace and set(levels) != set(LEVELS):
+            raise ValueError(
+                f"replace=True สร้าง aggregate ใหม่ทุกระดับ ({', '.join(LEVELS)}) ใช้ levels บางระดับได้เฉพาะ replace=False"
+            )
+        agg = LineAggregator({lv: _level_keys(lv) for lv in levels})
+        columns = ("period",) + LINE_KEYS + LINE_VALUES
+        insert = f"INSERT INTO lines ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+
+        rows = iter(rows)
+        with self.db:
+            if replace:
+                self._delete_period(period)
+            while True:
+                chunk = list(islice(rows, INSERT_CHUNK))
+                if not chunk:
+                    break
+                agg.extend(chunk)
+                self.db.executemany(insert, [
+                    (period,) + tuple(_key_text(r.get(k)) for k in LINE_KEYS)
+                    + tuple(r.get(v) for v in LINE_VALUES)
+                    for r in chunk
+                ])
+            for level in levels:
+                self._upsert_level(level, period, agg)
+            self.db.execute(
+                "INSERT INTO months (period, rows, ingested_at) VALUES (?, ?, ?) "
+                "ON CONFLICT (period) DO UPDATE SET rows = rows + excluded.rows, ingested_at = excluded.ingested_at",
+                (period, agg.rows, time.strftime("%Y-%m-%d %H:%M:%S")),
+            )
+        return agg.rows
+
+    def _delete_period(self, period):
+        self.db.execute("DELETE FROM lines WHERE period = ?", (period,))
+        self.db.execute("DELETE FROM months WHERE period = ?", (period,))
+        for level in LEVELS:
+            self.db.execute(f"DELETE FROM {_table(level)} WHERE period = ?", (period,))
+
+    def _upsert_level(self, level, period, agg):
+        keys = LEVELS[level]
+        names = keys + ("period",) + SUMMARY_METRICS
+        groups, sums = agg.totals(level)
+        update = ", ".join(f"{m} = {m} + excluded.{m}" for m in SUMMARY_METRICS)
+        self.db.executemany(
+            f"INSERT INTO {_table(level)} ({', '.join(names)}) VALUES ({', '.join('?' * len(names))}) "
+            f"ON CONFLICT ({', '.join(keys)}, period) DO UPDATE SET {update}",
+            [
+                tuple(_key_text(k) for k in key) + (period,) + tuple(values)
+                for key, values in zip(groups, sums.tolist())
+            ],
+        )
+
+    def ingest_bill(self, plan, data) -> str:
+        """
+        เก็บบิลหนึ่งเดือน (แทนที่บิลชนิดเดียวกันของเดือนเดิม) คืน period
+        - plan: main.ELECTRIC_PLAN / main.SOLAR_PLAN (ดู main.BILL_PLANS)
+        - data: bill dict ที่ส่งให้ createElectricityReport / createSolarReport
+        """
+        period = period_key(data["bill_month"])
+        units = baht = None
+        if plan.name in BILL_TOTALS:
+            units, baht = (_plain(plan.derived(data, k)) for k in BILL_TOTALS[plan.name])
+        with self.db:
+            self.db.execute(
+                "INSERT OR REPLACE INTO bills (kind, period, data, units, baht, ingested_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (plan.name, period, json.dumps(data, ensure_ascii=False, default=_plain), units, baht,
+                 time.strftime("%Y-%m-%d %H:%M:%S")),
+            )
+        return period
+
+    # ====== query ======
+    def periods(self) -> list:
+        """เดือนที่มีข้อมูล line (เรียงจากเก่าไปใหม่)"""
+        return [p for (p,) in self.db.execute("SELECT period FROM months ORDER BY period")]
+
+    def monthly(self, level="department", start=None, end=None):
+        """แถว aggregate [key..., period, metrics...] ของระดับ level ช่วง start - end (รวมปลายทั้งสอง)"""
+        keys = _level_keys(level)
+        where, args = _period_range(start, end)
+        return self.db.execute(
+            f"SELECT {', '.join(keys)}, period, {', '.join(SUMMARY_METRICS)} FROM {_table(level)}"
+            f"{where} ORDER BY {', '.join(keys)}, period", args,
+        ).fetchall()
+
+    def trend(self, level="department", metric="total_amount", start=None, end=None):
+        """
+        ตารางแนวโน้ม: คืน (periods, rows) โดย rows = [key..., ค่าของแต่ละ period...]
+        (เดือนที่กลุ่มนั้นไม่มีข้อมูล = None)
+        """
+        if metric not in SUMMARY_METRICS:
+            raise ValueError(f"ไม่รู้จัก metric {metric!r} (ใช้ได้: {', '.join(SUMMARY_METRICS)})")
+        keys = _level_keys(level)
+        where, args = _period_range(start, end)
+        table = _table(level)
+        periods = [p for (p,) in self.db.execute(
+            f"SELECT DISTINCT period FROM {table}{where} ORDER BY period", args)]
+        column = {p: i for i, p in enumerate(periods)}
+        rows = {}
+        for record in self.db.execute(
+                f"SELECT {', '.join(keys)}, period, {metric} FROM {table}{where} "
+                f"ORDER BY {', '.join(keys)}", args):
+            key, period, value = record[:len(keys)], record[-2], record[-1]
+            row = rows.get(key)
+            if row is None:
+                row = rows[key] = [None] * len(periods)
+            row[column[period]] = value
+        return periods, [list(key) + values for key, values in rows.items()]
+
+    def year_over_year(self, level="department", metric="total_amount", period=None):
+        """
+        เทียบเดือน period (None = เดือนล่าสุด) กับเดือนเดียวกันของปีก่อน
+        คืน list ของ [key..., ค่าปีก่อน, ค่าเดือนนี้, เปลี่ยนแปลง (สัดส่วน หรือ None)]
+        """
+        period = period_key(period) if period is not None else (self.periods() or [None])[-1]
+        if period is None:
+            return []
+        last_period = previous_year(period)
+        periods, rows = self.trend(level, metric, last_period, period)
+        n = len(_level_keys(level))
+        last_year = periods.index(last_period) if last_period in periods else None
+        this_year = periods.index(period) if period in periods else None
+        out = []
+        for row in rows:
+            key, values = row[:n], row[n:]
+            before = values[last_year] if last_year is not None else None
+            now = values[this_year] if this_year is not None else None
+            change = (now - before) / before if before and now is not None else None
+            out.append(key + [before, now, change])
+        return out
+
+    def bill_trend(self, kind="electric", start=None, end=None):
+        """[(period, หน่วยรวม, บาทรวม), ...] ของบิลชนิด kind"""
+        where, args = _period_range(start, end)
+        where = f"{where} AND kind = ?" if where else " WHERE kind = ?"
+        return self.db.execute(
+            f"SELECT period, units, baht FROM bills{where} ORDER BY period", args + [kind]).fetchall()
+
+    def bill(self, kind, period):
+        """bill dict ที่เก็บไว้ (None = ไม่มี)"""
+        row = self.db.execute(
+            "SELECT data FROM bills WHERE kind = ? AND period = ?", (kind, period_key(period))).fetchone()
+        return json.loads(row[0]) if row else None
+
+
+def _period_range(start, end):
+    clauses, args = [], []
+    if start is not None:
+        clauses.append("period >= ?")
+        args.append(period_key(start))
+    if end is not None:
+        clauses.append("period <= ?")
+        args.append(period_key(end))
+    return (" WHERE " + " AND ".join(clauses) if clauses else ""), args
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bill / line history store")
+    parser.add_argument("--db", default=DEFAULT_PATH, help="ไฟล์ SQLite")
+    commands = parser.add_subparsers(dest="command", required=True)
+    p = commands.add_parser("ingest-lines", help="เก็บ line ของหนึ่งเดือนจาก .csv / .xlsx")
+    p.add_argument("period", help="เดือน เช่น 8/2025 หรือ 2025-08")
+    p.add_argument("source", help="ไฟล์ .csv / .xlsx ของข้อมูลระดับ line")
+    p.add_argument("--append", action="store_true", help="เพิ่มเข้าเดือนเดิม แทนการแทนที่ทั้งเดือน")
+    p = commands.add_parser("ingest-bills", help="เก็บบิลจากไฟล์ .json / .jsonl (แบบเดียวกับ batch.py)")
+    p.add_argument("bills")
+    p = commands.add_parser("trend", help="เขียน workbook แนวโน้มจาก aggregate รายเดือน")
+    p.add_argument("--level", default="department", choices=list(LEVELS))
+    p.add_argument("--metric", default="total_amount", choices=list(SUMMARY_METRICS))
+    p.add_argument("--out", help="ไฟล์ .xlsx (ค่าเริ่มต้น reports/trend/trend_<level>_<metric>.xlsx)")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    with HistoryStore(args.db) as store:
+        if args.command == "ingest-lines":
+            import sources
+
+            n = store.ingest_lines(args.period, sources.read_lines(args.source), replace=not args.append)
+            print(f"{n:,} rows -> {period_key(args.period)}")
+        elif args.command == "ingest-bills":
+            import batch
+            import main
+
+            failed = 0
+            for i, bill in enumerate(batch.load_bills(args.bills)):
+                try:
+                    kind = batch.bill_kind(bill)
+                    print(f"ok    {kind:<9} {store.ingest_bill(main.BILL_PLANS[kind], bill)}")
+                except (KeyError, ValueError) as e:
+                    failed += 1
+                    print(f"FAIL  #{i} {bill.get('bill_month')}: {e!r}")
+            if failed:
+                raise SystemExit(1)
+        else:
+            import main
+
+            print(main.createTrendReport(store, args.out, args.level, args.metric))
+    print(f"{time.perf_counter() - t0:.2f} s")
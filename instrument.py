@@ -0,0 +1,185 @@
+"""
+จับเวลาแต่ละช่วง (span) และตัวนับ (หน้า/cell/bytes) ระหว่างสร้างรายงาน
+
+ปิดอยู่โดยค่าเริ่มต้น: span() คืน context ว่างตัวเดียวกันทุกครั้ง และ count() ไม่ทำอะไร
+เปิดเฉพาะช่วงด้วย context manager
+
+    with instrument.recording() as rec:
+        main.createElectricityReport(bill)
+    print(rec.to_json())
+
+หรือเปิดทั้ง process ด้วย instrument.enable()
+หรือ env REPORT_PROFILE=<ไฟล์.json> (บันทึกทั้ง process แล้วเขียนไฟล์ตอนจบ)
+ชื่อ span ซ้อนกันเป็น path เช่น "electric/output"
+ผลของหลายงานรวมกันได้ด้วย merge() (เช่น batch.py --profile)
+"""
+import functools
+import json
+import os
+import time
+
+_perf = time.perf_counter
+
+# Recorder ที่กำลังบันทึก (None = ปิด)
+_active = None
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("rec", "name", "t0")
+
+    def __init__(self, rec, name):
+        self.rec = rec
+        self.name = name
+
+    def __enter__(self):
+        stack = self.rec._stack
+        if stack:
+            self.name = f"{stack[-1]}/{self.name}"
+        stack.append(self.name)
+        self.t0 = _perf()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = _perf() - self.t0
+        rec = self.rec
+        rec._stack.pop()
+        stat = rec.spans.get(self.name)
+        if stat is None:
+            rec.spans[self.name] = [1, elapsed, elapsed]
+        else:
+            stat[0] += 1
+            stat[1] += elapsed
+            if elapsed > stat[2]:
+                stat[2] = elapsed
+        return False
+
+
+class Recorder:
+    """
+    เก็บผลของ span (จำนวนครั้ง, เวลารวม, เวลาสูงสุด) และตัวนับ
+    - to_dict() / to_json(): ผลในรูปที่รวมข้ามงานได้ (ดู merge)
+    """
+
+    def __init__(self):
+        self.spans = {}
+        self.counters = {}
+        self._stack = []
+
+    def span(self, name):
+        return _Span(self, name)
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def to_dict(self):
+        return {
+            "spans": {
+                name: {"count": c, "total_ms": total * 1000, "max_ms": longest * 1000}
+                for name, (c, total, longest) in self.spans.items()
+            },
+            "counters": dict(self.counters),
+        }
+
+    def to_json(self, **kwargs):
+        return json.dumps(self.to_dict(), ensure_ascii=False, **kwargs)
+
+
+def span(name):
+    """with instrument.span("output"): ... (ไม่มีผลเมื่อปิดอยู่)"""
+    if _active is None:
+        return _NULL_SPAN
+    return _active.span(name)
+
+
+def timed(name):
+    """decorator: ทั้งฟังก์ชันเป็น span หนึ่ง"""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def count(name, n=1):
+    if _active is not None:
+        _active.count(name, n)
+
+
+def enabled():
+    return _active is not None
+
+
+def enable(recorder=None):
+    """เปิดการบันทึกทั้ง process คืน Recorder ที่ใช้"""
+    global _active
+    _active = recorder or Recorder()
+    return _active
+
+
+def disable():
+    global _active
+    rec, _active = _active, None
+    return rec
+
+
+class recording:
+    """
+    context manager: บันทึกเฉพาะภายใน with แล้วคืนสถานะเดิม
+    (ซ้อนกันได้ ช่วงด้านในไม่ถูกนับซ้ำในด้านนอก)
+    """
+
+    def __init__(self, recorder=None):
+        self.recorder = recorder or Recorder()
+
+    def __enter__(self):
+        global _active
+        self._previous, _active = _active, self.recorder
+        return self.recorder
+
+    def __exit__(self, *exc):
+        global _active
+        _active = self._previous
+        return False
+
+
+def merge(results):
+    """รวมผล to_dict() หลายชุด (เช่นจากหลายพันงาน) เป็นชุดเดียว"""
+    spans, counters = {}, {}
+    for r in results:
+        if not r:
+            continue
+        for name, s in r["spans"].items():
+            m = spans.setdefault(name, {"count": 0, "total_ms": 0.0, "max_ms": 0.0})
+            m["count"] += s["count"]
+            m["total_ms"] += s["total_ms"]
+            m["max_ms"] = max(m["max_ms"], s["max_ms"])
+        for name, n in r["counters"].items():
+            counters[name] = counters.get(name, 0) + n
+    for s in spans.values():
+        s["mean_ms"] = s["total_ms"] / s["count"]
+    return {"spans": spans, "counters": counters}
+
+
+def _dump_at_exit(path, rec):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(rec.to_json(indent=2))
+
+
+if os.environ.get("REPORT_PROFILE"):
+    import atexit
+    atexit.register(_dump_at_exit, os.environ["REPORT_PROFILE"], enable())
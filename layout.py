@@ -0,0 +1,232 @@
+"""
+Layout ของบิลแบบ declarative
+
+บิลหนึ่งชนิดอธิบายด้วย BillLayout: section -> row -> cell
+แต่ละ cell เป็นข้อความคงที่ หรือ Field ที่ผูกกับ key ใน data ของบิล
+(รวมถึงค่าที่คำนวณจาก derive)
+
+compile_layout() ตรวจ layout และคำนวณความกว้าง/ฟอนต์/เส้นขอบไว้ครั้งเดียว
+ได้ RenderPlan ที่ใช้วาดบิลกี่ใบก็ได้ ต่อบิลเหลือแค่จัดรูปแบบค่าแล้วเรียก pdf.cell
+"""
+import numbers
+from typing import Callable, NamedTuple, Optional, Sequence, Tuple, Union
+
+import instrument
+
+VALID_ALIGNS = ("L", "C", "R", "J")
+VALID_STYLES = ("", "B", "I")
+
+
+class Field(NamedTuple):
+    """ค่าจาก data ตาม key ถ้าเป็นตัวเลขจัดรูปแบบด้วย fmt ไม่เช่นนั้นใช้ str()"""
+    key: str
+    fmt: str = "{:,.2f}"
+
+
+class Cell(NamedTuple):
+    """
+    - value: ข้อความคงที่ หรือ Field
+    - span: จำนวนคอลัมน์ของ section ที่ cell นี้กิน
+    - border / align: เหมือน FPDF.cell
+    - style: "" / "B" / "I"
+    - fill: ระบายพื้นด้วยสี fill ของ layout
+    """
+    value: Union[str, Field]
+    span: int = 1
+    border: Union[int, str] = "LR"
+    align: str = "L"
+    style: str = ""
+    fill: bool = False
+
+
+class Row(NamedTuple):
+    cells: Sequence[Cell]
+    advance: float = 1  # ขึ้นบรรทัดกี่เท่าของ row_h หลังแถวนี้
+
+
+class Gap(NamedTuple):
+    h: float  # เว้นระยะ (mm)
+
+
+class Section(NamedTuple):
+    rows: Sequence[Union[Row, Gap]]
+    columns: Optional[Sequence[float]] = None  # None = ใช้คอลัมน์ของ layout
+
+
+class BillLayout(NamedTuple):
+    """
+    - name: ชนิดบิล ใช้ตั้งชื่อโฟลเดอร์/ไฟล์และ template ลายเซ็น
+    - title: หัวเรื่องบนหัวกระดาษ
+    - columns: ความกว้างคอลัมน์ (mm) ค่าเริ่มต้นของทุก section
+    - sections: เนื้อหาของบิลตามลำดับ
+    - derive: ((key, ฟังก์ชัน(values) -> ค่า), ...) คำนวณตามลำดับ ใช้ค่าก่อนหน้าได้
+    - signatures: ((ชื่อ, ตำแหน่ง), ...) 3 กล่อง เล็ก-เล็ก | ใหญ่
+    - sig_y: ตำแหน่ง y ของกล่องลายเซ็น
+    """
+    name: str
+    title: str
+    columns: Sequence[float]
+    sections: Sequence[Section]
+    derive: Sequence[Tuple[str, Callable[[dict], object]]] = ()
+    signatures: Sequence[Tuple[str, str]] = ()
+    sig_y: float = 255
+    sig_h: float = 30
+    row_h: float = 6.5
+    font_size: float = 12
+    fill: Tuple[int, int, int] = (240, 240, 240)
+
+
+def draw_sig_box(pdf, x, y, w, h, name_text, role_text, name_ratio=0.72):
+    name_h = h * name_ratio
+    role_h = h - name_h
+
+    pdf.rect(x, y, w, h)
+    pdf.line(x, y + name_h, x + w, y + name_h)
+
+    pdf.set_xy(x, y + 7)
+    pdf.set_font("TH", "B", 12)
+    pdf.cell(w, name_h, name_text, align="C")
+
+    pdf.set_xy(x, y + name_h)
+    pdf.set_font("TH", "", 11)
+    pdf.cell(w, role_h, role_text, align="C")
+
+
+# ====== Compile ======
+# op ของ render plan
+_FONT, _CELL, _FIELD, _LN = range(4)
+
+
+def _check_border(border):
+    if isinstance(border, int):
+        return border in (0, 1)
+    return set(border) <= set("LTRB")
+
+
+def compile_layout(layout: BillLayout) -> "RenderPlan":
+    """ตรวจ layout แล้วแปลงเป็น RenderPlan (เรียกครั้งเดียวต่อชนิดบิล)"""
+    derived = [key for key, _ in layout.derive]
+    if len(layout.signatures) not in (0, 3):
+        raise ValueError(f"{layout.name}: signatures ต้องมี 3 กล่อง (ได้ {len(layout.signatures)})")
+
+    ops = []
+    fields = set()
+    style = None
+    for s, section in enumerate(layout.sections):
+        columns = list(section.columns or layout.columns)
+        for r, row in enumerate(section.rows):
+            where = f"{layout.name}: section {s} row {r}"
+            if isinstance(row, Gap):
+                ops.append((_LN, row.h))
+                continue
+
+            spans = sum(c.span for c in row.cells)
+            if spans != len(columns):
+                raise ValueError(f"{where}: span รวม {spans} ไม่เท่าจำนวนคอลัมน์ {len(columns)}")
+            col = 0
+            for cell in row.cells:
+                if cell.span < 1:
+                    raise ValueError(f"{where}: span ต้องมากกว่า 0")
+                if cell.align not in VALID_ALIGNS:
+                    raise ValueError(f"{where}: align ไม่ถูกต้อง {cell.align!r}")
+                if cell.style not in VALID_STYLES:
+                    raise ValueError(f"{where}: style ไม่ถูกต้อง {cell.style!r}")
+                if not _check_border(cell.border):
+                    raise ValueError(f"{where}: border ไม่ถูกต้อง {cell.border!r}")
+
+                # เปลี่ยนฟอนต์เฉพาะเมื่อ style ต่างจาก cell ก่อนหน้า
+                if cell.style != style:
+                    style = cell.style
+                    ops.append((_FONT, style))
+                w = sum(columns[col:col + cell.span])
+                col += cell.span
+                if isinstance(cell.value, Field):
+                    fields.add(cell.value.key)
+                    ops.append((_FIELD, w, cell.value.key, cell.value.fmt, cell.border, cell.align, cell.fill))
+                else:
+                    ops.append((_CELL, w, str(cell.value), cell.border, cell.align, cell.fill))
+            ops.append((_LN, layout.row_h * row.advance))
+
+    inputs = sorted(fields - set(derived))
+    return RenderPlan(layout, ops, inputs)
+
+
+class RenderPlan:
+    """ผลของ compile_layout ใช้ซ้ำได้กับทุกบิลชนิดเดียวกัน"""
+
+    def __init__(self, layout: BillLayout, ops, inputs):
+        self.layout = layout
+        self.name = layout.name
+        self.title = layout.title
+        self.ops = ops
+        self.cells = sum(1 for op in ops if op[0] in (_CELL, _FIELD))
+        # key ของ data ที่ cell อ้างถึงโดยตรง (ไม่รวมค่าที่ derive)
+        self.inputs = inputs
+
+    def values(self, data: dict) -> dict:
+        """data ของบิล + ค่าที่ derive"""
+        missing = [k for k in self.inputs if k not in data]
+        if missing:
+            raise KeyError(f"{self.name}: ไม่มีข้อมูล {', '.join(missing)}")
+        values = dict(data)
+        for key, func in self.layout.derive:
+            values[key] = func(values)
+        return values
+
+    def derived(self, data: dict, key: str):
+        """ค่า derive ชื่อ key อย่างเดียว (คำนวณ derive ตามลำดับถึง key ไม่ตรวจ input อื่นของบิล)"""
+        values = dict(data)
+        for k, func in self.layout.derive:
+            values[k] = func(values)
+            if k == key:
+                return values[k]
+        raise KeyError(f"{self.name}: ไม่มีค่า derive {key}")
+
+    def render(self, pdf, data: dict):
+        """วาดเนื้อหาของบิลลงหน้าปัจจุบันของ pdf (ต่อจากหัวกระดาษ)"""
+        values = self.values(data)
+        layout = self.layout
+        row_h = layout.row_h
+        size = layout.font_size
+        cell = pdf.cell
+        fill_set = False
+
+        for op in self.ops:
+            kind = op[0]
+            if kind == _FIELD:
+                _, w, key, fmt, border, align, fill = op
+                v = values[key]
+                # numbers.Number รวม numpy scalar (np.float64, np.int64) ที่ได้จาก tou / allocation ด้วย
+                text = fmt.format(v) if isinstance(v, numbers.Number) and not isinstance(v, bool) else str(v)
+                cell(w, row_h, text, border=border, align=align, fill=fill)
+            elif kind == _CELL:
+                _, w, text, border, align, fill = op
+                cell(w, row_h, text, border=border, align=align, fill=fill)
+            elif kind == _LN:
+                pdf.ln(op[1])
+            else:
+                pdf.set_font("TH", op[1], size=size)
+                if not fill_set:
+                    pdf.set_fill_color(*layout.fill)
+                    fill_set = True
+
+        if layout.signatures:
+            pdf.use_template(f"signatures-{self.name}", lambda: self.draw_signatures(pdf))
+        instrument.count("cells", self.cells)
+
+    def draw_signatures(self, pdf):
+        # กล่องซ้าย 2 กล่องเล็ก | เว้นช่อง | กล่องขวา 1 กล่องใหญ่
+        layout = self.layout
+        content_w = pdf.w - pdf.l_margin - pdf.r_margin
+        gap = 40.0
+        group_w = (content_w - gap) / 2
+        small_w = group_w / 2
+        y, h = layout.sig_y, layout.sig_h
+
+        (name1, role1), (name2, role2), (name3, role3) = layout.signatures
+        x_left = pdf.l_margin
+        draw_sig_box(pdf, x_left,           y, small_w, h, name1, role1)
+        draw_sig_box(pdf, x_left + small_w, y, small_w, h, name2, role2)
+
+        x_right = pdf.l_margin + group_w + gap
+        draw_sig_box(pdf, x_right, y, group_w, h, name3, role3)
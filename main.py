@@ -1,11 +1,15 @@
-import PowerPDF
+import instrument
 from datetime import datetime
 import calendar
 import os
-import openpyxl
-from openpyxl.utils import get_column_letter
-from openpyxl.styles import PatternFill, Font, Border, Side, Alignment
-from collections import defaultdict
+from io import BytesIO
+import excel_writer
+from itertools import chain, islice
+from excel_writer import ColumnWidths
+from layout import BillLayout, Section, Row, Gap, Cell, Field, compile_layout
+
+# PowerPDF (fpdf) / openpyxl / NumPy import ตอนเรียกใช้ครั้งแรกในฟังก์ชันที่ต้องใช้
+# สร้างรายงานชนิดเดียว (เช่น cli.py excel) จึงไม่ต้องโหลด backend ของรายงานอื่น
 
 thai_months = [
     "", "มกราคม", "กุมภาพันธ์", "มีนาคม", "เมษายน", "พฤษภาคม", "มิถุนายน",
@@ -31,428 +35,568 @@ def convert_to_thai_date_range(date_str):
     else:
         return "รูปแบบวันที่ไม่ถูกต้อง"
     
-def draw_sig_box(pdf, x, y, w, h, name_text, role_text, name_ratio=0.72):
-    name_h = h * name_ratio          
-    role_h = h - name_h           
-
-    pdf.rect(x, y, w, h)             
-    pdf.line(x, y + name_h, x + w, y + name_h) 
-
-    pdf.set_xy(x, y + 7)
-    pdf.set_font("TH", "B", 12)
-    pdf.cell(w, name_h, name_text, align="C")
-
-    pdf.set_xy(x, y + name_h)
-    pdf.set_font("TH", "", 11)
-    pdf.cell(w, role_h, role_text, align="C")
-
-def createElectricityReport(data):
-    pdf = PowerPDF.PowerPDF(
-        title="ค่าไฟฟ้าแยกตามโรงงาน TBKT,TBKK,DIE CASTING,MST",
-        period=convert_to_thai_date_range(data["bill_month"]),
-        issued=convert_to_thai_date_range(data["issued"]),
-    )
-    pdf.add_page()
-
-    col_w = [60, 20, 53, 53]
-    row_h = 6.5
-
-    pdf.set_font("TH", "B", size=12)
-    pdf.set_fill_color(240, 240, 240)
-
-    pdf.cell(col_w[0], row_h, "", border=1, align="C", fill=True)
-
-    right_span_w = col_w[0] + col_w[1]
-    left_span_w = col_w[2] + col_w[3]
-
-    pdf.cell(col_w[1] + col_w[2], row_h, "กิโลวัตต์/หน่วย/กิโลวาร์", border=1, align="C", fill=True)
-    pdf.cell(col_w[3], row_h, "จำนวนเงิน (บาท)", border=1, align="C", fill=True)
-    pdf.ln(row_h)
-
-    energy_total_kw = data["max_peak_kw"] + data["energy_peak1_kw"] + data["energy_offpeak_kw"] + data["energy_holiday1_kw"] + data["energy_peak2_kw"] + data["energy_holiday2_kw"]
-    energy_std_baht = data["max_peak_baht"] + data["energy_peak1_baht"] + data["energy_offpeak_baht"] + data["energy_holiday1_baht"] + data["energy_peak2_baht"] + data["energy_holiday2_baht"]
-    ft_kw = energy_total_kw - data["max_peak_kw"]
-    ft_baht = ft_kw * data["rate_ft"]
-    energy_total_baht = energy_std_baht + ft_baht
-    all_fac = data["fac_1_kw"] + data["fac_2_kw"] + data["fac_3_kw"] + data["mst_kw"]
-    pea_rate = energy_total_baht / energy_total_kw
-    tbkk_rate = energy_total_baht / all_fac
-
-    detail = [
-        ["ค่าพลังไฟฟ้าสูงสุด (กิโลวัตต์)", "P", data["max_peak_kw"], data["max_peak_baht"]],
-        ["พลังงานไฟฟ้า (หน่วย)", "P", data["energy_peak1_kw"], data["energy_peak1_baht"]],
-        ["", "OP", data["energy_offpeak_kw"], data["energy_offpeak_baht"]],
-        ["", "H",  data["energy_holiday1_kw"], data["energy_holiday1_baht"]],
-        ["", "P",  data["energy_peak2_kw"], data["energy_peak2_baht"]],
-        ["", "H",  data["energy_holiday2_kw"], data["energy_holiday2_baht"]],
-        ["พลังงานไฟฟ้ารวม (หน่วย)", "", energy_total_kw, "-"],
-        ["ค่าบริการ", "", "", data["service_charge"]],
-        ["ค่าไฟฟ้ามาตรฐาน", "", "", energy_std_baht],
-        ["รวมจำนวนเงินค่า Ft (บาท)", data["rate_ft"], ft_kw, ft_baht],
-        ["ส่วนลดรัฐบาล", "", "", "-"],
-    ]
-
-    pdf.set_font("TH", size=12)
-
-    for desc, period, kwh, amt in detail:
-        pdf.cell(col_w[0], row_h, str(desc),   border="LR", align="L")
-        pdf.cell(col_w[1], row_h, str(period), border="LR", align="C")
-        pdf.cell(col_w[2], row_h, f"{kwh:,.2f}" if isinstance(kwh, (int,float)) else str(kwh), border="LR", align="R")
-        pdf.cell(col_w[3], row_h, f"{amt:,.2f}" if isinstance(amt, (int,float)) else str(amt), border="LR", align="R")
-        pdf.ln(row_h)
-
-    pdf.cell(col_w[0] + col_w[1] + col_w[2], row_h, "รวมค่าพลังงานไฟฟ้า", border="TLR", align="L")
-    pdf.set_font("TH", "B", size=12)
-    pdf.cell(col_w[3], row_h, f"{energy_total_baht:,.2f}", border="TLR", align="R")
-    pdf.ln(row_h)
-    pdf.set_font("TH", size=12)
-    pdf.cell(col_w[0] + col_w[1], row_h, "ค่าน้ำหนักคิดค่าไฟ (บาท/กิโลวัตต์)", border="LB", align="L")
-    pdf.cell(col_w[2], row_h, f"{pea_rate:,.2f}", border="BR", align="R")
-    pdf.cell(col_w[3], row_h, f"{tbkk_rate:,.2f}", border="BR", align="R")
-    pdf.ln(row_h * 2)
-
-
-    pdf.set_fill_color(240, 240, 240)
-    pdf.set_font("TH", "B", size=12)
-    pdf.cell(right_span_w + left_span_w, row_h, "ค่าตัวเลขมิเตอร์ไฟฟ้าแยกแต่ละโรงงาน", border=1, align="C", fill=True)
-    pdf.ln(row_h)
-
-    detail = [
-        ["F10-1", data["fac_1_kw"]],
-        ["F10-2", data["fac_2_kw"]],
-        ["F10-3", data["fac_3_kw"]],
-        ["MST", data["mst_kw"]],
-    ]
-    pdf.set_font("TH", size=12)
-    for fac_name, amt in detail:
-        border_style = "LRT" if fac_name == "MST" else "LR"
-
-        pdf.cell(left_span_w, row_h, str(fac_name), border=border_style, align="L")
-        pdf.cell(right_span_w, row_h, f"{amt:,.2f}", border=border_style, align="R")
-        pdf.ln(row_h)
-
-
-    meter_err = ((1-(all_fac/energy_total_kw)))
-
-    pdf.cell(left_span_w, row_h, "พลังงานไฟฟ้ารวม (หน่วย)", border="LRT", align="L")
-    pdf.cell(right_span_w, row_h, f"{all_fac:,.2f}", border="LRT", align="R")
-    pdf.ln(row_h)
-    pdf.cell(left_span_w, row_h, "ค่าความผิดพลาดของมิเตอร์ % (ERR)", border="LRB", align="L")
-    pdf.cell(right_span_w, row_h, f"({meter_err:.2%})", border="LRB", align="R")
-    pdf.ln(row_h)
-    pdf.ln(row_h)
-
-    pdf.set_fill_color(240, 240, 240)
-    pdf.set_font("TH", "B", size=12)
-    pdf.cell(right_span_w + left_span_w, row_h, "ค่าไฟฟ้าจากการคำนวณ ไม่รวม VAT 7%", border=1, align="C", fill=True)
-    pdf.ln(row_h)
-
-    tbkk_total_amount = data["direct_kw"] + data["admin_kw"] + data["indirect_kw"]
-    tbkk_total_baht = data["direct_baht"] + data["admin_baht"] + data["indirect_baht"]
-    all_fac_total_amount = tbkk_total_amount + data["mst_kw"]
-    all_fac_total_baht = tbkk_total_baht + data["mst_baht"]
-
-    pdf.set_font("TH", size=12)
-    pdf.cell(col_w[0] + col_w[1], row_h, "1.TBKK (MW)X1000*ERR", border="LR", align="L")
-    pdf.cell(col_w[2], row_h, f"{tbkk_total_amount:,.2f}", border="LR", align="R")
-    pdf.cell(col_w[3], row_h, f"{tbkk_total_baht:,.2f}", border="LR", align="R")
-    pdf.ln(row_h)
-    pdf.cell(col_w[0] + col_w[1], row_h, "DIRECT TBKK", border="LR", align="R")
-    pdf.cell(col_w[2], row_h, f"{data['direct_kw']:,.2f}", border="LR", align="R")
-    pdf.cell(col_w[3], row_h, f"{data['direct_baht']:,.2f}", border="LR", align="R")
-    pdf.ln(row_h)
-    pdf.cell(col_w[0] + col_w[1], row_h, "ADMIN TBKK", border="LR", align="R")
-    pdf.cell(col_w[2], row_h, f"{data['admin_kw']:,.2f}", border="LR", align="R")
-    pdf.cell(col_w[3], row_h, f"{data['admin_baht']:,.2f}", border="LR", align="R")
-    pdf.ln(row_h)
-    pdf.cell(col_w[0] + col_w[1], row_h, "INDIRECT TBKK", border="LR", align="R")
-    pdf.cell(col_w[2], row_h, f"{data['indirect_kw']:,.2f}", border="LR", align="R")
-    pdf.cell(col_w[3], row_h, f"{data['indirect_baht']:,.2f}", border="LR", align="R")
-    pdf.ln(row_h)
-    pdf.cell(col_w[0] + col_w[1], row_h, "2.MST : Advance (MW)X1000*ERR", border="LRT", align="L")
-    pdf.cell(col_w[2], row_h, f"{data['mst_kw']:,.2f}", border="LRT", align="R")
-    pdf.cell(col_w[3], row_h, f"{data['mst_baht']:,.2f}", border="LRT", align="R")
-    pdf.ln(row_h)
-    pdf.cell(col_w[0] + col_w[1], row_h, "พลังงานไฟฟ้ารวม (หน่วย)", border="LRT", align="L")
-    pdf.cell(col_w[2], row_h, f"{all_fac_total_amount:,.2f}", border="LRT", align="R")
-    pdf.cell(col_w[3], row_h, f"-", border="LRT", align="R")
-    pdf.ln(row_h)
-    pdf.cell(col_w[0] + col_w[1], row_h, "ค่าไฟฟ้ามาตรฐาน", border="LRB", align="L")
-    pdf.cell(col_w[2], row_h, f"-", border="LRB", align="R")
-    pdf.cell(col_w[3], row_h, f"{all_fac_total_baht:,.2f}", border="LRB", align="R")
-    pdf.ln(row_h)
-
-    y = 255
-    h = 30
-
-    content_w = pdf.w - pdf.l_margin - pdf.r_margin
-    gap = 40.0                      
-    group_w = (content_w - gap) / 2
-    small_w = group_w / 2
-    big_w = group_w            
-
-    x_left = pdf.l_margin
-    draw_sig_box(pdf, x_left,             y, small_w, h, "Mr.Suthad T.",   "Approved By")
-    draw_sig_box(pdf, x_left + small_w,   y, small_w, h, "Mr.Atsadang R.", "Approved By")
-
-    x_right = pdf.l_margin + group_w + gap
-    draw_sig_box(pdf, x_right, y, big_w, h, "Mrs.Wandee P.", "Accounting Section")
-
-    bill_month = data["bill_month"] 
-    month, year = bill_month.split("/")
-
-    folder_path = os.path.join("reports", "electric", year)
-    os.makedirs(folder_path, exist_ok=True)
-
-    file_name = f"electric_report_{int(month):02d}_{year}.pdf"
-    file_path = os.path.join(folder_path, file_name)
-
-    pdf.output(file_path)
-
-def createSolarReport(data):
-    pdf = PowerPDF.PowerPDF(
-        title="ค่าไฟฟ้าโซล่าเซลล์",
-        period=convert_to_thai_date_range(data["bill_month"]),
-        issued=convert_to_thai_date_range(data["issued"]),
-    )
-    pdf.add_page()
-
-    col_w = [60, 8, 40, 40, 40]
-    row_h = 6.5
-
-    pdf.set_font("TH", "B", size=12)
-    pdf.set_fill_color(240, 240, 240)
-    pdf.ln(8)
-
-    pdf.cell(col_w[0] + col_w[1], row_h, "รายการ", border=1, align="C", fill=True)
-    pdf.cell(col_w[2], row_h, "กิโลวัตต์/หน่วย/กิโลวาร์", border=1, align="C", fill=True)
-    pdf.cell(col_w[3], row_h, "จำนวนเงินก่อนหักส่่วนลด (บาท)", border=1, align="C", fill=True)
-    pdf.cell(col_w[3], row_h, "จำนวนเงินหลังหักส่่วนลด (บาท)", border=1, align="C", fill=True)
-    pdf.ln(row_h)
-
-    pdf.set_font("TH", size=12)
-
-    pdf.cell(col_w[0], row_h, "ค่าพลังงานไฟฟ้าช่วง Peak", border="LR", align="L")
-    pdf.cell(col_w[1], row_h, "P", border="LR", align="C")
-    pdf.cell(col_w[2], row_h, f"{data['power_peak_kw']:,.2f}", border="LR", align="R")
-    pdf.cell(col_w[3], row_h, f"{data['power_peak_before_discount']:,.2f}", border="LR", align="R")
-    pdf.cell(col_w[4], row_h, f"{data['power_peak_after_discount']:,.2f}", border="LR", align="R")
-    pdf.ln(row_h)
-
-    pdf.cell(col_w[0], row_h, "ค่าพลังงานไฟฟ้าช่วง Off Peak", border="LR", align="L")
-    pdf.cell(col_w[1], row_h, "OP", border="LR", align="C")
-    pdf.cell(col_w[2], row_h, f"{data['power_offpeak_kw']:,.2f}", border="LR", align="R")
-    pdf.cell(col_w[3], row_h, f"{data['power_offpeak_before_discount']:,.2f}", border="LR", align="R")
-    pdf.cell(col_w[4], row_h, f"{data['power_offpeak_after_discount']:,.2f}", border="LR", align="R")
-    pdf.ln(row_h)
-
-    pdf.cell(col_w[0], row_h, "ค่าพลังงานไฟฟ้าช่วง Holiday", border="LRB", align="L")
-    pdf.cell(col_w[1], row_h, "H", border="LRB", align="C")
-    pdf.cell(col_w[2], row_h, f"{data['power_holiday_kw']:,.2f}", border="LRB", align="R")
-    pdf.cell(col_w[3], row_h, f"{data['power_holiday_before_discount']:,.2f}", border="LRB", align="R")
-    pdf.cell(col_w[4], row_h, f"{data['power_holiday_after_discount']:,.2f}", border="LRB", align="R")
-    pdf.ln(row_h)
-
-    pdf.cell(col_w[0] + col_w[1], row_h, "ค่าไฟฟ้าผันแปร (Ft)", border="LR", align="L")
-    pdf.cell(col_w[2], row_h, f"", border="LR", align="R")
-    pdf.cell(col_w[3], row_h, f"{data['ft_before_discount']:,.2f}", border="LR", align="R")
-    pdf.cell(col_w[4], row_h, f"{data['ft_after_discount']:,.2f}", border="LR", align="R")
-    pdf.ln(row_h)
-
-    power_total = data['power_peak_kw'] + data['power_offpeak_kw'] + data['power_holiday_kw']
-    pdf.cell(col_w[0] + col_w[1], row_h, "พลังงานไฟฟ้ารวม (หน่วย)", border="LR", align="L")
-    pdf.cell(col_w[2], row_h, f"{power_total:,.2f}", border="LR", align="R")
-    pdf.cell(col_w[3], row_h, f"", border="LR", align="R")
-    pdf.cell(col_w[4], row_h, f"", border="LR", align="R")
-    pdf.ln(row_h)
-
-    pdf.cell(col_w[0] + col_w[1], row_h, "ค่าความต้องการพลังไฟฟ้า (บาท)", border="LR", align="L")
-    pdf.cell(col_w[2], row_h, f"", border="LR", align="R")
-    pdf.cell(col_w[3], row_h, f"", border="LR", align="R")
-    pdf.cell(col_w[4], row_h, f"{data['power_demand']:,.2f}", border="LR", align="R")
-    pdf.ln(row_h)
-
-    total_power_before_discount = data["power_peak_before_discount"] + data["power_offpeak_before_discount"] + data["power_holiday_before_discount"] + data["ft_before_discount"]
-    total_power_after_discount = data["power_peak_after_discount"] + data["power_offpeak_after_discount"] + data["power_holiday_after_discount"] + data["ft_after_discount"] + data["power_demand"]
-    pdf.cell(col_w[0] + col_w[1], row_h, "รวมค่าพลังงานไฟฟ้า", border="LRB", align="L")
-    pdf.cell(col_w[2], row_h, f"", border="LRB", align="R")
-    pdf.cell(col_w[3], row_h, f"{total_power_before_discount:,.2f}", border="LRB", align="R")
-    pdf.set_font("TH", "B", size=12)
-    pdf.cell(col_w[4], row_h, f"{total_power_after_discount:,.2f}", border="LRB", align="R")
-    pdf.ln(row_h)
-
-    pdf.set_font("TH", size=12)
-
-    rate_before_discount = total_power_before_discount / power_total
-    rate_after_discount = total_power_after_discount / power_total
-    pdf.cell(col_w[0] + col_w[1] + col_w[2], row_h, "ค่าน้ำหนักคิดค่าไฟ (บาท/กิโลวัตต์)", border="LRB", align="L")
-    pdf.cell(col_w[3], row_h, f"{rate_before_discount:,.2f}", border="LRB", align="R")
-    pdf.cell(col_w[4], row_h, f"{rate_after_discount:,.2f}", border="LRB", align="R")
-    pdf.ln(row_h)
-    pdf.ln(row_h)
-
-    pdf.set_fill_color(240, 240, 240)
-    pdf.set_font("TH", "B", size=12)
-    pdf.cell(col_w[0] + col_w[1] + col_w[2] + col_w[3] + col_w[4], row_h, "ค่าไฟฟ้าจากการคำนวณ ไม่รวม VAT 7%", border=1, align="C", fill=True)
-    pdf.ln(row_h)
-
-    tbkk_total_amount = data["direct_kw"] + data["admin_kw"] + data["indirect_kw"]
-    tbkk_total_baht = data["direct_baht"] + data["admin_baht"] + data["indirect_baht"]
-
-    pdf.set_font("TH", size=12)
-    pdf.cell(col_w[0] + col_w[1] + col_w[2], row_h, "1.TBKK (MW)X1000*ERR", border="LR", align="L")
-    pdf.cell(col_w[3], row_h, f"{tbkk_total_amount:,.2f}", border="LR", align="R")
-    pdf.cell(col_w[4], row_h, f"{tbkk_total_baht:,.2f}", border="LR", align="R")
-    pdf.ln(row_h)
-    pdf.cell(col_w[0] + col_w[1] + col_w[2], row_h, "DIRECT TBKK", border="LR", align="R")
-    pdf.cell(col_w[3], row_h, f"{data['direct_kw']:,.2f}", border="LR", align="R")
-    pdf.cell(col_w[4], row_h, f"{data['direct_baht']:,.2f}", border="LR", align="R")
-    pdf.ln(row_h)
-    pdf.cell(col_w[0] + col_w[1] + col_w[2], row_h, "ADMIN TBKK", border="LR", align="R")
-    pdf.cell(col_w[3], row_h, f"{data['admin_kw']:,.2f}", border="LR", align="R")
-    pdf.cell(col_w[4], row_h, f"{data['admin_baht']:,.2f}", border="LR", align="R")
-    pdf.ln(row_h)
-    pdf.cell(col_w[0] + col_w[1] + col_w[2], row_h, "INDIRECT TBKK", border="LR", align="R")
-    pdf.cell(col_w[3], row_h, f"{data['indirect_kw']:,.2f}", border="LR", align="R")
-    pdf.cell(col_w[4], row_h, f"{data['indirect_baht']:,.2f}", border="LR", align="R")
-    pdf.ln(row_h)
-    pdf.cell(col_w[0] + col_w[1] + col_w[2], row_h, "พลังงานไฟฟ้ารวม (หน่วย)", border="LRT", align="L")
-    pdf.cell(col_w[3], row_h, f"{tbkk_total_amount:,.2f}", border="LRT", align="R")
-    pdf.cell(col_w[4], row_h, f"-", border="LRT", align="R")
-    pdf.ln(row_h)
-    pdf.cell(col_w[0] + col_w[1] + col_w[2], row_h, "ค่าไฟฟ้ามาตรฐาน", border="LRB", align="L")
-    pdf.cell(col_w[3], row_h, f"-", border="LRB", align="R")
-    pdf.cell(col_w[4], row_h, f"{tbkk_total_baht:,.2f}", border="LRB", align="R")
-    pdf.ln(row_h)
-
-    y = 170
-    h = 30
-
-    content_w = pdf.w - pdf.l_margin - pdf.r_margin
-    gap = 40.0                      
-    group_w = (content_w - gap) / 2
-    small_w = group_w / 2
-    big_w = group_w            
-
-    x_left = pdf.l_margin
-    draw_sig_box(pdf, x_left,             y, small_w, h, "Mr.Watcharagorn K.",   "Prepared By")
-    draw_sig_box(pdf, x_left + small_w,   y, small_w, h, "Mr.Atsadang R.", "Approved By")
-
-    x_right = pdf.l_margin + group_w + gap
-    draw_sig_box(pdf, x_right, y, big_w, h, "Mrs.Wandee P.", "Accounting Section")
-
-
-    bill_month = data["bill_month"] 
-    month, year = bill_month.split("/")
-
-    folder_path = os.path.join("reports", "solar", year)
-    os.makedirs(folder_path, exist_ok=True)
-
-    file_name = f"solar_report_{int(month):02d}_{year}.pdf"
-    file_path = os.path.join(folder_path, file_name)
-
-    pdf.output(file_path)
-
-
-def createExcelReport(data, filename="report.xlsx"):
-    wb = openpyxl.Workbook()
-    ws1 = wb.active
-    ws1.title = "All Data"
-
-    # ===== style =====
-    header_fill = PatternFill(start_color="B7DEE8", end_color="B7DEE8", fill_type="solid")
-    header_font = Font(bold=True, color="000000")
-    thin_border = Border(
-        left=Side(style="thin"), right=Side(style="thin"),
-        top=Side(style="thin"), bottom=Side(style="thin")
-    )
-
-    # ----- ตารางรวมทั้งหมด -----
-    cols_all = [
-        ("GROUP PD",       "department"),
-        ("SECTION",        "section"),
-        ("LINE",           "line"),
-        ("PRODUCTION TIME","production_time"),
-        ("KW (PE)",        "kw"),
-        ("KWH",            "kwh"),
-        ("KWH (UT)",       "kwh_ut"),
-        ("AMOUNT",         "amount"),
-        ("AMOUNT SOLAR",   "amount_solar"),
-        ("TOTAL AMOUNT",   "total_amount"),
-    ]
+# ===== PDF bills =====
+# layout ของบิลแต่ละชนิด (ดู layout.py) compile ครั้งเดียวตอน import แล้วใช้วาดทุกบิล
+_HEAD = dict(border=1, align="C", style="B", fill=True)
+
+
+def _num(key, span=1, border="LR", **kw):
+    return Cell(Field(key), span, border, "R", **kw)
+
+
+ELECTRIC_LAYOUT = BillLayout(
+    name="electric",
+    title="ค่าไฟฟ้าแยกตามโรงงาน TBKT,TBKK,DIE CASTING,MST",
+    columns=[60, 20, 53, 53],
+    derive=(
+        ("energy_total_kw", lambda v: v["max_peak_kw"] + v["energy_peak1_kw"] + v["energy_offpeak_kw"] + v["energy_holiday1_kw"] + v["energy_peak2_kw"] + v["energy_holiday2_kw"]),
+        ("energy_std_baht", lambda v: v["max_peak_baht"] + v["energy_peak1_baht"] + v["energy_offpeak_baht"] + v["energy_holiday1_baht"] + v["energy_peak2_baht"] + v["energy_holiday2_baht"]),
+        ("ft_kw",             lambda v: v["energy_total_kw"] - v["max_peak_kw"]),
+        ("ft_baht",           lambda v: v["ft_kw"] * v["rate_ft"]),
+        ("energy_total_baht", lambda v: v["energy_std_baht"] + v["ft_baht"]),
+        ("all_fac",           lambda v: v["fac_1_kw"] + v["fac_2_kw"] + v["fac_3_kw"] + v["mst_kw"]),
+        ("pea_rate",          lambda v: v["energy_total_baht"] / v["energy_total_kw"]),
+        ("tbkk_rate",         lambda v: v["energy_total_baht"] / v["all_fac"]),
+        ("meter_err",         lambda v: (1 - (v["all_fac"] / v["energy_total_kw"]))),
+        ("tbkk_total_amount", lambda v: v["direct_kw"] + v["admin_kw"] + v["indirect_kw"]),
+        ("tbkk_total_baht",   lambda v: v["direct_baht"] + v["admin_baht"] + v["indirect_baht"]),
+        ("all_fac_total_amount", lambda v: v["tbkk_total_amount"] + v["mst_kw"]),
+        ("all_fac_total_baht",   lambda v: v["tbkk_total_baht"] + v["mst_baht"]),
+    ),
+    sections=[
+        Section([
+            Row([Cell("", **_HEAD), Cell("กิโลวัตต์/หน่วย/กิโลวาร์", 2, **_HEAD), Cell("จำนวนเงิน (บาท)", **_HEAD)]),
+            Row([Cell("ค่าพลังไฟฟ้าสูงสุด (กิโลวัตต์)"), Cell("P", align="C"), _num("max_peak_kw"), _num("max_peak_baht")]),
+            Row([Cell("พลังงานไฟฟ้า (หน่วย)"), Cell("P", align="C"), _num("energy_peak1_kw"), _num("energy_peak1_baht")]),
+            Row([Cell(""), Cell("OP", align="C"), _num("energy_offpeak_kw"), _num("energy_offpeak_baht")]),
+            Row([Cell(""), Cell("H", align="C"),  _num("energy_holiday1_kw"), _num("energy_holiday1_baht")]),
+            Row([Cell(""), Cell("P", align="C"),  _num("energy_peak2_kw"), _num("energy_peak2_baht")]),
+            Row([Cell(""), Cell("H", align="C"),  _num("energy_holiday2_kw"), _num("energy_holiday2_baht")]),
+            Row([Cell("พลังงานไฟฟ้ารวม (หน่วย)"), Cell("", align="C"), _num("energy_total_kw"), Cell("-", align="R")]),
+            Row([Cell("ค่าบริการ"), Cell("", align="C"), Cell("", align="R"), _num("service_charge")]),
+            Row([Cell("ค่าไฟฟ้ามาตรฐาน"), Cell("", align="C"), Cell("", align="R"), _num("energy_std_baht")]),
+            Row([Cell("รวมจำนวนเงินค่า Ft (บาท)"), Cell(Field("rate_ft", "{}"), align="C"), _num("ft_kw"), _num("ft_baht")]),
+            Row([Cell("ส่วนลดรัฐบาล"), Cell("", align="C"), Cell("", align="R"), Cell("-", align="R")]),
+            Row([Cell("รวมค่าพลังงานไฟฟ้า", 3, "TLR"), _num("energy_total_baht", border="TLR", style="B")]),
+            Row([Cell("ค่าน้ำหนักคิดค่าไฟ (บาท/กิโลวัตต์)", 2, "LB"), _num("pea_rate", border="BR"), _num("tbkk_rate", border="BR")], advance=2),
+        ]),
+        # ส่วนมิเตอร์แยกโรงงาน แบ่งหน้ากว้างเป็น 2 ช่อง (ชื่อ | ค่า)
+        Section(columns=[106, 80], rows=[
+            Row([Cell("ค่าตัวเลขมิเตอร์ไฟฟ้าแยกแต่ละโรงงาน", 2, **_HEAD)]),
+            Row([Cell("F10-1"), _num("fac_1_kw")]),
+            Row([Cell("F10-2"), _num("fac_2_kw")]),
+            Row([Cell("F10-3"), _num("fac_3_kw")]),
+            Row([Cell("MST", border="LRT"), _num("mst_kw", border="LRT")]),
+            Row([Cell("พลังงานไฟฟ้ารวม (หน่วย)", border="LRT"), _num("all_fac", border="LRT")]),
+            Row([Cell("ค่าความผิดพลาดของมิเตอร์ % (ERR)", border="LRB"), Cell(Field("meter_err", "({:.2%})"), border="LRB", align="R")], advance=2),
+        ]),
+        Section([
+            Row([Cell("ค่าไฟฟ้าจากการคำนวณ ไม่รวม VAT 7%", 4, **_HEAD)]),
+            Row([Cell("1.TBKK (MW)X1000*ERR", 2), _num("tbkk_total_amount"), _num("tbkk_total_baht")]),
+            Row([Cell("DIRECT TBKK", 2, align="R"), _num("direct_kw"), _num("direct_baht")]),
+            Row([Cell("ADMIN TBKK", 2, align="R"), _num("admin_kw"), _num("admin_baht")]),
+            Row([Cell("INDIRECT TBKK", 2, align="R"), _num("indirect_kw"), _num("indirect_baht")]),
+            Row([Cell("2.MST : Advance (MW)X1000*ERR", 2, "LRT"), _num("mst_kw", border="LRT"), _num("mst_baht", border="LRT")]),
+            Row([Cell("พลังงานไฟฟ้ารวม (หน่วย)", 2, "LRT"), _num("all_fac_total_amount", border="LRT"), Cell("-", border="LRT", align="R")]),
+            Row([Cell("ค่าไฟฟ้ามาตรฐาน", 2, "LRB"), Cell("-", border="LRB", align="R"), _num("all_fac_total_baht", border="LRB")]),
+        ]),
+    ],
+    signatures=(
+        ("Mr.Suthad T.", "Approved By"),
+        ("Mr.Atsadang R.", "Approved By"),
+        ("Mrs.Wandee P.", "Accounting Section"),
+    ),
+    sig_y=255,
+)
+
+SOLAR_LAYOUT = BillLayout(
+    name="solar",
+    title="ค่าไฟฟ้าโซล่าเซลล์",
+    columns=[60, 8, 40, 40, 40],
+    derive=(
+        ("power_total", lambda v: v["power_peak_kw"] + v["power_offpeak_kw"] + v["power_holiday_kw"]),
+        ("total_power_before_discount", lambda v: v["power_peak_before_discount"] + v["power_offpeak_before_discount"] + v["power_holiday_before_discount"] + v["ft_before_discount"]),
+        ("total_power_after_discount",  lambda v: v["power_peak_after_discount"] + v["power_offpeak_after_discount"] + v["power_holiday_after_discount"] + v["ft_after_discount"] + v["power_demand"]),
+        ("rate_before_discount", lambda v: v["total_power_before_discount"] / v["power_total"]),
+        ("rate_after_discount",  lambda v: v["total_power_after_discount"] / v["power_total"]),
+        ("tbkk_total_amount", lambda v: v["direct_kw"] + v["admin_kw"] + v["indirect_kw"]),
+        ("tbkk_total_baht",   lambda v: v["direct_baht"] + v["admin_baht"] + v["indirect_baht"]),
+    ),
+    sections=[
+        Section([
+            Gap(8),
+            Row([
+                Cell("รายการ", 2, **_HEAD),
+                Cell("กิโลวัตต์/หน่วย/กิโลวาร์", **_HEAD),
+                Cell("จำนวนเงินก่อนหักส่่วนลด (บาท)", **_HEAD),
+                Cell("จำนวนเงินหลังหักส่่วนลด (บาท)", **_HEAD),
+            ]),
+            Row([Cell("ค่าพลังงานไฟฟ้าช่วง Peak"), Cell("P", align="C"), _num("power_peak_kw"), _num("power_peak_before_discount"), _num("power_peak_after_discount")]),
+            Row([Cell("ค่าพลังงานไฟฟ้าช่วง Off Peak"), Cell("OP", align="C"), _num("power_offpeak_kw"), _num("power_offpeak_before_discount"), _num("power_offpeak_after_discount")]),
+            Row([
+                Cell("ค่าพลังงานไฟฟ้าช่วง Holiday", border="LRB"), Cell("H", border="LRB", align="C"),
+                _num("power_holiday_kw", border="LRB"), _num("power_holiday_before_discount", border="LRB"), _num("power_holiday_after_discount", border="LRB"),
+            ]),
+            Row([Cell("ค่าไฟฟ้าผันแปร (Ft)", 2), Cell("", align="R"), _num("ft_before_discount"), _num("ft_after_discount")]),
+            Row([Cell("พลังงานไฟฟ้ารวม (หน่วย)", 2), _num("power_total"), Cell("", align="R"), Cell("", align="R")]),
+            Row([Cell("ค่าความต้องการพลังไฟฟ้า (บาท)", 2), Cell("", align="R"), Cell("", align="R"), _num("power_demand")]),
+            Row([
+                Cell("รวมค่าพลังงานไฟฟ้า", 2, "LRB"), Cell("", border="LRB", align="R"),
+                _num("total_power_before_discount", border="LRB"), _num("total_power_after_discount", border="LRB", style="B"),
+            ]),
+            Row([Cell("ค่าน้ำหนักคิดค่าไฟ (บาท/กิโลวัตต์)", 3, "LRB"), _num("rate_before_discount", border="LRB"), _num("rate_after_discount", border="LRB")], advance=2),
+        ]),
+        Section([
+            Row([Cell("ค่าไฟฟ้าจากการคำนวณ ไม่รวม VAT 7%", 5, **_HEAD)]),
+            Row([Cell("1.TBKK (MW)X1000*ERR", 3), _num("tbkk_total_amount"), _num("tbkk_total_baht")]),
+            Row([Cell("DIRECT TBKK", 3, align="R"), _num("direct_kw"), _num("direct_baht")]),
+            Row([Cell("ADMIN TBKK", 3, align="R"), _num("admin_kw"), _num("admin_baht")]),
+            Row([Cell("INDIRECT TBKK", 3, align="R"), _num("indirect_kw"), _num("indirect_baht")]),
+            Row([Cell("พลังงานไฟฟ้ารวม (หน่วย)", 3, "LRT"), _num("tbkk_total_amount", border="LRT"), Cell("-", border="LRT", align="R")]),
+            Row([Cell("ค่าไฟฟ้ามาตรฐาน", 3, "LRB"), Cell("-", border="LRB", align="R"), _num("tbkk_total_baht", border="LRB")]),
+        ]),
+    ],
+    signatures=(
+        ("Mr.Watcharagorn K.", "Prepared By"),
+        ("Mr.Atsadang R.", "Approved By"),
+        ("Mrs.Wandee P.", "Accounting Section"),
+    ),
+    sig_y=170,
+)
+
+ELECTRIC_PLAN = compile_layout(ELECTRIC_LAYOUT)
+SOLAR_PLAN = compile_layout(SOLAR_LAYOUT)
+
+
+def bill_path(plan, data):
+    """reports/<ชนิด>/<ปี>/<ชนิด>_report_<MM>_<ปี>.pdf ของบิล"""
+    month, year = data["bill_month"].split("/")
+    return os.path.join("reports", plan.name, year, f"{plan.name}_report_{int(month):02d}_{year}.pdf")
+
+def createBillReport(plan, data, force=False, out=None, profile=None):
+    """
+    วาดบิลตาม render plan
+    - force: render ใหม่เสมอ (ปกติจะข้ามถ้าข้อมูลและ layout เหมือนรอบก่อน ดู render_cache.py)
+    - out: ปลายทางของ PDF
+      None = บันทึกที่ reports/<ชนิด>/<ปี>/ (ใช้แคช)
+      file-like (binary) = เขียน PDF ลงไปตรง ๆ ไม่ผ่านไฟล์ชั่วคราว
+      bytes = คืน PDF เป็น bytes
+    - profile: "fast" / "balanced" / "compact" (ดู PowerPDF.OUTPUT_PROFILES, None = PowerPDF.DEFAULT_PROFILE)
+    คืน (path / out / bytes ของ PDF, True ถ้า render ใหม่ / False ถ้าใช้ไฟล์เดิม)
+    """
+    import PowerPDF
+    import render_cache
+
+    profile = profile or PowerPDF.DEFAULT_PROFILE
+    if out is None:
+        file_path = bill_path(plan, data)
+        digest = render_cache.input_hash(plan, data, profile)
+        if not force and render_cache.is_fresh(file_path, digest):
+            instrument.count("cached")
+            return file_path, False
+
+    with instrument.span(plan.name):
+        pdf = PowerPDF.PowerPDF(
+            title=plan.title,
+            period=convert_to_thai_date_range(data["bill_month"]),
+            issued=convert_to_thai_date_range(data["issued"]),
+            profile=profile,
+        )
+        pdf.add_page()
+        with instrument.span("render"):
+            plan.render(pdf, data)
+
+        if out is None:
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            pdf.output(file_path)
+        elif out is bytes:
+            result = bytes(pdf.output())
+        else:
+            pdf.output(out)
+            result = out
+    instrument.count("bills")
+
+    if out is None:
+        render_cache.record(file_path, digest)
+        return file_path, True
+    return result, True
+
+def createElectricityReport(data, force=False, out=None, profile=None):
+    """บิลค่าไฟ คืน path / out / bytes ของ PDF (อยากรู้ว่า render ใหม่หรือไม่ ใช้ createBillReport)"""
+    return createBillReport(ELECTRIC_PLAN, data, force, out, profile)[0]
+
+def createSolarReport(data, force=False, out=None, profile=None):
+    """บิลโซล่า คืน path / out / bytes ของ PDF (อยากรู้ว่า render ใหม่หรือไม่ ใช้ createBillReport)"""
+    return createBillReport(SOLAR_PLAN, data, force, out, profile)[0]
+
+
+BILL_PLANS = {plan.name: plan for plan in (ELECTRIC_PLAN, SOLAR_PLAN)}
+
+
+def _bill_order(item):
+    plan, data = item
+    month, year = data["bill_month"].split("/")
+    return list(BILL_PLANS).index(plan.name), int(year), int(month)
+
+def consolidated_path(items):
+    """reports/consolidated/bills_<ปี>.pdf (หรือ bills_<ปีแรก>-<ปีสุดท้าย>.pdf)"""
+    years = sorted({int(data["bill_month"].split("/")[1]) for _, data in items})
+    span = f"{years[0]}" if len(years) == 1 else f"{years[0]}-{years[-1]}"
+    return os.path.join("reports", "consolidated", f"bills_{span}.pdf")
+
+@instrument.timed("consolidated")
+def createConsolidatedReport(bills, filename=None, sort=True, profile=None):
+    """
+    รวมหลายบิล (ไฟฟ้า/โซล่า หลายเดือน) เป็น PDF ไฟล์เดียว
+    - bills: bill dict ที่มี "kind" ("electric" / "solar")
+    - filename: path / file-like (binary) / bytes = คืน PDF เป็น bytes
+      None = reports/consolidated/bills_<ปี>.pdf
+    - sort: เรียงตามชนิดบิลแล้วตามเดือน (False = ตามลำดับที่ส่งมา)
+    - profile: output profile (ดู createBillReport)
+    ฟอนต์/โลโก้/ส่วนคงที่ของหัวกระดาษและกล่องลายเซ็นฝังครั้งเดียวทั้งไฟล์
+    outline แบ่งเป็น ชนิดบิล > เดือน และเลขหน้าเริ่มใหม่ทุกบิล
+    ไม่ใช้แคช render (ดู createBillReport)
+    """
+    import PowerPDF
+
+    items = []
+    for data in bills:
+        plan = BILL_PLANS.get(data.get("kind"))
+        if plan is None:
+            raise ValueError(f"ไม่รู้จักชนิดบิล: {data.get('kind')!r}")
+        # ตรวจข้อมูลทุกบิลก่อนเริ่มวาด ไม่ให้ล้มกลางไฟล์
+        try:
+            plan.values(data)
+        except KeyError as e:
+            raise KeyError(f"{data.get('bill_month')}: {e.args[0]}") from None
+        items.append((plan, data))
+    if not items:
+        raise ValueError("ไม่มีบิล")
+    if sort:
+        items.sort(key=_bill_order)
+
+    pdf = PowerPDF.PowerPDF(title=items[0][0].title, profile=profile or PowerPDF.DEFAULT_PROFILE)
+    group = None
+    for plan, data in items:
+        period = convert_to_thai_date_range(data["bill_month"])
+        bookmarks = []
+        if plan.name != group:
+            group = plan.name
+            bookmarks.append((plan.title, 0))
+        bookmarks.append((period, 1))
+        pdf.start_bill(
+            plan.title, period, convert_to_thai_date_range(data["issued"]),
+            bookmarks, label=f"{plan.name} {data['bill_month']} - ",
+        )
+        with instrument.span(plan.name):
+            plan.render(pdf, data)
+        instrument.count("bills")
+
+    if filename is None:
+        filename = consolidated_path(items)
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+    if filename is bytes:
+        return bytes(pdf.output())
+    pdf.output(filename)
+    return filename
+
+
+# ===== รายการค่าไฟราย line (PDF) =====
+# (หัวคอลัมน์, key, ความกว้าง mm, การจัดแนว) รวม 186 mm = ความกว้างหน้า A4 ลบ margin
+listing_cols = [
+    ("GROUP PD",     "department",   28, "L"),
+    ("SECTION",      "section",      28, "L"),
+    ("LINE",         "line",         34, "L"),
+    ("KWH (UT)",     "kwh_ut",       24, "R"),
+    ("AMOUNT",       "amount",       24, "R"),
+    ("AMOUNT SOLAR", "amount_solar", 24, "R"),
+    ("TOTAL AMOUNT", "total_amount", 24, "R"),
+]
 
-    ws1.append([c[0] for c in cols_all])
+# จำนวนหน้าต่อไฟล์ย่อยของ createLineListingReport
+LISTING_CHUNK_PAGES = 200
 
-    # apply style ให้หัวตาราง
-    for col_num, (header, _) in enumerate(cols_all, 1):
-        cell = ws1.cell(row=1, column=col_num)
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.alignment = Alignment(horizontal="center", vertical="center")
-        cell.border = thin_border
+def listing_path(bill_month=None):
+    """reports/lines/line_listing[_<MM>_<ปี>].pdf"""
+    if not bill_month:
+        return os.path.join("reports", "lines", "line_listing.pdf")
+    month, year = bill_month.split("/")[-2:]
+    return os.path.join("reports", "lines", f"line_listing_{int(month):02d}_{year}.pdf")
 
-    # data rows
+def _listing_rows(data):
+    keys = [c[1] for c in listing_cols]
     for row in data:
-        values = [row.get(c[1], "") for c in cols_all]
-        ws1.append(values)
-
-    # apply border ให้ทุก cell
-    for row in ws1.iter_rows(min_row=2, max_row=ws1.max_row, min_col=1, max_col=len(cols_all)):
-        for cell in row:
-            cell.border = thin_border
-
-    # autosize
-    for col in ws1.columns:
-        max_len = max(len(str(cell.value)) if cell.value is not None else 0 for cell in col)
-        ws1.column_dimensions[get_column_letter(col[0].column)].width = max_len + 2
-
-    # ----- ตารางสรุปตาม department -----
-    ws2 = wb.create_sheet("By Department")
+        values = []
+        for k in keys:
+            v = row.get(k)
+            if v is None or v == "":
+                values.append("")
+            elif isinstance(v, str):
+                values.append(v)
+            else:
+                values.append(f"{v:,.2f}")
+        yield values
+
+@instrument.timed("listing")
+def createLineListingReport(data, filename=None, bill_month=None, issued=None, chunk_pages=LISTING_CHUNK_PAGES,
+                            profile=None):
+    """
+    PDF รายการค่าไฟทุก line (ตาราง listing_cols) สำหรับข้อมูลทั้งปีที่มีหลายพันหน้า
+    - data: iterable ของ row dict (อ่านรอบเดียว ใช้ sources.read_lines ได้)
+    - filename: path ของ PDF (None = reports/lines/line_listing[_<MM>_<ปี>].pdf)
+    - bill_month / issued: "MM/YYYY" / "DD/MM/YYYY" ที่แสดงบนหัวกระดาษ (ไม่ใส่ได้)
+    - chunk_pages: เขียนออกเป็นไฟล์ย่อย <ชื่อไฟล์>_partNNN.pdf ทีละเท่านี้หน้า (ดู PowerPDF.ChunkedPDF)
+      memory คงที่ตามจำนวนหน้าต่อไฟล์ย่อย  None = ไฟล์เดียว (ทุกหน้าอยู่ใน memory จนเขียนไฟล์)
+    - profile: output profile (ดู createBillReport)
+    คืน list ของ path ไฟล์ PDF ตามลำดับหน้า
+    """
+    import PowerPDF
+
+    doc = PowerPDF.ChunkedPDF(
+        filename or listing_path(bill_month),
+        title="รายการค่าไฟฟ้าแยกตาม LINE",
+        period=convert_to_thai_date_range(bill_month) if bill_month else "",
+        issued=convert_to_thai_date_range(issued) if issued else "",
+        chunk_pages=chunk_pages,
+        profile=profile or PowerPDF.DEFAULT_PROFILE,
+    )
+    with doc:
+        doc.table(
+            [c[0] for c in listing_cols],
+            _listing_rows(data),
+            col_widths=[c[2] for c in listing_cols],
+            aligns=[c[3] for c in listing_cols],
+        )
+    instrument.count("parts", len(doc.parts))
+    return doc.parts
+
+
+# ===== Cost allocation =====
+def allocateBillCosts(lines, electric=None, solar=None, basis="kwh_ut"):
+    """
+    ปันส่วนยอดบิลลงแต่ละ line (ดู allocation.py)
+    - lines: row dict ของแต่ละ line (ต้องมี kwh_ut หรือ kw + production_time ตาม basis)
+    - electric: bill dict ของ createElectricityReport ปันส่วน energy_total_baht เป็น amount
+    - solar: bill dict ของ createSolarReport ปันส่วน total_power_after_discount เป็น amount_solar
+    คืน CostAllocation
+      .rows() ส่งให้ createExcelReport
+      .bill_fields() / .bill_fields("amount_solar") รวมเข้ากับ bill dict ของ PDF
+    """
+    from allocation import CostAllocation
+
+    # ยอดบิลไม่ขึ้นกับ direct/admin/indirect จึงคำนวณได้ก่อนปันส่วน
+    grid_baht = ELECTRIC_PLAN.derived(electric, "energy_total_baht") if electric else 0
+    solar_baht = SOLAR_PLAN.derived(solar, "total_power_after_discount") if solar else 0
+    return CostAllocation(lines, grid_baht, solar_baht, basis)
+
+# ===== Excel =====
+# คอลัมน์ของตารางรวมทั้งหมด (หัวคอลัมน์, key ใน row dict)
+cols_all = [
+    ("GROUP PD",       "department"),
+    ("SECTION",        "section"),
+    ("LINE",           "line"),
+    ("PRODUCTION TIME","production_time"),
+    ("KW (PE)",        "kw"),
+    ("KWH",            "kwh"),
+    ("KWH (UT)",       "kwh_ut"),
+    ("AMOUNT",         "amount"),
+    ("AMOUNT SOLAR",   "amount_solar"),
+    ("TOTAL AMOUNT",   "total_amount"),
+]
 
-    grouped = defaultdict(lambda: {"kwh_ut":0, "amount":0, "amount_solar":0, "total_amount":0})
-    for row in data:
-        dep = row.get("department", "")
-        grouped[dep]["kwh_ut"]       += float(row.get("kwh_ut", 0) or 0)
-        grouped[dep]["amount"]       += float(row.get("amount", 0) or 0)
-        grouped[dep]["amount_solar"] += float(row.get("amount_solar", 0) or 0)
-        grouped[dep]["total_amount"] += float(row.get("total_amount", 0) or 0)
-
-    cols_dep = [
-        ("DEPARTMENT",    "department"),
-        ("KWH (UT)",      "kwh_ut"),
-        ("AMOUNT",        "amount"),
-        ("AMOUNT SOLAR",  "amount_solar"),
-        ("TOTAL AMOUNT",  "total_amount"),
-    ]
+# หัวคอลัมน์ของตารางสรุปแต่ละระดับ (ดู aggregate.SUMMARY_LEVELS)
+summary_labels = {
+    "department":   "DEPARTMENT",
+    "section":      "SECTION",
+    "line":         "LINE",
+    "kwh_ut":       "KWH (UT)",
+    "amount":       "AMOUNT",
+    "amount_solar": "AMOUNT SOLAR",
+    "total_amount": "TOTAL AMOUNT",
+}
+
+def summary_cols(keys, metrics=None):
+    """(หัวคอลัมน์, key) ของ keys ตามด้วย metrics (None = aggregate.SUMMARY_METRICS)"""
+    if metrics is None:
+        from aggregate import SUMMARY_METRICS as metrics
+    return [(summary_labels.get(k, k.upper()), k) for k in tuple(keys) + tuple(metrics)]
+
+# โหมด write-only วัดความกว้างคอลัมน์จากแถวแรกๆ เท่านี้
+STREAM_WIDTH_SAMPLE = 1000
+
+def save_workbook(wb, filename):
+    """
+    - wb: openpyxl Workbook หรือ backend ของ excel_writer (มี .save)
+    - filename: path / file-like (binary) / bytes (คืนเนื้อไฟล์ .xlsx เป็น bytes)
+    """
+    if filename is bytes:
+        buf = BytesIO()
+        wb.save(buf)
+        return buf.getvalue()
+    wb.save(filename)
+    return filename
 
-    ws2.append([c[0] for c in cols_dep])
-    for col_num, (header, _) in enumerate(cols_dep, 1):
-        cell = ws2.cell(row=1, column=col_num)
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.alignment = Alignment(horizontal="center", vertical="center")
-        cell.border = thin_border
-
-    for dep, vals in grouped.items():
-        ws2.append([
-            dep,
-            vals["kwh_ut"],
-            vals["amount"],
-            vals["amount_solar"],
-            vals["total_amount"],
-        ])
-
-    # apply border
-    for row in ws2.iter_rows(min_row=2, max_row=ws2.max_row, min_col=1, max_col=len(cols_dep)):
-        for cell in row:
-            cell.border = thin_border
-
-    # autosize
-    for col in ws2.columns:
-        max_len = max(len(str(cell.value)) if cell.value is not None else 0 for cell in col)
-        ws2.column_dimensions[get_column_letter(col[0].column)].width = max_len + 2
+def _write_excel_report(backend, data, filename, width_sample, max_width, summary_levels):
+    """เขียนชีท All Data + ชีทสรุปผ่าน backend (ดู excel_writer) แล้ว save"""
+    from aggregate import LineAggregator
 
-    wb.save(filename)
+    # ----- ตารางรวมทั้งหมด -----
+    ws1 = backend.add_sheet("All Data")
+    header = [c[0] for c in cols_all]
+    keys = [c[1] for c in cols_all]
+    widths = ColumnWidths(len(cols_all), max_rows=width_sample, cap=max_width)
+    widths.observe_header(header)
+
+    rows = iter(data)
+    if backend.widths_first:
+        # ต้องกำหนดความกว้างก่อนแถวแรก: อ่านล่วงหน้า width_sample แถวมาวัดแล้วค่อยเขียน
+        head = list(islice(rows, width_sample))
+        for row in head:
+            widths.observe([row.get(k, "") for k in keys])
+        ws1.set_widths(widths.widths())
+        rows = chain(head, rows)
+        del head
+    ws1.header(header)
+
+    # data rows: วัดความกว้างไปพร้อมกัน ไม่ต้องวนชีทซ้ำ
+    # สรุปผลไปพร้อมกับการเขียนแถว data จึงเป็น generator ที่อ่านได้รอบเดียวก็ได้ (เช่น sources.read_lines)
+    agg = LineAggregator(summary_levels)
+    observe = None if backend.widths_first else widths.observe
+    with instrument.span("rows"):
+        for row in rows:
+            values = [row.get(k, "") for k in keys]
+            if observe is not None:
+                observe(values)
+            ws1.row(values)
+            agg.append(row)
+    if not backend.widths_first:
+        ws1.set_widths(widths.widths())
+
+    # ----- ตารางสรุปแต่ละระดับ (department / section / line) -----
+    with instrument.span("summary"):
+        for title, keys in agg.levels.items():
+            ws = backend.add_sheet(title)
+            cols = summary_cols(keys, agg.metrics)
+            summary = agg.summary(title)
+
+            header = [c[0] for c in cols]
+            widths = ColumnWidths(len(cols), cap=max_width)
+            widths.observe_header(header)
+            for r in summary:
+                widths.observe(r)
+            ws.set_widths(widths.widths())
+
+            ws.header(header)
+            for r in summary:
+                ws.row(r)
+
+    with instrument.span("save"):
+        result = save_workbook(backend, filename)
+    instrument.count("excel_rows", agg.rows)
+    return result
+
+@instrument.timed("excel")
+def createExcelReport(data, filename="report.xlsx", write_only=False, width_sample=None, max_width=None,
+                      summary_levels=None, engine="openpyxl"):
+    """
+    - data: iterable ของ row dict ของแต่ละ line (อ่านรอบเดียว ใช้ sources.read_lines ได้)
+    - filename: path / file-like (binary) / bytes = คืนไฟล์ .xlsx เป็น bytes (ดู save_workbook)
+    - write_only: เขียนแบบ streaming (ดู createExcelReportStreaming)
+      รับ iterable อะไรก็ได้ และใช้ memory คงที่ไม่ขึ้นกับจำนวนแถว
+    - width_sample: วัดความกว้างคอลัมน์จาก N แถวแรกเท่านั้น
+      (None = ทุกแถว, โหมด write_only ใช้ STREAM_WIDTH_SAMPLE)
+    - max_width: ความกว้างคอลัมน์สูงสุด (None = ไม่จำกัด)
+    - summary_levels: ชีทสรุป ชื่อชีท -> key ที่ใช้ group
+      None = aggregate.SUMMARY_LEVELS (department / section / line) ในโหมดปกติ
+      และ aggregate.STREAM_SUMMARY_LEVELS (department) ในโหมด write_only / xmlstream
+      ให้ memory คงที่ (ชีท section / line เก็บทุกกลุ่มใน memory ขอเองได้ด้วย SUMMARY_LEVELS)
+    - engine: ตัวเขียน workbook (ดู excel_writer.ENGINES)
+      "openpyxl" = ค่าเริ่มต้น, "xmlstream" = เขียน XML เองทีละแถว
+      เร็วกว่า ได้ workbook เหมือนโหมดปกติเมื่อใช้ summary_levels เดียวกัน (ความกว้างวัดจากทุกแถว)
+    """
+    if summary_levels is None and (write_only or engine == "xmlstream"):
+        from aggregate import STREAM_SUMMARY_LEVELS as summary_levels
+    if engine == "openpyxl" and write_only:
+        if width_sample is None:
+            width_sample = STREAM_WIDTH_SAMPLE
+        return createExcelReportStreaming(data, filename, width_sample, max_width, summary_levels)
+    backend = excel_writer.make_backend(engine, write_only)
+    return _write_excel_report(backend, data, filename, width_sample, max_width, summary_levels)
+
+@instrument.timed("excel_stream")
+def createExcelReportStreaming(data, filename="report.xlsx", width_sample=STREAM_WIDTH_SAMPLE, max_width=None,
+                               summary_levels=None):
+    """
+    createExcelReport แบบ write-only ของ openpyxl
+    - data: iterable ของ row dict (generator ได้) อ่านผ่านครั้งเดียว
+    - แถวถูกเขียนลงไฟล์ชั่วคราวทันที ผลสรุปแต่ละระดับสะสมไปพร้อมกันเป็น chunk
+      memory จึงขึ้นกับจำนวนกลุ่ม ไม่ใช่จำนวนแถว
+    - summary_levels: None = aggregate.STREAM_SUMMARY_LEVELS (department อย่างเดียว)
+      ระดับ section / line มีกลุ่มเท่าจำนวน line memory จึงโตตามข้อมูล
+    - style ถูกสร้างครั้งเดียวแล้วใช้ cell ต้นแบบต่อคอลัมน์ซ้ำทุกแถว
+    - write-only ต้องกำหนดความกว้างคอลัมน์ก่อนเขียนแถวแรก
+      จึงวัดจาก header + width_sample แถวแรก (อ่านล่วงหน้าแล้วค่อยเขียน)
+    """
+    if summary_levels is None:
+        from aggregate import STREAM_SUMMARY_LEVELS as summary_levels
+    backend = excel_writer.OpenpyxlBackend(write_only=True)
+    return _write_excel_report(backend, data, filename, width_sample, max_width, summary_levels)
+
+# ===== Trend =====
+def trend_path(level, metric):
+    """reports/trend/trend_<level>_<metric>.xlsx"""
+    return os.path.join("reports", "trend", f"trend_{level}_{metric}.xlsx")
+
+def _write_sheet(backend, title, header, rows, max_width=None):
+    ws = backend.add_sheet(title)
+    widths = ColumnWidths(len(header), cap=max_width)
+    widths.observe_header(header)
+    for r in rows:
+        widths.observe(r)
+    ws.set_widths(widths.widths())
+    ws.header(header)
+    for r in rows:
+        ws.row(r)
+
+@instrument.timed("excel_trend")
+def createTrendReport(store, filename=None, level="department", metric="total_amount", start=None, end=None,
+                      engine="openpyxl"):
+    """
+    workbook แนวโน้มรายเดือนจาก history.HistoryStore (อ่าน aggregate รายเดือน ไม่ scan line ย้อนหลัง)
+    - filename: path / file-like (binary) / bytes (None = trend_path)
+    - level: "department" / "section" / "line" (ดู history.LEVELS)
+    - metric: ค่าที่แสดง (ดู aggregate.SUMMARY_METRICS)
+    - start / end: ช่วงเดือน เช่น "1/2024", "2025-08" (None = ทั้งหมด)
+    ชีท Trend = กลุ่ม x เดือน, YoY = เดือนล่าสุดเทียบเดือนเดียวกันของปีก่อน, Bills = ยอดบิลรายเดือน
+    """
+    import history
+
+    if filename is None:
+        filename = trend_path(level, metric)
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+    periods, rows = store.trend(level, metric, start, end)
+    key_labels = [c[0] for c in summary_cols(history.LEVELS[level], ())]
+    metric_label = summary_labels.get(metric, metric.upper())
+
+    backend = excel_writer.make_backend(engine)
+    _write_sheet(backend, "Trend", key_labels + periods, rows)
+
+    yoy_header, yoy = key_labels + ["LAST YEAR", "THIS MONTH", "CHANGE %"], []
+    if periods:
+        latest = periods[-1]
+        yoy_header = key_labels + [f"{metric_label} {history.previous_year(latest)}", f"{metric_label} {latest}",
+                                   "CHANGE %"]
+        yoy = [r[:-1] + [None if r[-1] is None else round(r[-1] * 100, 2)]
+               for r in store.year_over_year(level, metric, latest)]
+    _write_sheet(backend, "YoY", yoy_header, yoy)
+
+    bills = []
+    for kind in history.BILL_TOTALS:
+        bills.extend([kind, period, units, baht] for period, units, baht in store.bill_trend(kind, start, end))
+    _write_sheet(backend, "Bills", ["KIND", "PERIOD", "UNITS", "BAHT"], bills)
+
+    with instrument.span("save"):
+        return save_workbook(backend, filename)
 
 if __name__ == "__main__":
     data = {
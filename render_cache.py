@@ -0,0 +1,179 @@
+"""
+แคชการ render บิลด้วย hash ของข้อมูล
+
+hash = ข้อมูลบิลที่ normalize แล้ว + fingerprint ของ layout/โค้ดที่ใช้วาด
+เก็บไว้ใน manifest.json ในโฟลเดอร์เดียวกับไฟล์ output
+ถ้า hash ตรงและไฟล์ยังเป็นไฟล์เดิม (ขนาด/mtime ตรงกับที่บันทึก) ก็ไม่ต้อง render ใหม่
+
+manifest ถูกเขียนแบบ atomic (ไฟล์ชั่วคราว + os.replace)
+การอ่าน-แก้-เขียนทำภายใต้ file lock (ใน temp dir ของระบบ ไม่ทิ้งไฟล์ไว้ใน reports/) หลาย worker
+ของ batch / service ที่ render ลงโฟลเดอร์เดียวกันจึงไม่เขียน entry ของกันและกันทับ
+"""
+import hashlib
+import json
+import os
+import tempfile
+import types
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+import fpdf
+
+import PowerPDF
+import assets
+import layout
+
+MANIFEST = "manifest.json"
+
+# เพิ่มเลขนี้เมื่อเปลี่ยนการวาดแบบที่ fingerprint ตรวจไม่เจอ
+CACHE_VERSION = 1
+
+# สิทธิ์ของ manifest เหมือนไฟล์ที่สร้างด้วย open() ปกติ (mkstemp สร้าง 0600)
+# อ่าน umask ตอน import ครั้งเดียว เพราะ os.umask ต้องตั้งค่าใหม่เพื่ออ่าน (ไม่ thread-safe)
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+_FILE_MODE = 0o666 & ~_UMASK
+
+# key ที่ไม่มีผลต่อ PDF
+IGNORED_KEYS = ("kind",)
+
+# ไฟล์ที่มีผลต่อผลลัพธ์ทุกบิล (โค้ดวาด + ฟอนต์ + โลโก้)
+# main.py: createBillReport / วันที่ภาษาไทยบนหัวกระดาษ, assets.py: ความกว้างข้อความ / ย่อโลโก้ / zlib
+_RENDER_FILES = (
+    PowerPDF.__file__,
+    layout.__file__,
+    assets.__file__,
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py"),
+    "fonts/THSarabunNew.ttf",
+    "fonts/THSarabunNew-Bold.ttf",
+    "fonts/THSarabunNew-Italic.ttf",
+    PowerPDF.LOGO_TBKK,
+    PowerPDF.LOGO_TBK_GROUP,
+)
+
+_fingerprints = {}
+
+
+def _stable_const(value):
+    # repr ของ code object ซ้อน (lambda / comprehension) มีที่อยู่ใน memory จึงแทนด้วย fingerprint ของมันเอง
+    if isinstance(value, types.CodeType):
+        return _code_fingerprint(value)
+    if isinstance(value, tuple):
+        return tuple(_stable_const(v) for v in value)
+    if isinstance(value, frozenset):
+        # ลำดับของ set ขึ้นกับ hash ของ str ซึ่งสุ่มต่อ process
+        return tuple(sorted((_stable_const(v) for v in value), key=repr))
+    return value
+
+
+def _code_fingerprint(code):
+    return repr((code.co_code, _stable_const(code.co_consts), code.co_names))
+
+
+def _func_fingerprint(func):
+    return _code_fingerprint(func.__code__)
+
+
+def plan_fingerprint(plan) -> str:
+    """fingerprint ของ layout + ฟังก์ชัน derive + ไฟล์ที่ใช้วาด (คำนวณครั้งเดียวต่อ plan)"""
+    fp = _fingerprints.get(plan.name)
+    if fp is not None and fp[0] is plan:
+        return fp[1]
+
+    h = hashlib.sha256()
+    h.update(f"v{CACHE_VERSION} fpdf2 {fpdf.FPDF_VERSION}\n".encode())
+    h.update(repr(plan.layout._replace(derive=())).encode())
+    for key, func in plan.layout.derive:
+        h.update(key.encode() + _func_fingerprint(func).encode())
+    for path in _RENDER_FILES:
+        with open(path, "rb") as f:
+            h.update(hashlib.sha256(f.read()).digest())
+
+    digest = h.hexdigest()
+    _fingerprints[plan.name] = (plan, digest)
+    return digest
+
+
+def input_hash(plan, data: dict, profile: str = PowerPDF.DEFAULT_PROFILE) -> str:
+    """hash ของข้อมูลบิล (เรียง key, ตัด key ที่ไม่มีผล) รวมกับ fingerprint ของ plan และ output profile"""
+    normalized = {k: v for k, v in data.items() if k not in IGNORED_KEYS}
+    raw = json.dumps(normalized, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+    # profile ค่าเริ่มต้นไม่ใส่ใน hash (hash เดิมใน manifest ยังใช้ได้)
+    if profile != PowerPDF.DEFAULT_PROFILE:
+        raw += f"\nprofile={profile}"
+    return hashlib.sha256(f"{plan_fingerprint(plan)}\n{raw}".encode()).hexdigest()
+
+
+def _manifest_path(file_path):
+    return os.path.join(os.path.dirname(file_path), MANIFEST)
+
+
+def _load(manifest_path):
+    try:
+        with open(manifest_path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def is_fresh(file_path, digest) -> bool:
+    """ไฟล์ output มีอยู่ และถูก render จากข้อมูลที่ hash เท่ากับ digest"""
+    entry = _load(_manifest_path(file_path)).get(os.path.basename(file_path))
+    if not entry or entry.get("hash") != digest:
+        return False
+    try:
+        st = os.stat(file_path)
+    except OSError:
+        return False
+    return st.st_size == entry.get("size") and st.st_mtime_ns == entry.get("mtime_ns")
+
+
+def _lock_path(manifest_path):
+    # lock แยกไฟล์ เพราะ manifest ถูกแทนที่ด้วย os.replace ทุกครั้งที่เขียน (lock ตัวไฟล์เองไม่ได้)
+    # ตั้งชื่อจาก path เต็มของ manifest ไว้ใน temp dir ของระบบ
+    name = hashlib.sha256(os.path.abspath(manifest_path).encode()).hexdigest()[:24]
+    return os.path.join(tempfile.gettempdir(), f"render-cache-{name}.lock")
+
+
+@contextmanager
+def _locked(manifest_path):
+    with open(_lock_path(manifest_path), "a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        else:
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def record(file_path, digest):
+    """บันทึก hash ของไฟล์ที่เพิ่ง render ลง manifest ของโฟลเดอร์ (อ่าน manifest ล่าสุดแล้ว merge ภายใต้ lock)"""
+    manifest_path = _manifest_path(file_path)
+    st = os.stat(file_path)
+    with _locked(manifest_path):
+        manifest = _load(manifest_path)
+        manifest[os.path.basename(file_path)] = {
+            "hash": digest,
+            "size": st.st_size,
+            "mtime_ns": st.st_mtime_ns,
+        }
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(manifest_path) or ".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(manifest, f, ensure_ascii=False, indent=1, sort_keys=True)
+            os.chmod(tmp, _FILE_MODE)
+            os.replace(tmp, manifest_path)
+        except BaseException:
+            os.remove(tmp)
+            raise
@@ -0,0 +1,354 @@
+"""
+service สร้างรายงานแบบ long-running (asyncio + process pool ที่โหลดฟอนต์/โลโก้ไว้แล้ว)
+
+    python service.py --port 8765 --workers 2 --queue 64 --timeout 60
+    python service.py --unix /tmp/reports.sock
+
+API (HTTP/1.1 แบบง่าย ไม่ต้องใช้ package ภายนอก ฟังเฉพาะ localhost โดยค่าเริ่มต้น)
+    POST /reports/electric   body = bill dict (JSON)
+    POST /reports/solar      body = bill dict (JSON)
+    POST /reports/excel      body = {"rows": [...], "write_only": false, "engine": "openpyxl"}
+    GET  /health             สถานะคิว / worker
+
+query string
+    ?output=bytes   คืนไฟล์ PDF/XLSX ตรง ๆ จาก memory ไม่เขียนลง reports/
+                    (ค่าเริ่มต้นบันทึกไฟล์แล้วคืน JSON ที่มี path)
+    ?force=1        render ใหม่แม้ข้อมูลไม่เปลี่ยน (ดู render_cache.py)
+
+backpressure: คิวเต็มจะตอบ 503 + Retry-After ทันที (ไม่รอ)
+timeout: งานที่เกิน --timeout ตอบ 504 แต่ไม่ถูกหยุด worker ยังรันงานนั้นต่อจนจบและถือช่องไว้
+รับงานใหม่หลังงานเดิมจบจริงเท่านั้น จำนวนงานที่รันพร้อมกันจึงไม่เกินจำนวน worker
+(งานที่ไม่จบเลยจะถือช่องนั้นไว้จนกว่าจะ restart service)
+worker ตาย: pool ที่เสียจะถูกสร้างใหม่ งานที่รันอยู่ใน pool เดิมตอบ 500 งานถัดไปใช้ pool ใหม่
+error อื่น ๆ ตอบ 500 แบบไม่มีรายละเอียด traceback เขียนลง log ของ server
+read timeout: client ที่ส่ง request line + header + body ไม่ครบภายใน --read-timeout ได้ 408
+(ปิดการเชื่อมต่อที่ค้างไว้เฉย ๆ) ถ้าปิดการเชื่อมต่อก่อนส่ง body ครบได้ 400
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import os
+import signal
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from urllib.parse import parse_qs, urlsplit
+
+import batch
+
+MAX_BODY = 256 * 1024 * 1024
+# วินาทีที่รออ่าน request ทั้งก้อน (request line + header + body)
+READ_TIMEOUT = 30.0
+EXCEL_DIR = os.path.join("reports", "excel")
+
+CONTENT_TYPES = {
+    ".pdf": "application/pdf",
+    ".xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+REASONS = {
+    200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+    408: "Request Timeout", 413: "Payload Too Large", 500: "Internal Server Error",
+    503: "Service Unavailable", 504: "Gateway Timeout",
+}
+
+_job_ids = itertools.count(1)
+
+log = logging.getLogger(__name__)
+
+
+# ====== งานใน worker process ======
+def _render_job(job_id, kind, payload, force, want_bytes):
+    import main
+
+    t0 = time.perf_counter()
+    if kind == "excel":
+        options = {"write_only": bool(payload.get("write_only")), "engine": payload.get("engine", "openpyxl")}
+        if want_bytes:
+            path = "excel_report.xlsx"
+            data = main.createExcelReport(payload["rows"], bytes, **options)
+        else:
+            os.makedirs(EXCEL_DIR, exist_ok=True)
+            path = os.path.join(EXCEL_DIR, f"excel_report_{time.strftime('%Y%m%d-%H%M%S')}_{os.getpid()}_{job_id}.xlsx")
+            main.createExcelReport(payload["rows"], path, **options)
+        rendered = True
+    elif want_bytes:
+        # ไม่ผ่านไฟล์ใน reports/ ส่ง PDF จาก memory ตรง ๆ
+        path = main.bill_path(batch.PLANS[kind], payload)
+        data, rendered = main.createBillReport(batch.PLANS[kind], payload, out=bytes)
+    else:
+        path, rendered = main.createBillReport(batch.PLANS[kind], payload, force=force)
+
+    result = {"path": path, "rendered": rendered, "seconds": time.perf_counter() - t0}
+    if want_bytes:
+        result["bytes"] = data
+    return result
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message, headers=None):
+        super().__init__(message)
+        self.status = status
+        self.headers = headers or {}
+
+
+# ====== Service ======
+class ReportService:
+    """
+    - workers: จำนวน process ใน pool (= จำนวนงานที่รันพร้อมกัน) อย่างน้อย 1, None = จำนวน CPU
+    - max_queue: จำนวนงานที่รอได้ (อย่างน้อย 1) ถ้าเต็มจะปฏิเสธทันที
+    - timeout: วินาทีต่องาน (None = ไม่จำกัด) งานที่เกินเวลายังรันต่อใน worker และถือช่องไว้จนจบ
+    - read_timeout: วินาทีที่รออ่าน request ทั้งก้อนจาก client (None = ไม่จำกัด)
+    """
+
+    def __init__(self, workers=None, max_queue=64, timeout=60.0, read_timeout=READ_TIMEOUT):
+        if workers is not None and workers < 1:
+            raise ValueError(f"workers must be at least 1, got {workers}")
+        # asyncio.Queue(0) ไม่จำกัดขนาด จะไม่มี 503 อีก
+        if max_queue < 1:
+            raise ValueError(f"max_queue must be at least 1, got {max_queue}")
+        self.workers = workers if workers is not None else os.cpu_count() or 1
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.read_timeout = read_timeout
+        self.running = 0
+        self.done = 0
+        self.failed = 0
+        self.restarts = 0
+        self.pool = None
+        self.queue = None
+        self._dispatchers = []
+
+    async def start(self):
+        self.queue = asyncio.Queue(self.max_queue)
+        self.pool = self._new_pool()
+        # ให้ทุก worker โหลดฟอนต์/โลโก้เสร็จก่อนรับงานแรก
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*[loop.run_in_executor(self.pool, os.getpid) for _ in range(self.workers)])
+        self._dispatchers = [asyncio.create_task(self._dispatch()) for _ in range(self.workers)]
+
+    def _new_pool(self):
+        return ProcessPoolExecutor(max_workers=self.workers, initializer=batch._warm_worker)
+
+    def _replace_pool(self, broken):
+        """worker ใน pool ตาย (เช่นถูก kill / หน่วยความจำหมด) ProcessPoolExecutor ใช้ต่อไม่ได้ จึงสร้างใหม่"""
+        if self.pool is not broken:
+            return  # dispatcher อื่นสร้างใหม่ไปแล้ว
+        log.warning("worker process died, restarting the pool")
+        self.pool = self._new_pool()
+        self.restarts += 1
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    async def stop(self):
+        for task in self._dispatchers:
+            task.cancel()
+        await asyncio.gather(*self._dispatchers, return_exceptions=True)
+        self.pool.shutdown(wait=True, cancel_futures=True)
+
+    def status(self):
+        return {
+            "workers": self.workers,
+            "running": self.running,
+            "queued": self.queue.qsize(),
+            "max_queue": self.max_queue,
+            "done": self.done,
+            "failed": self.failed,
+            "restarts": self.restarts,
+        }
+
+    async def submit(self, kind, payload, force=False, want_bytes=False):
+        """ใส่งานเข้าคิวแล้วรอผล (HTTPError 503 ถ้าคิวเต็ม, 504 ถ้าเกินเวลา)"""
+        loop = asyncio.get_running_loop()
+        job = (next(_job_ids), kind, payload, force, want_bytes, loop.create_future())
+        try:
+            self.queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise HTTPError(503, "queue full", {"Retry-After": "1"})
+        return await job[-1]
+
+    async def _dispatch(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            job_id, kind, payload, force, want_bytes, waiter = await self.queue.get()
+            if waiter.cancelled():
+                continue
+            self.running += 1
+            pool = self.pool
+            try:
+                fut = loop.run_in_executor(pool, _render_job, job_id, kind, payload, force, want_bytes)
+                result = await asyncio.wait_for(asyncio.shield(fut), self.timeout)
+                self.done += 1
+                if not waiter.done():
+                    waiter.set_result(result)
+            except asyncio.TimeoutError:
+                self.failed += 1
+                if not waiter.done():
+                    waiter.set_exception(HTTPError(504, f"job {job_id} timed out after {self.timeout} s"))
+                # worker ยังทำงานเดิมอยู่ รอให้จบก่อนรับงานใหม่ (ไม่เกินจำนวน worker)
+                late, = await asyncio.gather(fut, return_exceptions=True)
+                if isinstance(late, BrokenProcessPool):
+                    self._replace_pool(pool)
+            except BrokenProcessPool:
+                self.failed += 1
+                if not waiter.done():
+                    waiter.set_exception(HTTPError(500, f"job {job_id}: worker process died"))
+                self._replace_pool(pool)
+            except Exception as e:
+                self.failed += 1
+                if not waiter.done():
+                    waiter.set_exception(e)
+            finally:
+                self.running -= 1
+
+    # ====== HTTP ======
+    async def handle(self, reader, writer):
+        try:
+            status, headers, body = await self._respond(reader)
+        except HTTPError as e:
+            status, headers, body = e.status, e.headers, _json({"error": str(e)})
+        except Exception:
+            log.exception("request failed")
+            status, headers, body = 500, {}, _json({"error": "internal server error"})
+        headers.setdefault("Content-Type", "application/json; charset=utf-8")
+        head = [f"HTTP/1.1 {status} {REASONS.get(status, '')}",
+                f"Content-Length: {len(body)}", "Connection: close"]
+        head += [f"{k}: {v}" for k, v in headers.items()]
+        try:
+            writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader):
+        """อ่าน request ทั้งก้อนภายใน read_timeout คืน (method, target, body)"""
+        try:
+            return await asyncio.wait_for(self._read_message(reader), self.read_timeout)
+        except asyncio.TimeoutError:
+            raise HTTPError(408, f"request not received within {self.read_timeout} s")
+        except asyncio.IncompleteReadError as e:
+            raise HTTPError(400, f"connection closed after {len(e.partial)} of {e.expected} body bytes")
+        except ValueError:
+            # StreamReader.readline: บรรทัดยาวเกิน limit
+            raise HTTPError(400, "request line or header too long")
+
+    async def _read_message(self, reader):
+        request_line = (await reader.readline()).decode("latin-1").strip()
+        if not request_line:
+            raise HTTPError(400, "empty request")
+        try:
+            method, target, _ = request_line.split(" ", 2)
+        except ValueError:
+            raise HTTPError(400, "bad request line")
+        length = 0
+        while True:
+            line = (await reader.readline()).decode("latin-1").strip()
+            if not line:
+                break
+            name, _, value = line.partition(":")
+            if name.strip().lower() == "content-length":
+                try:
+                    length = int(value)
+                except ValueError:
+                    raise HTTPError(400, f"bad Content-Length {value.strip()!r}")
+                if length < 0:
+                    raise HTTPError(400, f"bad Content-Length {length}")
+        if length > MAX_BODY:
+            raise HTTPError(413, "body too large")
+        body = await reader.readexactly(length) if length else b""
+        return method, target, body
+
+    async def _respond(self, reader):
+        method, target, body = await self._read_request(reader)
+        url = urlsplit(target)
+        query = parse_qs(url.query)
+        if url.path == "/health":
+            return 200, {}, _json(self.status())
+
+        parts = url.path.strip("/").split("/")
+        if len(parts) != 2 or parts[0] != "reports" or parts[1] not in ("electric", "solar", "excel"):
+            raise HTTPError(404, f"unknown path {url.path}")
+        if method != "POST":
+            raise HTTPError(405, "use POST")
+        try:
+            payload = json.loads(body or b"{}")
+        except ValueError as e:
+            raise HTTPError(400, f"invalid JSON: {e}")
+        if not isinstance(payload, dict):
+            raise HTTPError(400, "body must be a JSON object")
+        if parts[1] == "excel" and not isinstance(payload.get("rows"), list):
+            raise HTTPError(400, 'excel job needs {"rows": [...]}')
+
+        want_bytes = query.get("output", [""])[0] == "bytes"
+        force = query.get("force", ["0"])[0] not in ("0", "", "false")
+        try:
+            result = await self.submit(parts[1], payload, force, want_bytes)
+        except (KeyError, ValueError) as e:
+            # ข้อมูลบิลไม่ครบ/ไม่ถูกต้อง
+            raise HTTPError(400, f"{type(e).__name__}: {e}")
+
+        if want_bytes:
+            content_type = CONTENT_TYPES.get(os.path.splitext(result["path"])[1], "application/octet-stream")
+            headers = {
+                "Content-Type": content_type,
+                "Content-Disposition": f'attachment; filename="{os.path.basename(result["path"])}"',
+            }
+            return 200, headers, result["bytes"]
+        return 200, {}, _json(result)
+
+
+def _json(obj):
+    return json.dumps(obj, ensure_ascii=False).encode("utf-8")
+
+
+async def serve(host="127.0.0.1", port=8765, unix=None, workers=None, max_queue=64, timeout=60.0,
+                read_timeout=READ_TIMEOUT):
+    service = ReportService(workers, max_queue, timeout, read_timeout)
+    await service.start()
+    if unix:
+        server = await asyncio.start_unix_server(service.handle, path=unix)
+        where = unix
+    else:
+        server = await asyncio.start_server(service.handle, host, port)
+        where = f"http://{host}:{port}"
+    print(f"report service on {where} ({service.workers} workers, queue {max_queue}, timeout {timeout} s)")
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except (NotImplementedError, RuntimeError):
+            pass  # Windows: ใช้ Ctrl+C (KeyboardInterrupt) แทน
+    async with server:
+        await stop.wait()
+    await service.stop()
+    if unix and os.path.exists(unix):
+        os.remove(unix)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Long-running report service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", metavar="PATH", help="ฟังบน Unix socket แทน TCP")
+    parser.add_argument("--workers", type=int, default=None, help="จำนวน process (ค่าเริ่มต้น = จำนวน CPU)")
+    parser.add_argument("--queue", type=int, default=64, help="จำนวนงานที่รอในคิวได้")
+    parser.add_argument("--timeout", type=float, default=60.0,
+                        help="เวลาสูงสุดต่องาน (วินาที) งานที่เกินยังรันต่อจนจบและถือ worker ไว้")
+    parser.add_argument("--read-timeout", type=float, default=READ_TIMEOUT,
+                        help="เวลาสูงสุดที่รอ client ส่ง request ครบ (วินาที)")
+    args = parser.parse_args()
+    if args.workers is not None and args.workers < 1:
+        parser.error(f"--workers must be at least 1, got {args.workers}")
+    if args.queue < 1:
+        parser.error(f"--queue must be at least 1, got {args.queue}")
+    logging.basicConfig(format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    try:
+        asyncio.run(serve(args.host, args.port, args.unix, args.workers, args.queue, args.timeout,
+                          args.read_timeout))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,193 @@
+"""
+อ่านข้อมูลระดับ line จาก CSV / XLSX แบบ streaming
+
+    rows = sources.read_lines("dump.csv")            # หรือ .xlsx
+    main.createExcelReport(rows, "report.xlsx", write_only=True)
+
+- อ่านทีละ chunk (ไม่โหลดทั้งไฟล์) XLSX ใช้ openpyxl read_only
+- แปลงชนิดข้อมูลทีละคอลัมน์ของ chunk (เลือกตัวแปลงครั้งเดียวต่อคอลัมน์ ไม่ใช่ต่อ cell)
+- ได้ row dict ที่มีครบทุก key ของ LINE_TYPES (คอลัมน์ที่ไม่มีในไฟล์ได้ "" / None)
+  คอลัมน์อื่นที่ไม่รู้จักเก็บค่าตามที่อ่านได้
+- หัวคอลัมน์ใช้ได้ทั้ง key ("kwh_ut") และชื่อหัวตารางของ createExcelReport ("KWH (UT)")
+"""
+import csv
+import os
+import re
+from itertools import chain, islice
+
+CHUNK_SIZE = 8192
+
+# key ของ main.cols_all -> ชนิด
+LINE_TYPES = {
+    "department": str,
+    "section": str,
+    "line": str,
+    "production_time": float,
+    "kw": float,
+    "kwh": float,
+    "kwh_ut": float,
+    "amount": float,
+    "amount_solar": float,
+    "total_amount": float,
+}
+
+# หัวคอลัมน์ (หลัง normalize) ที่ไม่ตรงกับ key
+HEADER_ALIASES = {
+    "group_pd": "department",
+    "kw_pe": "kw",
+}
+
+
+class SourceError(ValueError):
+    """ข้อมูลในไฟล์ต้นทางแปลงชนิดไม่ได้ (บอกไฟล์ / แถว / คอลัมน์)"""
+
+
+def _to_str(v):
+    if v is None:
+        return ""
+    return v.strip() if isinstance(v, str) else str(v)
+
+
+def _to_float(v):
+    if v is None or v == "":
+        return None
+    if isinstance(v, str):
+        v = v.strip().replace(",", "")
+        if not v:
+            return None
+    return float(v)
+
+
+_CONVERTERS = {str: _to_str, float: _to_float}
+
+
+def normalize_header(name) -> str:
+    """"KWH (UT)" -> "kwh_ut", "GROUP PD" -> "department" """
+    key = re.sub(r"[^0-9a-z]+", "_", _to_str(name).lower()).strip("_")
+    return HEADER_ALIASES.get(key, key)
+
+
+def _chunks(header, rows, chunk_size, where):
+    """
+    แถวดิบ -> chunk ของ row dict ที่แปลงชนิดแล้ว
+    - rows: iterable ของ (เลขแถวในไฟล์, แถว list/tuple) เลขแถวนับแถวว่างที่ข้ามไปแล้วด้วย
+    """
+    keys = [normalize_header(h) for h in header]
+    width = len(keys)
+    duplicate = {k for k in keys if k and keys.count(k) > 1}
+    if duplicate:
+        raise SourceError(f"{where}: หัวคอลัมน์ซ้ำ {', '.join(sorted(duplicate))}")
+
+    # ตัวแปลงของแต่ละคอลัมน์ในไฟล์ (None = เก็บค่าตามเดิม) และ key ที่ไม่มีในไฟล์
+    converters = [_CONVERTERS[LINE_TYPES[k]] if k in LINE_TYPES else None for k in keys]
+    missing = [(k, _CONVERTERS[t](None)) for k, t in LINE_TYPES.items() if k not in keys]
+    columns_out = [i for i, k in enumerate(keys) if k]
+    out_keys = [keys[i] for i in columns_out] + [k for k, _ in missing]
+
+    rows = iter(rows)
+    while True:
+        numbered = list(islice(rows, chunk_size))
+        if not numbered:
+            return
+        # แถวสั้น/ยาวกว่า header (CSV) เติม/ตัดให้เท่ากัน
+        chunk = [r if len(r) == width else (list(r) + [None] * width)[:width] for _, r in numbered]
+
+        raw = list(zip(*chunk))
+        columns = []
+        for i in columns_out:
+            conv = converters[i]
+            if conv is None:
+                columns.append(raw[i])
+                continue
+            try:
+                columns.append(list(map(conv, raw[i])))
+            except (TypeError, ValueError):
+                # หาแถวที่ผิดเพื่อบอกตำแหน่ง (เฉพาะตอนผิดพลาด)
+                for n, v in enumerate(raw[i]):
+                    try:
+                        conv(v)
+                    except (TypeError, ValueError):
+                        raise SourceError(
+                            f"{where}: แถว {numbered[n][0]} คอลัมน์ {header[i]!r} ไม่ใช่ตัวเลข ({v!r})"
+                        ) from None
+                raise
+        n = len(chunk)
+        columns.extend([default] * n for _, default in missing)
+        yield [dict(zip(out_keys, values)) for values in zip(*columns)]
+
+
+def _not_blank(row):
+    return any(v not in (None, "") for v in row)
+
+
+def _numbered(rows, start):
+    """(เลขแถว, แถว) ของแถวที่ไม่ว่าง นับเลขก่อนข้ามแถวว่าง"""
+    return ((n, r) for n, r in enumerate(rows, start) if _not_blank(r))
+
+
+# ====== CSV ======
+def iter_csv_chunks(path, chunk_size=CHUNK_SIZE, encoding="utf-8-sig", delimiter=","):
+    """chunk (list ของ row dict) จากไฟล์ CSV ที่มีหัวคอลัมน์ในแถวแรก"""
+    with open(path, newline="", encoding=encoding) as f:
+        reader = csv.reader(f, delimiter=delimiter)
+        header = next(reader, None)
+        if header is None:
+            return
+        yield from _chunks(header, _numbered(reader, 2), chunk_size, os.path.basename(str(path)))
+
+
+def read_csv(path, chunk_size=CHUNK_SIZE, encoding="utf-8-sig", delimiter=","):
+    """row dict ทีละแถวจาก CSV (lazy)"""
+    return chain.from_iterable(iter_csv_chunks(path, chunk_size, encoding, delimiter))
+
+
+# ====== XLSX ======
+DEFAULT_SHEET = "All Data"
+
+
+def iter_xlsx_chunks(path, sheet=None, chunk_size=CHUNK_SIZE, header_row=1):
+    """
+    chunk (list ของ row dict) จาก workbook (openpyxl read_only ไม่โหลดทั้งไฟล์)
+    - sheet: ชื่อชีท (None = "All Data" ถ้ามี ไม่เช่นนั้นชีทแรก)
+    - header_row: แถวของหัวคอลัมน์ (เริ่มที่ 1)
+    """
+    import openpyxl
+
+    wb = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        if sheet is None:
+            sheet = DEFAULT_SHEET if DEFAULT_SHEET in wb.sheetnames else wb.sheetnames[0]
+        ws = wb[sheet]
+        rows = ws.iter_rows(min_row=header_row, values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        # ตัดคอลัมน์ว่างท้าย header (ชีทที่เคยมีข้อมูลกว้างกว่า)
+        width = len(header)
+        while width and header[width - 1] in (None, ""):
+            width -= 1
+        header = header[:width]
+        rows = ((n, r[:width]) for n, r in _numbered(rows, header_row + 1))
+        yield from _chunks(header, rows, chunk_size, f"{os.path.basename(str(path))}[{sheet}]")
+    finally:
+        wb.close()
+
+
+def read_xlsx(path, sheet=None, chunk_size=CHUNK_SIZE, header_row=1):
+    """row dict ทีละแถวจาก XLSX (lazy)"""
+    return chain.from_iterable(iter_xlsx_chunks(path, sheet, chunk_size, header_row))
+
+
+# ====== เลือกตามนามสกุลไฟล์ ======
+def iter_chunks(path, chunk_size=CHUNK_SIZE, **kwargs):
+    ext = os.path.splitext(str(path))[1].lower()
+    if ext in (".xlsx", ".xlsm"):
+        return iter_xlsx_chunks(path, chunk_size=chunk_size, **kwargs)
+    if ext in (".csv", ".txt"):
+        return iter_csv_chunks(path, chunk_size=chunk_size, **kwargs)
+    raise ValueError(f"ไม่รองรับไฟล์ {ext or path!r} (ใช้ .csv / .xlsx)")
+
+
+def read_lines(path, chunk_size=CHUNK_SIZE, **kwargs):
+    """row dict ทีละแถวจาก .csv / .xlsx (ดู read_csv / read_xlsx)"""
+    return chain.from_iterable(iter_chunks(path, chunk_size, **kwargs))
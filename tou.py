@@ -0,0 +1,225 @@
+"""
+แยกหน่วยไฟฟ้าตามช่วงเวลา TOU (P / OP / H) จากข้อมูลมิเตอร์ราย 15 นาที แบบ vectorized (NumPy)
+
+    usage = tou.TouUsage(kwh, "2025-08-01", groups=["pea", "fac_1", "fac_2", "fac_3", "mst"],
+                         holidays=tou.load_holidays("holidays.txt"))
+    bill.update(usage.bill_fields())     # energy_peak1_kw / energy_offpeak_kw / ... / fac_1_kw
+
+- kwh: array (จำนวนมิเตอร์, จำนวนช่วง) หน่วยที่ใช้ในแต่ละช่วง (NaN = ไม่มีข้อมูล นับเป็น 0)
+- ทุกมิเตอร์ใช้ช่วงเวลาเดียวกัน จึงจัดช่วงเป็น P / OP / H ครั้งเดียวต่อช่วง (ไม่ใช่ต่อ cell)
+  แล้วรวมหน่วยของทุกมิเตอร์ด้วยการคูณ matrix กับ one-hot ของ 3 ช่วง
+- H = วันที่ไม่อยู่ใน peak_days (เสาร์-อาทิตย์) และวันหยุดตามปฏิทิน ทั้งวัน
+  P = วันทำการ ช่วง peak_start - peak_end, OP = เวลาอื่นของวันทำการ
+- ค่าพลังไฟฟ้า (kW) = หน่วยของช่วง x (60 / นาทีต่อช่วง) คือค่าเฉลี่ยของช่วงนั้น
+  max_peak_kw = ค่าสูงสุดในช่วง P ของผลรวมมิเตอร์ที่เรียกเก็บ (coincident demand)
+"""
+import csv
+from datetime import date, datetime
+from typing import NamedTuple
+
+import numpy as np
+
+# รหัสช่วงเวลา (index ใน BUCKETS)
+PEAK, OFF_PEAK, HOLIDAY = 0, 1, 2
+BUCKETS = ("P", "OP", "H")
+
+# กลุ่มของมิเตอร์: มิเตอร์ PEA (เรียกเก็บเงิน) และมิเตอร์ย่อยของแต่ละโรงงาน (แถว F10-1 / F10-2 / F10-3 / MST ของบิล)
+BILLING_GROUP = "pea"
+FACTORY_GROUPS = ("fac_1", "fac_2", "fac_3", "mst")
+
+
+class TouSchedule(NamedTuple):
+    """
+    - peak_start / peak_end: ช่วง P ของวันทำการ ("HH:MM" ตั้งแต่ start ถึงก่อน end)
+    - peak_days: วันทำการ (0 = จันทร์ ... 6 = อาทิตย์) วันอื่นเป็น H ทั้งวัน
+    """
+    peak_start: str = "09:00"
+    peak_end: str = "22:00"
+    peak_days: tuple = (0, 1, 2, 3, 4)
+
+
+# อัตรา TOU ของ PEA: P = จันทร์-ศุกร์ 09:00-22:00
+DEFAULT_SCHEDULE = TouSchedule()
+
+
+def _minute_of_day(hhmm) -> int:
+    hour, minute = (int(p) for p in str(hhmm).split(":"))
+    if not (0 <= hour <= 24 and 0 <= minute < 60) or hour * 60 + minute > 1440:
+        raise ValueError(f"เวลาไม่ถูกต้อง {hhmm!r} (ใช้ HH:MM)")
+    return hour * 60 + minute
+
+
+def _parse_date(text) -> date:
+    text = text.strip()
+    if "/" in text:  # D/M/YYYY แบบเดียวกับ bill_month / issued
+        day, month, year = (int(p) for p in text.split("/"))
+        return date(year, month, day)
+    return date.fromisoformat(text)
+
+
+def load_holidays(path) -> frozenset:
+    """
+    ปฏิทินวันหยุดจากไฟล์ข้อความ / CSV บรรทัดละวัน (คอลัมน์แรกเป็นวันที่ คอลัมน์อื่นเช่นชื่อวันหยุดไม่สนใจ)
+    วันที่เป็น YYYY-MM-DD หรือ D/M/YYYY, บรรทัดว่างและบรรทัดที่ขึ้นต้นด้วย # ข้ามไป
+    """
+    days = set()
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        for line_no, row in enumerate(csv.reader(f), 1):
+            if not row or not row[0].strip() or row[0].lstrip().startswith("#"):
+                continue
+            try:
+                days.add(_parse_date(row[0]))
+            except ValueError:
+                raise ValueError(f"{path}: บรรทัด {line_no} วันที่ไม่ถูกต้อง {row[0]!r}") from None
+    return frozenset(days)
+
+
+def interval_times(start, n, interval=15) -> np.ndarray:
+    """เวลาเริ่มของแต่ละช่วง (datetime64[m]) n ช่วง ห่างกัน interval นาที"""
+    if isinstance(start, str):
+        start = datetime.fromisoformat(start)
+    return np.datetime64(start, "m") + np.arange(n) * np.timedelta64(interval, "m")
+
+
+def classify(times, schedule=DEFAULT_SCHEDULE, holidays=()) -> np.ndarray:
+    """
+    รหัสช่วงเวลา (PEAK / OFF_PEAK / HOLIDAY, int8) ของแต่ละช่วงจากเวลาเริ่มของช่วง
+    - times: array datetime64
+    - holidays: วันที่ (date) ที่เป็น H ทั้งวัน
+    """
+    times = np.asarray(times, "datetime64[m]")
+    days = times.astype("datetime64[D]")
+    minutes = (times - days).astype(np.int64)
+    # 1970-01-01 เป็นวันพฤหัส (3)
+    weekday = (days.astype(np.int64) + 3) % 7
+
+    start, end = _minute_of_day(schedule.peak_start), _minute_of_day(schedule.peak_end)
+    codes = np.full(times.shape, OFF_PEAK, np.int8)
+    codes[(minutes >= start) & (minutes < end)] = PEAK
+    off_day = ~np.isin(weekday, list(schedule.peak_days))
+    if holidays:
+        off_day |= np.isin(days, np.array(sorted(holidays), "datetime64[D]"))
+    codes[off_day] = HOLIDAY
+    return codes
+
+
+class TouUsage:
+    """
+    - kwh: array (จำนวนมิเตอร์, จำนวนช่วง) หรือ 1 มิติสำหรับมิเตอร์เดียว
+    - start: เวลาเริ่มของช่วงแรก (datetime / "YYYY-MM-DD[ HH:MM]") หรือใช้ times แทน
+    - interval: นาทีต่อช่วง
+    - groups: กลุ่มของแต่ละมิเตอร์ ("pea" / "fac_1" / ... / None) None = ไม่ระบุกลุ่ม
+    - schedule / holidays: ดู TouSchedule / load_holidays
+    - times: เวลาของแต่ละช่วง (array datetime64) เมื่อช่วงไม่ต่อเนื่องกัน
+    - label: "start" = เวลาในข้อมูลเป็นเวลาเริ่มช่วง, "end" = เวลาสิ้นสุดช่วง (ข้อมูล export ส่วนใหญ่)
+    ผลเป็น array ตามลำดับมิเตอร์: energy (มิเตอร์ x 3 ช่วง), demand (kW สูงสุดในช่วง P), missing
+    """
+
+    def __init__(self, kwh, start=None, interval=15, groups=None, schedule=DEFAULT_SCHEDULE, holidays=(),
+                 times=None, label="start"):
+        kwh = np.asarray(kwh, np.float64)
+        if kwh.ndim == 1:
+            kwh = kwh[np.newaxis, :]
+        if kwh.ndim != 2:
+            raise ValueError("kwh ต้องเป็น array (จำนวนมิเตอร์, จำนวนช่วง)")
+        n_meters, n = kwh.shape
+
+        if times is None:
+            if start is None:
+                raise ValueError("ต้องระบุ start หรือ times")
+            times = interval_times(start, n, interval)
+        else:
+            times = np.asarray(times, "datetime64[m]")
+            if times.shape != (n,):
+                raise ValueError(f"times มี {times.size} ค่า แต่ kwh มี {n} ช่วง")
+        if label == "end":
+            times = times - np.timedelta64(interval, "m")
+        elif label != "start":
+            raise ValueError(f"label ไม่ถูกต้อง {label!r} (ใช้ start / end)")
+
+        if groups is None:
+            groups = [None] * n_meters
+        groups = list(groups)
+        if len(groups) != n_meters:
+            raise ValueError(f"groups มี {len(groups)} ค่า แต่มี {n_meters} มิเตอร์")
+        unknown = {g for g in groups if g is not None and g != BILLING_GROUP and g not in FACTORY_GROUPS}
+        if unknown:
+            raise ValueError(f"กลุ่มมิเตอร์ไม่ถูกต้อง {', '.join(map(repr, sorted(unknown)))} "
+                             f"(ใช้ได้: {BILLING_GROUP}, {', '.join(FACTORY_GROUPS)})")
+
+        self.times = times
+        self.interval = interval
+        self.groups = groups
+        self.codes = classify(times, schedule, holidays)
+
+        missing = np.isnan(kwh)
+        self.missing = missing.sum(axis=1)
+        kwh = np.where(missing, 0.0, kwh) if self.missing.any() else kwh
+        self.kwh = kwh
+
+        onehot = np.zeros((n, len(BUCKETS)))
+        onehot[np.arange(n), self.codes] = 1.0
+        self.energy = kwh @ onehot
+        self.peak_mask = self.codes == PEAK
+        to_kw = 60.0 / interval
+        self.demand = (kwh[:, self.peak_mask].max(axis=1) * to_kw if self.peak_mask.any()
+                       else np.zeros(n_meters))
+        self._to_kw = to_kw
+
+    def _select(self, group):
+        return np.array([g == group for g in self.groups], bool)
+
+    def billing_meters(self) -> np.ndarray:
+        """
+        มิเตอร์ที่เรียกเก็บเงิน (mask ตามลำดับมิเตอร์)
+        - มีกลุ่ม "pea" = มิเตอร์กลุ่ม "pea" เท่านั้น
+        - ไม่มี "pea" = มิเตอร์ที่ไม่ระบุกลุ่ม (None) มิเตอร์ย่อยของโรงงานไม่นับ (อยู่ใต้มิเตอร์หลักอยู่แล้ว)
+        - มีแต่มิเตอร์ย่อย -> ValueError (รวมกันจะไม่ใช่ยอดที่ PEA เรียกเก็บ)
+        """
+        mask = self._select(BILLING_GROUP)
+        if not mask.any():
+            mask = self._select(None)
+        if not mask.any():
+            raise ValueError(f'ไม่มีมิเตอร์ที่เรียกเก็บเงิน (กลุ่ม "{BILLING_GROUP}" หรือไม่ระบุกลุ่ม)'
+                             f" มีแต่มิเตอร์ย่อย {', '.join(sorted(set(self.groups)))}")
+        return mask
+
+    def max_peak_kw(self) -> float:
+        """ค่าพลังไฟฟ้าสูงสุดในช่วง P ของผลรวมมิเตอร์ที่เรียกเก็บ (ไม่ใช่ผลรวมค่าสูงสุดของแต่ละมิเตอร์)"""
+        if not self.peak_mask.any():
+            return 0.0
+        total = self.kwh[self.billing_meters()][:, self.peak_mask].sum(axis=0)
+        return float(total.max() * self._to_kw)
+
+    def factory_kwh(self) -> dict:
+        """หน่วยรวมของมิเตอร์ย่อยแต่ละกลุ่มโรงงาน {กลุ่ม: หน่วย}"""
+        totals = self.energy.sum(axis=1)
+        return {g: float(totals[self._select(g)].sum()) for g in FACTORY_GROUPS}
+
+    def bill_fields(self) -> dict:
+        """
+        key ของบิล createElectricityReport ที่คำนวณจากมิเตอร์ได้
+        energy_peak1_kw / energy_offpeak_kw / energy_holiday1_kw / max_peak_kw จากมิเตอร์ที่เรียกเก็บ
+        และ fac_1_kw / fac_2_kw / fac_3_kw / mst_kw จากมิเตอร์ย่อย
+        (ค่า *_baht, peak2 / holiday2 และ direct / admin / indirect ยังต้องมาจากบิลหรือ allocateBillCosts)
+        """
+        peak, off_peak, holiday = self.energy[self.billing_meters()].sum(axis=0).tolist()
+        fields = {
+            "max_peak_kw": self.max_peak_kw(),
+            "energy_peak1_kw": peak,
+            "energy_offpeak_kw": off_peak,
+            "energy_holiday1_kw": holiday,
+        }
+        fields.update((f"{g}_kw", v) for g, v in self.factory_kwh().items())
+        return fields
+
+    def rows(self, names=None):
+        """row dict ต่อมิเตอร์: meter, group, P / OP / H, demand_kw, missing"""
+        names = names if names is not None else range(1, len(self.groups) + 1)
+        for name, group, energy, demand, missing in zip(names, self.groups, self.energy.tolist(),
+                                                         self.demand.tolist(), self.missing.tolist()):
+            row = {"meter": name, "group": group or ""}
+            row.update(zip(BUCKETS, energy))
+            row["demand_kw"] = demand
+            row["missing"] = missing
+            yield row